@@ -0,0 +1,84 @@
+"""세션 백엔드별 업데이트 처리 지연 비교
+
+Telethon 이 업데이트를 받을 때 세션에 하는 일(엔티티 저장, 업데이트 상태 갱신,
+save)을 흉내 내 백엔드마다 한 번의 처리에 걸리는 시간을 잰다.
+실제 배포 디스크(EBS 등)와 같은 경로에서 실행해야 의미가 있다.
+
+    python bench_session.py --updates 2000 --dir /tmp/bench
+"""
+from __future__ import annotations
+
+import argparse
+import datetime
+import os
+import shutil
+import statistics
+import tempfile
+import time
+
+from telethon.tl import types
+
+from session_store import BACKENDS, build_session
+
+
+def _fake_update(i: int) -> types.Updates:
+    users = [
+        types.User(id=10_000 + (i * 3 + k) % 500, access_hash=i * 7 + k, username=f"user{k}_{i % 500}")
+        for k in range(3)
+    ]
+    chats = [types.Channel(
+        id=20_000 + i % 50,
+        title=f"channel {i % 50}",
+        photo=types.ChatPhotoEmpty(),
+        date=datetime.datetime.now(datetime.timezone.utc),
+        access_hash=i,
+        username=f"chan{i % 50}",
+        broadcast=True,
+    )]
+    return types.Updates(updates=[], users=users, chats=chats, date=datetime.datetime.now(), seq=i)
+
+
+def _bench(backend: str, directory: str, updates: int, save_every: int) -> list:
+    session = build_session(backend, os.path.join(directory, f"bench_{backend}"), commit_interval_s=30.0)
+    if isinstance(session, str):
+        from telethon.sessions import SQLiteSession
+        session = SQLiteSession(session)
+    state = types.updates.State(pts=1, qts=0, date=datetime.datetime.now(datetime.timezone.utc), seq=0, unread_count=0)
+    samples = []
+    for i in range(updates):
+        t0 = time.perf_counter()
+        session.process_entities(_fake_update(i))
+        session.set_update_state(0, state)
+        if i % save_every == 0:
+            session.save()
+        samples.append(time.perf_counter() - t0)
+    session.close()
+    return samples
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--updates", type=int, default=2000)
+    parser.add_argument("--save-every", type=int, default=1, help="N 번째 업데이트마다 session.save() 호출")
+    parser.add_argument("--dir", default=None, help="세션 파일을 만들 디렉터리 (기본: 임시 디렉터리)")
+    args = parser.parse_args()
+
+    directory = args.dir or tempfile.mkdtemp(prefix="bench_session_")
+    os.makedirs(directory, exist_ok=True)
+    print(f"{'backend':<12} {'p50 ms':>8} {'p99 ms':>8} {'max ms':>8} {'total s':>8}")
+    try:
+        for backend in BACKENDS:
+            samples = _bench(backend, directory, args.updates, args.save_every)
+            ordered = sorted(samples)
+            p99 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))]
+            print(
+                f"{backend:<12} {statistics.median(samples) * 1e3:8.3f} {p99 * 1e3:8.3f} "
+                f"{max(samples) * 1e3:8.3f} {sum(samples):8.3f}"
+            )
+    finally:
+        if not args.dir:
+            shutil.rmtree(directory, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -4,7 +4,8 @@ import httpx
 import logging
 import os
 from typing import Optional, Union, Dict
-from utils.retry_utils import run_with_retries
+from utils.http_clients import get_async_client
+from utils.retry_utils import HttpStatusError, parse_retry_after, run_with_retries
 
 
 def _verify_option_from_env() -> object:
@@ -17,7 +18,29 @@ def _verify_option_from_env() -> object:
     return True
 
 
-def send_html_message(
+def _client() -> httpx.AsyncClient:
+    return get_async_client("telegram", verify=_verify_option_from_env())
+
+
+def _raise_for_status(r: httpx.Response, what: str) -> None:
+    """비정상 응답을 HttpStatusError 로 변환 (429 의 parameters.retry_after 반영)"""
+    if r.status_code == 200:
+        return
+    try:
+        body = r.text
+    except Exception:
+        body = "<no body>"
+    logging.error("telegram %s error http=%s body=%s", what, r.status_code, body)
+    retry_after = parse_retry_after(r.headers.get("retry-after"))
+    if retry_after is None and r.status_code == 429:
+        try:
+            retry_after = float(r.json().get("parameters", {}).get("retry_after"))
+        except Exception:
+            retry_after = None
+    raise HttpStatusError("telegram", r.status_code, retry_after=retry_after, body=body[:500])
+
+
+async def send_html_message(
     bot_token: str,
     chat_id: int,
     text: str,
@@ -36,7 +59,7 @@ def send_html_message(
 
     base_url = f"https://api.telegram.org/bot{bot_token}"
 
-    def _do_request() -> Union[bool, Dict]:
+    async def _do_request() -> Union[bool, Dict]:
         if photo_bytes:
             url = f"{base_url}/sendPhoto"
             files = {
@@ -47,8 +70,7 @@ def send_html_message(
                 "caption": text,
                 "parse_mode": "HTML",
             }
-            with httpx.Client(timeout=timeout_s, verify=_verify_option_from_env()) as client:
-                r = client.post(url, data=data, files=files)
+            r = await _client().post(url, data=data, files=files, timeout=timeout_s)
         else:
             url = f"{base_url}/sendMessage"
             payload = {
@@ -57,16 +79,9 @@ def send_html_message(
                 "parse_mode": "HTML",
                 "disable_web_page_preview": True,
             }
-            with httpx.Client(timeout=timeout_s, verify=_verify_option_from_env()) as client:
-                r = client.post(url, json=payload)
+            r = await _client().post(url, json=payload, timeout=timeout_s)
         
-        if r.status_code != 200:
-            try:
-                body = r.text
-            except Exception:
-                body = "<no body>"
-            logging.error("telegram send error http=%s body=%s", r.status_code, body)
-            raise RuntimeError(f"telegram http {r.status_code}")
+        _raise_for_status(r, "send")
         
         try:
             data = r.json()
@@ -90,7 +105,7 @@ def send_html_message(
         return True
 
     try:
-        return run_with_retries(_do_request, attempts=3, base_delay_s=0.5, backoff_factor=2.0)
+        return await run_with_retries(_do_request, upstream="telegram", attempts=3, base_delay_s=0.5, backoff_factor=2.0)
     except Exception:
         logging.exception("telegram send exception")
         if return_message_id:
@@ -98,31 +113,40 @@ def send_html_message(
         return False
 
 
-def update_message_text(bot_token: str, chat_id: int, message_id: int, text: str, timeout_s: int) -> bool:
-    """텔레그램 메시지 텍스트 수정"""
+async def update_message_text(
+    bot_token: str,
+    chat_id: int,
+    message_id: int,
+    text: str,
+    timeout_s: int,
+    caption: bool = False,
+) -> bool:
+    """텔레그램 메시지 텍스트 수정 (사진 메시지는 caption=True 로 캡션 수정)"""
     if not text:
         return False
 
-    url = f"https://api.telegram.org/bot{bot_token}/editMessageText"
-    payload = {
-        "chat_id": chat_id,
-        "message_id": message_id,
-        "text": text,
-        "parse_mode": "HTML",
-        "disable_web_page_preview": True,
-    }
-
-    def _do_request() -> bool:
-        with httpx.Client(timeout=timeout_s, verify=_verify_option_from_env()) as client:
-            r = client.post(url, json=payload)
+    if caption:
+        url = f"https://api.telegram.org/bot{bot_token}/editMessageCaption"
+        payload = {
+            "chat_id": chat_id,
+            "message_id": message_id,
+            "caption": text,
+            "parse_mode": "HTML",
+        }
+    else:
+        url = f"https://api.telegram.org/bot{bot_token}/editMessageText"
+        payload = {
+            "chat_id": chat_id,
+            "message_id": message_id,
+            "text": text,
+            "parse_mode": "HTML",
+            "disable_web_page_preview": True,
+        }
+
+    async def _do_request() -> bool:
+        r = await _client().post(url, json=payload, timeout=timeout_s)
         
-        if r.status_code != 200:
-            try:
-                body = r.text
-            except Exception:
-                body = "<no body>"
-            logging.error("telegram edit error http=%s body=%s", r.status_code, body)
-            return False
+        _raise_for_status(r, "edit")
         
         try:
             data = r.json()
@@ -137,32 +161,31 @@ def update_message_text(bot_token: str, chat_id: int, message_id: int, text: str
         return True
 
     try:
-        return run_with_retries(_do_request, attempts=3, base_delay_s=0.5, backoff_factor=2.0)
+        return await run_with_retries(_do_request, upstream="telegram", attempts=3, base_delay_s=0.5, backoff_factor=2.0)
     except Exception:
         logging.exception("telegram edit exception")
         return False
 
 
-def check_bot_access(bot_token: str, chat_id: int, timeout_s: int) -> None:
+async def check_bot_access(bot_token: str, chat_id: int, timeout_s: int) -> None:
     """Logs chat info via Bot API to verify access/permissions."""
     url = f"https://api.telegram.org/bot{bot_token}/getChat"
     params = {"chat_id": chat_id}
     try:
-        with httpx.Client(timeout=timeout_s, verify=_verify_option_from_env()) as client:
-            r = client.get(url, params=params)
-            if r.status_code != 200:
-                logging.error("getChat error http=%s body=%s", r.status_code, r.text)
-                return
-            data = r.json()
-            if not data.get("ok"):
-                logging.error("getChat ok=false desc=%s", data.get("description"))
-                return
-            result = data.get("result", {})
-            logging.info(
-                "bot access ok | chat_title=%s type=%s id=%s",
-                result.get("title"),
-                result.get("type"),
-                result.get("id"),
-            )
+        r = await _client().get(url, params=params, timeout=timeout_s)
+        if r.status_code != 200:
+            logging.error("getChat error http=%s body=%s", r.status_code, r.text)
+            return
+        data = r.json()
+        if not data.get("ok"):
+            logging.error("getChat ok=false desc=%s", data.get("description"))
+            return
+        result = data.get("result", {})
+        logging.info(
+            "bot access ok | chat_title=%s type=%s id=%s",
+            result.get("title"),
+            result.get("type"),
+            result.get("id"),
+        )
     except Exception:
-        logging.exception("getChat exception")
\ No newline at end of file
+        logging.exception("getChat exception")
@@ -0,0 +1,226 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import os
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+
+from source_registry import ChatMeta, SourceRegistry
+from utils.metrics import metrics
+
+
+class CatchupState:
+    """소스 채팅별 마지막 처리 message id 와 최근 처리 목록
+
+    last_ids 는 라이브/백필이 처리한 최고 id(라이브 워터마크)이고, backfill_from 은
+    아직 백필하지 않은 공백의 시작점(백필 워터마크)이다. 백필 워터마크는 시작 시와
+    연결이 끊길 때 last_ids 에서 스냅샷으로 잡히고, 백필이 그 채팅을 끝냈을 때만
+    지워진다. 그래서 catch-up 전에 라이브 메시지가 먼저 와도 공백이 건너뛰어지지 않는다.
+    둘 다 JSON 파일로 보관하고, 최근 처리한 (chat_id, msg_id) 는 메모리에만
+    제한된 크기로 유지해 라이브/백필 중복 처리를 막는다.
+    """
+
+    def __init__(self, path: str, recent_size: int = 4096):
+        self.path = path
+        self.last_ids: Dict[int, int] = {}
+        self.backfill_from: Dict[int, int] = {}
+        self._recent: "OrderedDict[Tuple[int, int], None]" = OrderedDict()
+        self._recent_size = recent_size
+        self._dirty = False
+
+    def load(self) -> None:
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if "last_ids" in data:
+                self.last_ids = {int(k): int(v) for k, v in data["last_ids"].items()}
+                self.backfill_from = {int(k): int(v) for k, v in data.get("backfill_from", {}).items()}
+            else:
+                # 이전 형식: {chat_id: last_id}
+                self.last_ids = {int(k): int(v) for k, v in data.items()}
+        except Exception:
+            logging.warning("catch-up state unreadable, ignoring: %s", self.path)
+        self.snapshot()
+
+    def snapshot(self) -> None:
+        """현재 라이브 워터마크를 백필 시작점으로 기록 (이미 밀린 공백이 있으면 더 이른 쪽 유지)"""
+        for chat_id, last_id in self.last_ids.items():
+            if chat_id not in self.backfill_from:
+                self.backfill_from[chat_id] = last_id
+                self._dirty = True
+
+    def backfilled(self, chat_id: int) -> None:
+        """이 채팅의 공백 백필 완료"""
+        if self.backfill_from.pop(chat_id, None) is not None:
+            self._dirty = True
+
+    def _write(self, last_ids: Dict[int, int], backfill_from: Dict[int, int]) -> None:
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "last_ids": {str(k): v for k, v in last_ids.items()},
+                    "backfill_from": {str(k): v for k, v in backfill_from.items()},
+                },
+                f,
+            )
+        os.replace(tmp, self.path)
+
+    async def flush(self) -> None:
+        if not self.path or not self._dirty:
+            return
+        self._dirty = False
+        try:
+            await asyncio.to_thread(self._write, dict(self.last_ids), dict(self.backfill_from))
+        except Exception:
+            self._dirty = True
+            logging.exception("failed to write catch-up state: %s", self.path)
+
+    def seen(self, chat_id: int, msg_id: int) -> bool:
+        return (chat_id, msg_id) in self._recent
+
+    def mark(self, chat_id: int, msg_id: int) -> None:
+        key = (chat_id, msg_id)
+        self._recent[key] = None
+        self._recent.move_to_end(key)
+        while len(self._recent) > self._recent_size:
+            self._recent.popitem(last=False)
+        if msg_id > self.last_ids.get(chat_id, 0):
+            self.last_ids[chat_id] = msg_id
+            self._dirty = True
+
+
+class LivePriority:
+    """라이브 메시지 처리 중에는 백필이 기다리도록 하는 게이트"""
+
+    def __init__(self) -> None:
+        self._active = 0
+        self._idle = asyncio.Event()
+        self._idle.set()
+
+    def enter(self) -> None:
+        self._active += 1
+        self._idle.clear()
+
+    def exit(self) -> None:
+        self._active = max(0, self._active - 1)
+        if self._active == 0:
+            self._idle.set()
+
+    async def wait_idle(self) -> None:
+        await self._idle.wait()
+
+
+class CatchupRunner:
+    """재시작/재연결 사이에 놓친 메시지를 iter_messages 로 가져와 재처리
+
+    진행 위치(state.mark)는 handler 가 메시지 처리를 마친 뒤 직접 기록한다
+    (앨범 조각처럼 나중에 묶어 처리하는 경우 넘겨받은 시점에 기록하면 안 되므로).
+    """
+
+    def __init__(
+        self,
+        client,
+        registry: SourceRegistry,
+        state: CatchupState,
+        live: LivePriority,
+        handler: Callable[[object], Awaitable[None]],
+        concurrency: int = 2,
+        max_age_minutes: float = 60.0,
+        max_messages: int = 50,
+    ):
+        self.client = client
+        self.registry = registry
+        self.state = state
+        self.live = live
+        self.handler = handler
+        self.concurrency = max(1, concurrency)
+        self.max_age = timedelta(minutes=max_age_minutes)
+        self.max_messages = max_messages
+        self._lock = asyncio.Lock()
+
+    async def _fetch_gap(self, meta: ChatMeta, last_id: int) -> list:
+        cutoff = datetime.now(timezone.utc) - self.max_age
+        gap = []
+        async for msg in self.client.iter_messages(
+            meta.input_peer(),
+            min_id=last_id,
+            limit=self.max_messages,
+        ):
+            # 최신 → 과거 순으로 오므로 나이 제한을 넘으면 중단
+            if msg.date and msg.date < cutoff:
+                break
+            gap.append(msg)
+        gap.reverse()
+        return gap
+
+    async def run_once(self, reason: str) -> int:
+        """등록된 모든 소스의 공백 구간을 한 번 백필. 처리한 메시지 수 반환"""
+        if self._lock.locked():
+            logging.debug("catch-up already running, skip (%s)", reason)
+            return 0
+        async with self._lock:
+            sem = asyncio.Semaphore(self.concurrency)
+            processed = 0
+
+            async def _process(msg) -> None:
+                nonlocal processed
+                async with sem:
+                    await self.live.wait_idle()
+                    chat_id = msg.chat_id
+                    if self.state.seen(chat_id, msg.id):
+                        return
+                    try:
+                        await self.handler(msg)
+                    except Exception:
+                        logging.exception("catch-up handle error: chat=%s msg_id=%s", chat_id, msg.id)
+                    processed += 1
+
+            jobs = []
+            done_chats = []
+            for meta in list(self.registry.meta.values()):
+                # 라이브 워터마크(last_ids)가 아니라 스냅샷한 백필 시작점부터 가져온다
+                last_id = self.state.backfill_from.get(meta.chat_id)
+                if not last_id:
+                    # 기준점이 없는 채팅은 첫 라이브 메시지부터 추적
+                    continue
+                try:
+                    gap = await self._fetch_gap(meta, last_id)
+                except Exception:
+                    logging.warning("catch-up fetch failed: %s", meta.label)
+                    continue
+                if gap:
+                    logging.info("catch-up: %s missed=%d since msg_id=%s", meta.label, len(gap), last_id)
+                jobs.extend(_process(m) for m in gap if not self.state.seen(m.chat_id, m.id))
+                done_chats.append(meta.chat_id)
+
+            await asyncio.gather(*jobs)
+            for chat_id in done_chats:
+                self.state.backfilled(chat_id)
+            await self.state.flush()
+            metrics.inc("catchup.messages", processed)
+            logging.info("catch-up done (%s): processed=%d", reason, processed)
+            return processed
+
+    async def watch(self, poll_s: float = 2.0, flush_s: float = 10.0) -> None:
+        """연결 끊김 → 재연결을 감지해 백필을 실행하고, 상태 파일을 주기적으로 저장"""
+        was_connected = self.client.is_connected()
+        since_flush = 0.0
+        while True:
+            await asyncio.sleep(poll_s)
+            connected = self.client.is_connected()
+            if was_connected and not connected:
+                # 끊긴 동안에는 라이브 메시지가 없으므로 지금 값이 공백의 시작점
+                self.state.snapshot()
+            if connected and not was_connected:
+                asyncio.create_task(self.run_once("reconnect"))
+            was_connected = connected
+            since_flush += poll_s
+            if since_flush >= flush_s:
+                since_flush = 0.0
+                await self.state.flush()
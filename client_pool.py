@@ -0,0 +1,111 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from typing import Awaitable, Callable, List, Optional, Sequence, TypeVar
+
+from telethon import TelegramClient
+from telethon.errors import FloodWaitError
+
+from utils.metrics import metrics
+
+
+T = TypeVar("T")
+
+
+@dataclass(eq=False)
+class PooledAccount:
+    """풀에 속한 사용자 계정 하나와 그 계정의 FloodWait 상태"""
+    name: str
+    client: TelegramClient
+    primary: bool = False  # 업데이트 수신 / catch-up / 채널 가입을 맡는 계정
+    inflight: int = 0
+    calls: int = 0
+    flood_until: float = 0.0  # monotonic
+
+    def flood_remaining(self, now: Optional[float] = None) -> float:
+        return max(0.0, self.flood_until - (now if now is not None else time.monotonic()))
+
+
+class ClientPool:
+    """엔티티/미디어 요청을 여러 계정에 나눠 보내는 Telethon 클라이언트 풀
+
+    요청마다 FloodWait 중이 아닌 계정 중 진행 중 요청이 가장 적은 계정을 고른다.
+    FloodWaitError 를 받으면 그 계정만 해당 시간 동안 빼고 다른 계정으로 바로
+    넘긴다. 모든 계정이 막혔을 때만 가장 빨리 풀리는 계정을 max_wait_s 이내에서
+    기다린다.
+
+    access_hash 는 계정마다 다르므로, 호출 함수는 받은 계정(PooledAccount)의
+    클라이언트로만 엔티티를 다뤄야 한다.
+    """
+
+    def __init__(self, accounts: Sequence[PooledAccount]):
+        if not accounts:
+            raise ValueError("client pool needs at least one account")
+        self.accounts: List[PooledAccount] = list(accounts)
+
+    @classmethod
+    def single(cls, client: TelegramClient, name: str = "primary") -> "ClientPool":
+        return cls([PooledAccount(name, client, primary=True)])
+
+    @property
+    def primary(self) -> PooledAccount:
+        return next((a for a in self.accounts if a.primary), self.accounts[0])
+
+    def _pick(self, exclude: Sequence[PooledAccount], primary_only: bool) -> Optional[PooledAccount]:
+        now = time.monotonic()
+        candidates = [
+            a for a in self.accounts
+            if a not in exclude and a.flood_remaining(now) == 0 and (a.primary or not primary_only)
+        ]
+        if not candidates:
+            return None
+        return min(candidates, key=lambda a: (a.inflight, a.calls))
+
+    def _shortest_wait(self, primary_only: bool) -> float:
+        now = time.monotonic()
+        waits = [a.flood_remaining(now) for a in self.accounts if a.primary or not primary_only]
+        return min(waits) if waits else 0.0
+
+    async def call(
+        self,
+        fn: Callable[[PooledAccount], Awaitable[T]],
+        what: str = "request",
+        max_wait_s: float = 30.0,
+        primary_only: bool = False,
+    ) -> T:
+        """fn(account) 를 가용 계정에서 실행. FloodWait 이면 다른 계정으로 재시도"""
+        tried: List[PooledAccount] = []
+        last_error: Optional[FloodWaitError] = None
+        waited = False
+        while True:
+            acct = self._pick(tried, primary_only)
+            if acct is None:
+                wait_s = self._shortest_wait(primary_only)
+                if waited or wait_s > max_wait_s:
+                    metrics.inc(f"tg_pool.exhausted[{what}]")
+                    if last_error is not None:
+                        raise last_error
+                    raise FloodWaitError(request=None, capture=int(wait_s) + 1)
+                # 모든 계정이 막힘: 가장 빨리 풀리는 계정을 한 번만 기다린다
+                logging.warning("all accounts in flood wait, waiting %.0fs for %s", wait_s, what)
+                await asyncio.sleep(wait_s)
+                waited = True
+                tried = []
+                continue
+
+            acct.inflight += 1
+            acct.calls += 1
+            try:
+                return await fn(acct)
+            except FloodWaitError as e:
+                acct.flood_until = time.monotonic() + e.seconds
+                last_error = e
+                tried.append(acct)
+                metrics.inc(f"tg_pool.flood_wait[{acct.name}]")
+                logging.warning("account %s in flood wait %ss during %s, failing over", acct.name, e.seconds, what)
+            finally:
+                acct.inflight -= 1
+                metrics.set_gauge("tg_pool.available", sum(1 for a in self.accounts if a.flood_remaining() == 0))
@@ -1,15 +1,19 @@
 from __future__ import annotations
 
-from typing import List, Optional
-from pydantic import BaseModel
+from typing import Any, Dict, FrozenSet, List, Optional
+from pydantic import BaseModel, PrivateAttr
 import os
-from dotenv import load_dotenv
+from dotenv import dotenv_values, find_dotenv
 
 
 class AppConfig(BaseModel):
     api_id: int
     api_hash: str
     session_name: str
+    session_backend: str = "sqlite"
+    session_commit_interval_seconds: float = 30.0
+    session_snapshot_interval_seconds: float = 60.0
+    extra_session_names: List[str] = []
 
     source_channels_raw: str
     source_channels: List[object]
@@ -24,19 +28,144 @@ class AppConfig(BaseModel):
     allow_keywords: List[str] = []
     block_keywords_raw: Optional[str] = None
     block_keywords: List[str] = []
+    keyword_whole_word: bool = False
+    keyword_min_score: float = 0.0
 
     only_new_posts: bool = True
+    catchup_state_path: str = "catchup_state.json"
+    catchup_concurrency: int = 2
+    catchup_max_age_minutes: float = 60.0
+    catchup_max_messages: int = 50
+    ledger_path: str = "ledger.sqlite3"
+    ledger_memory_keys: int = 200_000
     log_level: str = "INFO"
+    log_format: str = "text"
+    log_sample_every: int = 100
     retry_max: int = 5
     http_timeout_seconds: int = 10
+    retry_budget_ratio: float = 0.2
+    circuit_failure_threshold: int = 5
+    circuit_reset_seconds: float = 30.0
     openai_two_stage: bool = False
+    openai_few_shot_k: int = 2
+    openai_batch_enabled: bool = False
+    openai_batch_max_size: int = 4
+    openai_batch_max_delay_ms: int = 400
+    openai_hedge_enabled: bool = False
+    openai_hedge_model: Optional[str] = None
+    openai_hedge_percentile: float = 90.0
+    openai_hedge_delay_seconds: float = 3.0
+    openai_hedge_budget_ratio: float = 0.1
+    price_providers: List[str] = ["coingecko", "binance", "dexscreener"]
+    price_hedge_delay_ms: int = 300
+    price_coingecko_url: Optional[str] = None
+    price_binance_url: Optional[str] = None
+    price_dexscreener_url: Optional[str] = None
+    price_cache_max_entries: int = 1024
+    price_cache_ttl_seconds: float = 60.0
+    price_cache_stale_seconds: float = 300.0
+    price_negative_ttl_seconds: float = 120.0
+    price_cache_store_path: Optional[str] = None
+    gpt_concurrency: int = 4
+    gpt_queue_max: int = 20
+    gpt_queue_max_wait_seconds: float = 60.0
+    template_cache_enabled: bool = False
+    template_cache_path: str = "template_cache.json"
+    template_min_confirmations: int = 1
+    template_reverify_every: int = 20
+    template_max_per_channel: int = 20
+
+    source_cache_path: str = "source_cache.json"
+    source_cache_ttl_hours: float = 24.0
+    source_resolve_concurrency: int = 4
+
+    metrics_log_interval_seconds: float = 300.0
+    metrics_file: Optional[str] = None
+    loop_monitor_enabled: bool = True
+    loop_lag_threshold_ms: float = 100.0
+    loop_stall_seconds: float = 1.0
+    profile_dir: str = "profiles"
+    profile_duration_seconds: float = 30.0
+    price_schedule_store_path: Optional[str] = "price_schedule.sqlite3"
+    ha_enabled: bool = False
+    ha_lease_path: str = "ha_lease.sqlite3"
+    ha_lease_ttl_seconds: float = 9.0
+    ha_instance_id: Optional[str] = None
+    supervisor_workers: int = 2
+    supervisor_ipc: str = "telebot.sock"
+    album_window_ms: float = 800.0
+    edit_tracking_enabled: bool = True
+    digest_enabled: bool = False
+    digest_post_types: List[str] = ["pre-announcement", "pre-tge-campaign"]
+    digest_window_seconds: float = 300.0
+    digest_max_items: int = 10
+    worker_id: Optional[int] = None
+
+    _allowed_handles: FrozenSet[str] = PrivateAttr(default_factory=frozenset)
+    _allowed_ids: FrozenSet[int] = PrivateAttr(default_factory=frozenset)
+
+    def model_post_init(self, __context: Any) -> None:
+        handles = set()
+        ids = set()
+        for ch in self.source_channels:
+            if isinstance(ch, str):
+                handles.add(ch.lower())
+            elif isinstance(ch, int):
+                ids.update(_id_variants(ch))
+        self._allowed_handles = frozenset(handles)
+        self._allowed_ids = frozenset(ids)
 
     def is_allowed_channel(self, chat_id: int, username: Optional[str]) -> bool:
-        if username:
-            handle = f"@{username.lower()}"
-            if handle in self.source_channels:
-                return True
-        return chat_id in self.source_channels
+        if username and f"@{username.lower()}" in self._allowed_handles:
+            return True
+        return chat_id in self._allowed_ids
+
+    def with_updates(self, updates: Dict[str, Any]) -> "AppConfig":
+        """일부 필드만 바꾼 새 설정 (model_copy 와 달리 허용 채널 집합도 다시 계산)"""
+        return AppConfig(**{**self.model_dump(), **updates})
+
+    def with_sources(self, sources: List[object]) -> "AppConfig":
+        """소스 목록만 바꾼 새 설정"""
+        return self.with_updates({
+            "source_channels": list(sources),
+            "source_channels_raw": ",".join(str(s) for s in sources),
+        })
+
+    def for_worker(self, worker_id: int, sources: List[object]) -> "AppConfig":
+        """감독 모드 워커용 설정
+
+        세션과 로컬 상태 파일은 워커별로 분리하고, 가격 캐시 저장소는 공유한다.
+        (.env 가 환경변수를 덮어쓰므로 자식 프로세스에 env 로 넘길 수 없어 여기서 바꾼다)
+        """
+        def _suffixed(path: str) -> str:
+            root, ext = os.path.splitext(path)
+            return f"{root}_w{worker_id}{ext}"
+
+        return self.with_sources(sources).with_updates({
+            "worker_id": worker_id,
+            "session_name": f"{self.session_name}_w{worker_id}",
+            "extra_session_names": [f"{name}_w{worker_id}" for name in self.extra_session_names],
+            "ledger_path": _suffixed(self.ledger_path),
+            "catchup_state_path": _suffixed(self.catchup_state_path),
+            "source_cache_path": _suffixed(self.source_cache_path),
+            "template_cache_path": _suffixed(self.template_cache_path),
+            "price_schedule_store_path": (
+                _suffixed(self.price_schedule_store_path) if self.price_schedule_store_path else None
+            ),
+            "metrics_file": _suffixed(self.metrics_file) if self.metrics_file else None,
+            "profile_dir": os.path.join(self.profile_dir, f"w{worker_id}"),
+            "price_cache_store_path": self.price_cache_store_path or "price_cache.sqlite3",
+        })
+
+
+def _id_variants(chat_id: int) -> List[int]:
+    """-1001234 / 1234 어느 형태로 적어도 매칭되도록 두 형태를 모두 반환"""
+    s = str(chat_id)
+    if s.startswith("-100") and len(s) > 4:
+        return [chat_id, int(s[4:])]
+    if chat_id > 0:
+        return [chat_id, int(f"-100{chat_id}")]
+    return [chat_id]
 
 
 def _parse_comma_list(value: Optional[str]) -> List[str]:
@@ -63,18 +192,49 @@ def _lower_list(values: List[str]) -> List[str]:
     return [v.lower() for v in values]
 
 
+# 직전 로드에서 .env 파일이 넣은 키 → 덮어쓰기 전 OS 환경변수 값 (없었으면 None)
+_dotenv_applied: Dict[str, Optional[str]] = {}
+
+
+def _apply_dotenv_files() -> None:
+    """.env → .env.local 순으로 os.environ 에 반영 (파일 값이 OS 환경변수를 덮어씀)
+
+    재로드 때 파일에서 지운 키가 이전 값으로 남지 않도록, 직전 로드가 넣은 키를
+    먼저 원래 값으로 되돌린 뒤 다시 읽는다.
+    """
+    for key, original in _dotenv_applied.items():
+        if original is None:
+            os.environ.pop(key, None)
+        else:
+            os.environ[key] = original
+    _dotenv_applied.clear()
+    paths = [find_dotenv()]
+    if os.path.exists(".env.local"):
+        paths.append(".env.local")
+    for path in paths:
+        if not path:
+            continue
+        for key, value in dotenv_values(path).items():
+            if value is None:
+                continue
+            if key not in _dotenv_applied:
+                _dotenv_applied[key] = os.environ.get(key)
+            os.environ[key] = value
+
+
 def load_config() -> AppConfig:
-    # .env → .env.local 순으로 로드하며, 파일 값이 OS 환경변수를 덮어쓰도록 설정
     try:
-        load_dotenv(override=True)
-        if os.path.exists(".env.local"):
-            load_dotenv(".env.local", override=True)
+        _apply_dotenv_files()
     except Exception:
         pass
 
     api_id = int(os.getenv("TG_API_ID", "0"))
     api_hash = os.getenv("TG_API_HASH", "")
     session_name = os.getenv("TG_SESSION", "session_user")
+    session_backend = os.getenv("SESSION_BACKEND", "sqlite").lower()
+    session_commit_interval_seconds = float(os.getenv("SESSION_COMMIT_INTERVAL_SECONDS", "30"))
+    session_snapshot_interval_seconds = float(os.getenv("SESSION_SNAPSHOT_INTERVAL_SECONDS", "60"))
+    extra_session_names = _parse_comma_list(os.getenv("TG_EXTRA_SESSIONS"))
 
     source_channels_raw = os.getenv("SOURCE_CHANNELS", "")
     source_channels = _normalize_source_channels(source_channels_raw)
@@ -85,21 +245,88 @@ def load_config() -> AppConfig:
     openai_api_key = os.getenv("OPENAI_API_KEY", "")
     openai_model = os.getenv("OPENAI_MODEL", "gpt-4o-mini")
     openai_two_stage = os.getenv("OPENAI_TWO_STAGE", "false").lower() == "true"
+    openai_few_shot_k = int(os.getenv("OPENAI_FEW_SHOT_K", "2"))
+    openai_batch_enabled = os.getenv("OPENAI_BATCH", "false").lower() == "true"
+    openai_batch_max_size = int(os.getenv("OPENAI_BATCH_MAX_SIZE", "4"))
+    openai_batch_max_delay_ms = int(os.getenv("OPENAI_BATCH_MAX_DELAY_MS", "400"))
+    openai_hedge_enabled = os.getenv("OPENAI_HEDGE", "false").lower() == "true"
+    openai_hedge_model = os.getenv("OPENAI_HEDGE_MODEL") or None
+    openai_hedge_percentile = float(os.getenv("OPENAI_HEDGE_PERCENTILE", "90"))
+    openai_hedge_delay_seconds = float(os.getenv("OPENAI_HEDGE_DELAY_SECONDS", "3"))
+    openai_hedge_budget_ratio = float(os.getenv("OPENAI_HEDGE_BUDGET_RATIO", "0.1"))
+    price_providers = _lower_list(_parse_comma_list(os.getenv("PRICE_PROVIDERS", "coingecko,binance,dexscreener")))
+    price_hedge_delay_ms = int(os.getenv("PRICE_HEDGE_DELAY_MS", "300"))
+    price_coingecko_url = os.getenv("PRICE_COINGECKO_URL") or None
+    price_binance_url = os.getenv("PRICE_BINANCE_URL") or None
+    price_dexscreener_url = os.getenv("PRICE_DEXSCREENER_URL") or None
+    price_cache_max_entries = int(os.getenv("PRICE_CACHE_MAX_ENTRIES", "1024"))
+    price_cache_ttl_seconds = float(os.getenv("PRICE_CACHE_TTL_SECONDS", "60"))
+    price_cache_stale_seconds = float(os.getenv("PRICE_CACHE_STALE_SECONDS", "300"))
+    price_negative_ttl_seconds = float(os.getenv("PRICE_NEGATIVE_TTL_SECONDS", "120"))
+    price_cache_store_path = os.getenv("PRICE_CACHE_STORE_PATH") or None
+    gpt_concurrency = int(os.getenv("GPT_CONCURRENCY", "4"))
+    gpt_queue_max = int(os.getenv("GPT_QUEUE_MAX", "20"))
+    gpt_queue_max_wait_seconds = float(os.getenv("GPT_QUEUE_MAX_WAIT_SECONDS", "60"))
+    template_cache_enabled = os.getenv("TEMPLATE_CACHE", "false").lower() == "true"
+    template_cache_path = os.getenv("TEMPLATE_CACHE_PATH", "template_cache.json")
+    template_min_confirmations = int(os.getenv("TEMPLATE_MIN_CONFIRMATIONS", "1"))
+    template_reverify_every = int(os.getenv("TEMPLATE_REVERIFY_EVERY", "20"))
+    template_max_per_channel = int(os.getenv("TEMPLATE_MAX_PER_CHANNEL", "20"))
 
     allow_keywords_raw = os.getenv("ALLOW_KEYWORDS")
     block_keywords_raw = os.getenv("BLOCK_KEYWORDS")
     allow_keywords = _lower_list(_parse_comma_list(allow_keywords_raw))
     block_keywords = _lower_list(_parse_comma_list(block_keywords_raw))
+    keyword_whole_word = os.getenv("KEYWORD_WHOLE_WORD", "false").lower() == "true"
+    keyword_min_score = float(os.getenv("KEYWORD_MIN_SCORE", "0"))
 
     only_new_posts = os.getenv("ONLY_NEW_POSTS", "true").lower() == "true"
+    catchup_state_path = os.getenv("CATCHUP_STATE_PATH", "catchup_state.json")
+    catchup_concurrency = int(os.getenv("CATCHUP_CONCURRENCY", "2"))
+    catchup_max_age_minutes = float(os.getenv("CATCHUP_MAX_AGE_MINUTES", "60"))
+    catchup_max_messages = int(os.getenv("CATCHUP_MAX_MESSAGES", "50"))
+    ledger_path = os.getenv("LEDGER_PATH", "ledger.sqlite3")
+    ledger_memory_keys = int(os.getenv("LEDGER_MEMORY_KEYS", "200000"))
     log_level = os.getenv("LOG_LEVEL", "INFO")
+    log_format = os.getenv("LOG_FORMAT", "text").lower()
+    log_sample_every = int(os.getenv("LOG_SAMPLE_EVERY", "100"))
     retry_max = int(os.getenv("RETRY_MAX", "5"))
     http_timeout_seconds = int(os.getenv("HTTP_TIMEOUT_SECONDS", "10"))
+    retry_budget_ratio = float(os.getenv("RETRY_BUDGET_RATIO", "0.2"))
+    circuit_failure_threshold = int(os.getenv("CIRCUIT_FAILURE_THRESHOLD", "5"))
+    circuit_reset_seconds = float(os.getenv("CIRCUIT_RESET_SECONDS", "30"))
+    source_cache_path = os.getenv("SOURCE_CACHE_PATH", "source_cache.json")
+    source_cache_ttl_hours = float(os.getenv("SOURCE_CACHE_TTL_HOURS", "24"))
+    source_resolve_concurrency = int(os.getenv("SOURCE_RESOLVE_CONCURRENCY", "4"))
+    metrics_log_interval_seconds = float(os.getenv("METRICS_LOG_INTERVAL_SECONDS", "300"))
+    metrics_file = os.getenv("METRICS_FILE") or None
+    loop_monitor_enabled = os.getenv("LOOP_MONITOR", "true").lower() == "true"
+    loop_lag_threshold_ms = float(os.getenv("LOOP_LAG_THRESHOLD_MS", "100"))
+    loop_stall_seconds = float(os.getenv("LOOP_STALL_SECONDS", "1"))
+    profile_dir = os.getenv("PROFILE_DIR", "profiles")
+    profile_duration_seconds = float(os.getenv("PROFILE_DURATION_SECONDS", "30"))
+    price_schedule_store_path = os.getenv("PRICE_SCHEDULE_STORE_PATH", "price_schedule.sqlite3") or None
+    ha_enabled = os.getenv("HA_MODE", "false").lower() == "true"
+    ha_lease_path = os.getenv("HA_LEASE_PATH", "ha_lease.sqlite3")
+    ha_lease_ttl_seconds = float(os.getenv("HA_LEASE_TTL_SECONDS", "9"))
+    ha_instance_id = os.getenv("HA_INSTANCE_ID") or None
+    supervisor_workers = int(os.getenv("SUPERVISOR_WORKERS", "2"))
+    supervisor_ipc = os.getenv("SUPERVISOR_IPC", "telebot.sock")
+    album_window_ms = float(os.getenv("ALBUM_WINDOW_MS", "800"))
+    edit_tracking_enabled = os.getenv("EDIT_TRACKING", "true").lower() == "true"
+    digest_enabled = os.getenv("DIGEST_MODE", "false").lower() == "true"
+    digest_post_types = _lower_list(_parse_comma_list(os.getenv("DIGEST_POST_TYPES", "pre-announcement,pre-tge-campaign")))
+    digest_window_seconds = float(os.getenv("DIGEST_WINDOW_SECONDS", "300"))
+    digest_max_items = int(os.getenv("DIGEST_MAX_ITEMS", "10"))
 
     return AppConfig(
         api_id=api_id,
         api_hash=api_hash,
         session_name=session_name,
+        session_backend=session_backend,
+        session_commit_interval_seconds=session_commit_interval_seconds,
+        session_snapshot_interval_seconds=session_snapshot_interval_seconds,
+        extra_session_names=extra_session_names,
         source_channels_raw=source_channels_raw,
         source_channels=source_channels,
         bot_token=bot_token,
@@ -110,10 +337,73 @@ def load_config() -> AppConfig:
         allow_keywords=allow_keywords,
         block_keywords_raw=block_keywords_raw,
         block_keywords=block_keywords,
+        keyword_whole_word=keyword_whole_word,
+        keyword_min_score=keyword_min_score,
         only_new_posts=only_new_posts,
+        catchup_state_path=catchup_state_path,
+        catchup_concurrency=catchup_concurrency,
+        catchup_max_age_minutes=catchup_max_age_minutes,
+        catchup_max_messages=catchup_max_messages,
+        ledger_path=ledger_path,
+        ledger_memory_keys=ledger_memory_keys,
         log_level=log_level,
+        log_format=log_format,
+        log_sample_every=log_sample_every,
         retry_max=retry_max,
         http_timeout_seconds=http_timeout_seconds,
+        retry_budget_ratio=retry_budget_ratio,
+        circuit_failure_threshold=circuit_failure_threshold,
+        circuit_reset_seconds=circuit_reset_seconds,
         openai_two_stage=openai_two_stage,
+        openai_few_shot_k=openai_few_shot_k,
+        openai_batch_enabled=openai_batch_enabled,
+        openai_batch_max_size=openai_batch_max_size,
+        openai_batch_max_delay_ms=openai_batch_max_delay_ms,
+        openai_hedge_enabled=openai_hedge_enabled,
+        openai_hedge_model=openai_hedge_model,
+        openai_hedge_percentile=openai_hedge_percentile,
+        openai_hedge_delay_seconds=openai_hedge_delay_seconds,
+        openai_hedge_budget_ratio=openai_hedge_budget_ratio,
+        price_providers=price_providers,
+        price_hedge_delay_ms=price_hedge_delay_ms,
+        price_coingecko_url=price_coingecko_url,
+        price_binance_url=price_binance_url,
+        price_dexscreener_url=price_dexscreener_url,
+        price_cache_max_entries=price_cache_max_entries,
+        price_cache_ttl_seconds=price_cache_ttl_seconds,
+        price_cache_stale_seconds=price_cache_stale_seconds,
+        price_negative_ttl_seconds=price_negative_ttl_seconds,
+        price_cache_store_path=price_cache_store_path,
+        gpt_concurrency=gpt_concurrency,
+        gpt_queue_max=gpt_queue_max,
+        gpt_queue_max_wait_seconds=gpt_queue_max_wait_seconds,
+        template_cache_enabled=template_cache_enabled,
+        template_cache_path=template_cache_path,
+        template_min_confirmations=template_min_confirmations,
+        template_reverify_every=template_reverify_every,
+        template_max_per_channel=template_max_per_channel,
+        source_cache_path=source_cache_path,
+        source_cache_ttl_hours=source_cache_ttl_hours,
+        source_resolve_concurrency=source_resolve_concurrency,
+        metrics_log_interval_seconds=metrics_log_interval_seconds,
+        metrics_file=metrics_file,
+        loop_monitor_enabled=loop_monitor_enabled,
+        loop_lag_threshold_ms=loop_lag_threshold_ms,
+        loop_stall_seconds=loop_stall_seconds,
+        profile_dir=profile_dir,
+        profile_duration_seconds=profile_duration_seconds,
+        price_schedule_store_path=price_schedule_store_path,
+        ha_enabled=ha_enabled,
+        ha_lease_path=ha_lease_path,
+        ha_lease_ttl_seconds=ha_lease_ttl_seconds,
+        ha_instance_id=ha_instance_id,
+        supervisor_workers=supervisor_workers,
+        supervisor_ipc=supervisor_ipc,
+        album_window_ms=album_window_ms,
+        edit_tracking_enabled=edit_tracking_enabled,
+        digest_enabled=digest_enabled,
+        digest_post_types=digest_post_types,
+        digest_window_seconds=digest_window_seconds,
+        digest_max_items=digest_max_items,
     )
 
@@ -0,0 +1,144 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import signal
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence
+
+from dotenv import find_dotenv
+
+from config import AppConfig, load_config
+from utils.metrics import metrics
+
+
+# 재시작 없이 반영하는 설정. 나머지(세션, 경로, 풀 크기 등)는 바뀌어도 다음 재시작에 반영된다.
+RELOADABLE_FIELDS = frozenset({
+    "source_channels_raw",
+    "source_channels",
+    "allow_keywords_raw",
+    "allow_keywords",
+    "block_keywords_raw",
+    "block_keywords",
+    "keyword_whole_word",
+    "keyword_min_score",
+    "openai_model",
+    "openai_two_stage",
+    "openai_few_shot_k",
+    "openai_batch_enabled",
+    "openai_batch_max_size",
+    "openai_batch_max_delay_ms",
+    "openai_hedge_enabled",
+    "openai_hedge_model",
+    "openai_hedge_percentile",
+    "openai_hedge_delay_seconds",
+    "openai_hedge_budget_ratio",
+    "http_timeout_seconds",
+    "log_level",
+    "log_sample_every",
+})
+
+
+def _default_paths() -> List[str]:
+    # load_config 와 같은 방식(find_dotenv)으로 .env 위치를 찾는다 (없으면 config.py 옆)
+    env = find_dotenv() or os.path.join(os.path.dirname(os.path.abspath(__file__)), ".env")
+    return [env, ".env.local"]
+
+
+def diff_config(old: AppConfig, new: AppConfig) -> Dict[str, Any]:
+    """바뀐 필드 → 새 값"""
+    a, b = old.model_dump(), new.model_dump()
+    return {k: b[k] for k in b if a.get(k) != b[k]}
+
+
+class ConfigReloader:
+    """SIGHUP 또는 .env 파일 변경 시 설정을 다시 읽어 바뀐 값만 apply 로 넘긴다
+
+    비교 기준은 마지막으로 읽은 설정 파일 값이라, 호출자가 자기 설정을 따로
+    바꿔 둔 필드(워커의 경로 접미사 등)는 변경으로 잡히지 않는다.
+    재로드가 겹치면 진행 중인 것이 끝난 뒤 한 번 더 실행한다.
+    """
+
+    def __init__(
+        self,
+        base: AppConfig,
+        apply: Callable[[Dict[str, Any]], Awaitable[None]],
+        paths: Optional[Sequence[str]] = None,
+        poll_s: float = 2.0,
+    ):
+        self.base = base
+        self.apply = apply
+        self.paths = list(paths) if paths else _default_paths()
+        self.poll_s = poll_s
+        self._task: Optional[asyncio.Task] = None
+        self._again = False
+
+    def install(self, loop: asyncio.AbstractEventLoop) -> None:
+        sig = getattr(signal, "SIGHUP", None)
+        if sig is None:
+            return
+        try:
+            loop.add_signal_handler(sig, self.trigger)
+        except (NotImplementedError, RuntimeError):
+            logging.debug("SIGHUP handler not supported on this platform")
+
+    def trigger(self) -> None:
+        if self._task and not self._task.done():
+            self._again = True
+            return
+        self._task = asyncio.get_running_loop().create_task(self._reload_loop())
+
+    async def _reload_loop(self) -> None:
+        while True:
+            self._again = False
+            await self.reload()
+            if not self._again:
+                return
+
+    async def reload(self) -> None:
+        try:
+            new = await asyncio.to_thread(load_config)
+        except Exception:
+            logging.exception("config reload failed, keeping current settings")
+            metrics.inc("config.reload_failed")
+            return
+        changes = diff_config(self.base, new)
+        if not changes:
+            logging.info("config reload: no changes")
+            return
+        applied = {k: v for k, v in changes.items() if k in RELOADABLE_FIELDS}
+        pending = sorted(k for k in changes if k not in RELOADABLE_FIELDS)
+        if pending:
+            logging.warning("config reload: restart required for %s", pending)
+        if applied:
+            try:
+                await self.apply(applied)
+            except Exception:
+                # 기준을 그대로 두어 다음 재로드에서 다시 시도
+                logging.exception("config reload apply failed")
+                metrics.inc("config.reload_failed")
+                return
+        self.base = new
+        if not applied:
+            return
+        metrics.inc("config.reloaded")
+        logging.info("config reloaded: %s", sorted(applied))
+
+    def _mtimes(self) -> Dict[str, Optional[int]]:
+        out: Dict[str, Optional[int]] = {}
+        for path in self.paths:
+            try:
+                out[path] = os.stat(path).st_mtime_ns
+            except OSError:
+                out[path] = None
+        return out
+
+    async def watch(self) -> None:
+        """설정 파일 수정 시각을 주기적으로 확인"""
+        last = self._mtimes()
+        while True:
+            await asyncio.sleep(self.poll_s)
+            current = self._mtimes()
+            if current != last:
+                last = current
+                self.trigger()
@@ -0,0 +1,81 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set
+
+from utils.metrics import metrics
+
+
+@dataclass
+class DigestItem:
+    """요약 메시지로 묶어 보낼 알림 하나"""
+    chat_id: int
+    msg_id: int
+    chash: Optional[int]
+    data: Dict[str, Any]
+    source_link: str
+
+
+class DigestBuffer:
+    """우선순위가 낮은 알림을 모아 한 번에 넘긴다
+
+    첫 항목이 들어온 뒤 window_s 가 지나거나 max_items 개가 모이면 그때까지의
+    항목을 도착 순서대로 on_flush 에 넘긴다. 지연은 첫 항목 기준 window_s 를 넘지 않는다.
+    """
+
+    def __init__(
+        self,
+        window_s: float,
+        max_items: int,
+        on_flush: Callable[[List[DigestItem]], Awaitable[None]],
+    ):
+        self.window_s = window_s
+        self.max_items = max(1, max_items)
+        self.on_flush = on_flush
+        self._items: List[DigestItem] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._tasks: Set[asyncio.Task] = set()
+
+    @property
+    def pending(self) -> int:
+        return len(self._items)
+
+    def add(self, item: DigestItem) -> None:
+        self._items.append(item)
+        metrics.set_gauge("digest.pending", len(self._items))
+        if len(self._items) >= self.max_items:
+            self._flush()
+        elif self._timer is None:
+            self._timer = asyncio.get_running_loop().call_later(self.window_s, self._flush)
+
+    def _take(self) -> List[DigestItem]:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        items, self._items = self._items, []
+        metrics.set_gauge("digest.pending", 0)
+        return items
+
+    def _flush(self) -> None:
+        items = self._take()
+        if items:
+            task = asyncio.ensure_future(self._deliver(items))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _deliver(self, items: List[DigestItem]) -> None:
+        metrics.observe("digest.size", len(items))
+        try:
+            await self.on_flush(items)
+        except Exception:
+            logging.exception("digest flush error")
+
+    async def close(self) -> None:
+        """종료 시 남은 항목을 바로 보내고 진행 중인 발송이 끝나길 기다린다"""
+        items = self._take()
+        if items:
+            await self._deliver(items)
+        if self._tasks:
+            await asyncio.gather(*list(self._tasks), return_exceptions=True)
@@ -1,23 +1,47 @@
 from __future__ import annotations
 
-from typing import Optional
+from functools import lru_cache
+from typing import Optional, Tuple
 
 from config import AppConfig
-from utils.text_utils import normalize_text, contains_any
+from utils.text_utils import normalize_text
+from utils.keyword_matcher import KeywordMatcher, MatchResult
 
 
-def passes_local_filters(cfg: AppConfig, text: Optional[str]) -> bool:
+@lru_cache(maxsize=8)
+def _build_matcher(allow: Tuple[str, ...], block: Tuple[str, ...], whole_word: bool) -> KeywordMatcher:
+    return KeywordMatcher(allow=allow, block=block, whole_word=whole_word)
+
+
+def get_keyword_matcher(cfg: AppConfig) -> KeywordMatcher:
+    """설정값 기준으로 오토마톤을 한 번만 만들고 재사용"""
+    return _build_matcher(
+        tuple(cfg.allow_keywords),
+        tuple(cfg.block_keywords),
+        cfg.keyword_whole_word,
+    )
+
+
+def evaluate_local_filters(cfg: AppConfig, text: Optional[str]) -> Tuple[bool, MatchResult]:
+    """로컬 필터 판정과 매칭 결과(규칙/점수)를 함께 반환"""
     normalized = normalize_text(text)
     if not normalized or len(normalized) < 10:
-        return False
+        return False, MatchResult()
 
-    # BLOCK 우선 차단
-    if contains_any(normalized, cfg.block_keywords):
-        return False
+    matcher = get_keyword_matcher(cfg)
+    result = matcher.classify(normalized)
 
     # ALLOW 존재 시 허용된 키워드 포함 필요
-    if cfg.allow_keywords and not contains_any(normalized, cfg.allow_keywords):
-        return False
+    if matcher.has_allow and not result.allow_hits:
+        return False, result
+
+    # BLOCK 가중치가 ALLOW 점수를 넘으면 차단 (기본 BLOCK 가중치는 사실상 즉시 차단)
+    if result.score < cfg.keyword_min_score:
+        return False, result
 
-    return True
+    return True, result
 
+
+def passes_local_filters(cfg: AppConfig, text: Optional[str]) -> bool:
+    passed, _ = evaluate_local_filters(cfg, text)
+    return passed
@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from typing import Dict, Optional
+from typing import Dict, List, Optional, Tuple
 import re
 
 
@@ -28,6 +28,12 @@ def _format_price_block(price_info, total_value: Optional[float]) -> str:
     # <--- 수정: \n\n (줄바꿈 2번)을 \n (줄바꿈 1번)으로 변경
 
 
+def _clean_title(data: Dict[str, str]) -> str:
+    title = _normalize_points_text(data.get("title", ""))
+    # 제목에서 "바이낸스 알파" 제거
+    return re.sub(r"바이낸스\s*알파\s*", "", title, flags=re.IGNORECASE).strip()
+
+
 def format_html(
     data: Dict[str, str],
     source_link: str,
@@ -35,10 +41,7 @@ def format_html(
     total_value: Optional[float] = None,
 ) -> str:
     post_type = data.get("postType", "irrelevant")
-    title = _normalize_points_text(data.get("title", ""))
-
-    # 제목에서 "바이낸스 알파" 제거
-    title = re.sub(r"바이낸스\s*알파\s*", "", title, flags=re.IGNORECASE).strip()
+    title = _clean_title(data)
 
     # 가격/가치 블록 생성 (이제 \n이 1개만 포함됨)
     price_block = _format_price_block(price_info, total_value)
@@ -119,4 +122,24 @@ def format_html(
         ]
         return "\n".join(parts)
 
-    return ""
\ No newline at end of file
+    return ""
+
+
+def _format_digest_line(data: Dict[str, str], source_link: str) -> str:
+    title = _clean_title(data) or "N/A"
+    post_type = data.get("postType")
+    if post_type == "pre-announcement":
+        return f"🔔 <b>{title}</b> [예고] · {data.get('gtd_date', 'N/A')} | <a href=\"{source_link}\">출처</a>"
+    if post_type == "pre-tge-campaign":
+        commit = _normalize_points_text(data.get('commit_amount', 'N/A'))
+        return f"🚀 <b>{title}</b> [캠페인] · 커밋 {commit} | <a href=\"{source_link}\">출처</a>"
+    return f"• <b>{title}</b> | <a href=\"{source_link}\">출처</a>"
+
+
+def format_digest_html(entries: List[Tuple[Dict[str, str], str]]) -> str:
+    """우선순위 낮은 알림 여러 건을 한 메시지로 요약 (entries: (GPT 결과, 출처 링크))"""
+    if not entries:
+        return ""
+    parts = [f"<b>📋 모아보기 ({len(entries)}건)</b>", ""]
+    parts.extend(_format_digest_line(data, link) for data, link in entries)
+    return "\n".join(parts)
@@ -0,0 +1,357 @@
+from __future__ import annotations
+
+import json
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Dict, FrozenSet, List
+
+
+# 바이낸스 알파 에어드랍 분석 프롬프트 (고정부)
+# 모든 호출에서 바이트 단위로 동일해야 업스트림 프리픽스 캐시가 적용된다. 예시는 FEW_SHOT_EXAMPLES 에서 골라 뒤에 붙인다.
+PROMPT_CORE = (
+    """당신은 바이낸스 알파 에어드랍 공지를 분석하고 한글로 변환하는 전문가입니다.
+
+## ⚠️ 핵심 규칙 (반드시 준수!)
+
+1. **"Phase 1"이 명시되면 → GTD 필드에 저장 (절대 빠뜨리지 말 것!)**
+2. **"Phase 2"가 명시되면 → FCFS 필드에 저장**
+3. **Phase 1 + Phase 2 둘 다 있으면 → 둘 다 반드시 채워야 함**
+4. **Phase 구분 없이 "first-come" 키워드만 있으면 → FCFS만 채움, GTD는 "N/A"**
+5. **Alpha Points를 사용하지 않는 공지 → irrelevant**
+6. **Pre-TGE 참여자만 해당하는 공지 → irrelevant**
+7. **단순 토큰 거래 시작 공지 → irrelevant**
+
+## 🚫 Irrelevant 판정 기준 (매우 중요!)
+
+다음 경우는 **반드시 irrelevant**로 분류:
+
+1. **Alpha Points 미사용**
+   - "Alpha Points" 또는 "Binance Alpha Points" 언급 없음
+   - 예: "Users who participated in Pre-TGE can start trading"
+   
+2. **Pre-TGE 참여자 전용**
+   - "participated in Pre-TGE"
+   - "Winners of Pre-TGE"
+   - "Pre-TGE participants"
+   
+3. **단순 거래/상장 공지**
+   - "Token Circulation Starts" (에어드랍 언급 없이)
+   - "trading opens" (에어드랍 언급 없이)
+   - "start trading" (에어드랍 언급 없이)
+   
+4. **리워드 프로그램 (에어드랍 아님)**
+   - "Booster Program"
+   - "Trading rewards"
+   - "Competition"
+
+## ✅ Airdrop 판정 기준
+
+다음 **모두** 충족해야 에어드랍:
+
+1. ✅ "airdrop" 또는 "claim" 명시적 언급
+2. ✅ "Alpha Points" 사용 언급
+3. ✅ 보상 수량 또는 조건 명시
+
+## 📋 출력 JSON 스키마
+```json
+{
+  "postType": "pre-announcement | detailed-announcement | irrelevant",
+  "eventType": "airdrop",
+  "title": "바이낸스 알파 [토큰명($심볼)] 에어드랍",
+  "tokenSymbol": "$XXX",
+  "gtd_date": "확정 에어드랍 일정 (KST)",
+  "gtd_reward": "확정 보상",
+  "gtd_points": "확정 필요 점수",
+  "gtd_claim_cost": "확정 클레임 비용",
+  "fcfs_date": "선착순 일정 (KST)",
+  "fcfs_reward": "선착순 보상",
+  "fcfs_points": "선착순 필요 점수",
+  "fcfs_claim_cost": "선착순 클레임 비용",
+  "disclaimer": "유의사항"
+}
+```
+
+## 🎯 Phase 구분 (매우 중요!)
+
+### ✅ Phase 1 = 확정 에어드랍 (GTD)
+**키워드:** "Phase 1", "first X hours", "First X Hours"
+**의미:** 점수만 충족하면 **확정으로** 받을 수 있는 구간
+
+**⚠️ 절대 규칙: Phase 1이 있으면 gtd_* 필드를 반드시 모두 채울 것!**
+
+예시:
+```
+Phase 1 (First 18 Hours): Users with at least 210 Points can claim 150 WAL.
+```
+→ 
+```json
+{
+  "gtd_date": "거래 시작~18시간 후 (시각 미공개)",
+  "gtd_reward": "150 $WAL",
+  "gtd_points": "210점 이상",
+  "gtd_claim_cost": "15점 차감"
+}
+```
+
+### ✅ Phase 2 = 선착순 에어드랍 (FCFS)
+**키워드:** "Phase 2", "last X hours", "Last X Hours", "first-come, first-served"
+**의미:** 선착순 경쟁으로 받는 구간
+
+예시:
+```
+Phase 2 (Last 6 Hours): Users with at least 195 Points participate on first-come, first-served basis.
+```
+→
+```json
+{
+  "fcfs_date": "18시간 후~24시간 후 (시각 미공개)",
+  "fcfs_reward": "150 $WAL",
+  "fcfs_points": "195점 이상",
+  "fcfs_claim_cost": "15점 차감"
+}
+```
+
+### ⚠️ 절대 규칙
+- **Phase 1과 Phase 2가 모두 있으면**: GTD와 FCFS 필드를 **모두 반드시** 채워야 함
+- **Phase 2만 있으면**: FCFS만 채우고 GTD는 모두 `"N/A"`
+- **Phase 1만 있으면**: GTD만 채우고 FCFS는 모두 `"N/A"`
+
+## 🕐 시간 변환 규칙
+
+### UTC → KST 변환 (UTC+9)
+- `07:00 (UTC)` → `16:00 KST`
+- `14:00 (UTC)` → `23:00 KST`
+
+### 시각이 명시되지 않은 경우
+
+**"now live", "is live", "when trading starts" 등:**
+- 정확한 시각을 알 수 없음
+- → 날짜/시간 필드에 `"시각 미공개"` 또는 상대 시간 표기
+
+**예시:**
+```
+Input: "CDL is now live!"
+Output: fcfs_date: "즉시 진행 중 (시각 미공개)"
+```
+```
+Input: "when trading starts" + "within 24 hours"
+Phase 1 (First 18 Hours)
+Phase 2 (Last 6 Hours)
+Output: 
+gtd_date: "거래 시작~18시간 (시각 미공개)"
+fcfs_date: "18시간 후~24시간 (시각 미공개)"
+```
+
+### 날짜/시간 형식
+- **구체적 시각 있음**: `M/D HH:mm KST` 또는 `M/D HH:mm~M/D HH:mm KST`
+- **시각 미공개**: `"즉시 진행 중 (시각 미공개)"` 또는 `"거래 시작~X시간 (시각 미공개)"`
+
+### 기간 계산 예시
+
+**예시 1: 구체적 시각 있음**
+```
+시작: October 14, 2025, at 07:00 (UTC) = 10/14 16:00 KST
+24시간 이벤트
+
+Phase 1 (first 18 hours):
+→ gtd_date: "10/14 16:00~10/15 10:00 KST"
+
+Phase 2 (last 6 hours):
+→ fcfs_date: "10/15 10:00~10/15 16:00 KST"
+```
+
+**예시 2: 시각 미공개**
+```
+"when trading starts" + "within 24 hours"
+Phase 1 (First 18 Hours)
+Phase 2 (Last 6 Hours)
+
+→ gtd_date: "거래 시작~18시간 (시각 미공개)"
+→ fcfs_date: "18시간 후~24시간 (시각 미공개)"
+```
+
+## 💎 토큰 정보 추출
+
+### 토큰명 패턴
+- `Walrus (WAL)` → title: `바이낸스 알파 Walrus($WAL) 에어드랍`, tokenSymbol: `$WAL`
+- `Enso (ENSO)` → title: `바이낸스 알파 Enso($ENSO) 에어드랍`, tokenSymbol: `$ENSO`
+- **토큰명 없음** → title: `바이낸스 알파 에어드랍 - 토큰명 미공개`, tokenSymbol: `"N/A"`
+
+### 보상 표기
+- `150 WAL tokens` → `150 $WAL`
+- `640 CDL tokens` → `640 $CDL`
+
+## ⚠️ 절대 주의사항
+1. **Phase 1이 있으면 gtd_* 필드를 반드시 모두 채울 것 (절대 빠뜨리지 말 것!)**
+2. Phase 2가 있으면 fcfs_* 필드를 반드시 채울 것
+3. 둘 다 있으면 모두 채울 것
+4. 시각이 명시되면 UTC → KST 변환, 없으면 "시각 미공개" 표기
+5. 점수는 "XXX점 이상" 형식
+6. 클레임 비용은 "XX점 차감" 형식
+7. 토큰 심볼은 항상 `$` 포함 (예: `$WAL`)
+"""
+).strip()
+
+
+@dataclass(frozen=True)
+class FewShotExample:
+    """예시 라이브러리 항목: 입력 공지와 기대 JSON 출력"""
+    name: str
+    text: str
+    output: Dict[str, str]
+
+
+FEW_SHOT_EXAMPLES: List[FewShotExample] = [
+    FewShotExample(
+        name="Phase 1 + Phase 2 (시각 미공개)",
+        text=(
+            "Walrus (WAL) is Now on Binance Alpha!\n"
+            "Eligible users can claim 150 WAL tokens when trading starts within 24 hours. Claiming consumes 15 Binance Alpha Points.\n"
+            "Phase 1 (First 18 Hours): Users with at least 210 Points can claim.\n"
+            "Phase 2 (Last 6 Hours): Users with at least 195 Points participate on first-come, first-served basis. If rewards aren't distributed, threshold decreases by 15 points every hour."
+        ),
+        output={
+            "postType": "detailed-announcement",
+            "eventType": "airdrop",
+            "title": "바이낸스 알파 Walrus($WAL) 에어드랍",
+            "tokenSymbol": "$WAL",
+            "gtd_date": "거래 시작~18시간 (시각 미공개)",
+            "gtd_reward": "150 $WAL",
+            "gtd_points": "210점 이상",
+            "gtd_claim_cost": "15점 차감",
+            "fcfs_date": "18시간 후~24시간 (시각 미공개)",
+            "fcfs_reward": "150 $WAL",
+            "fcfs_points": "195점 이상",
+            "fcfs_claim_cost": "15점 차감",
+            "disclaimer": "보상 미완료 시 매시간 15점씩 임계치 자동 하락",
+        },
+    ),
+    FewShotExample(
+        name="FCFS만 (now live)",
+        text=(
+            "Creditlink (CDL) is now live on Binance Alpha!\n"
+            "Users with at least 200 Points can claim 640 CDL on first-come, first-served basis.\n"
+            "Claim within 24 hours. Claiming consumes 15 Points.\n"
+            "If rewards not distributed, threshold decreases by 15 points every hour."
+        ),
+        output={
+            "postType": "detailed-announcement",
+            "eventType": "airdrop",
+            "title": "바이낸스 알파 Creditlink($CDL) 에어드랍",
+            "tokenSymbol": "$CDL",
+            "gtd_date": "N/A",
+            "gtd_reward": "N/A",
+            "gtd_points": "N/A",
+            "gtd_claim_cost": "N/A",
+            "fcfs_date": "즉시 진행 중 (시각 미공개)",
+            "fcfs_reward": "640 $CDL",
+            "fcfs_points": "200점 이상",
+            "fcfs_claim_cost": "15점 차감",
+            "disclaimer": "24시간 이내 클레임 필요. 보상 미완료 시 매시간 15점씩 임계치 자동 하락",
+        },
+    ),
+    FewShotExample(
+        name="Irrelevant (Pre-TGE 참여자 전용)",
+        text=(
+            "Astra Nova(RVV) Token Circulation\n"
+            "Starts: 2025-10-18 13:00 (UTC)\n"
+            "Users who participated in the Astra Nova Pre-TGE can start trading RVV tokens once trading opens.\n"
+            "Winners of Booster Program Phase 1 will receive partial RVV reward."
+        ),
+        output={
+            "postType": "irrelevant",
+        },
+    ),
+    FewShotExample(
+        name="Phase 1 + Phase 2 (구체적 시각)",
+        text=(
+            "Binance Alpha features Enso (ENSO), trading opening October 14, 2025, at 07:00 (UTC).\n"
+            "Eligible users can claim 10 ENSO tokens using Binance Alpha Points.\n"
+            "Phase 1 (first 18 hours): Users with at least 245 Points can claim.\n"
+            "Phase 2 (last 6 hours): Users with at least 225 Points participate on first-come, first-served basis.\n"
+            "Claiming consumes 15 Points. If rewards not distributed, threshold decreases by 15 points every hour."
+        ),
+        output={
+            "postType": "detailed-announcement",
+            "eventType": "airdrop",
+            "title": "바이낸스 알파 Enso($ENSO) 에어드랍",
+            "tokenSymbol": "$ENSO",
+            "gtd_date": "10/14 16:00~10/15 10:00 KST",
+            "gtd_reward": "10 $ENSO",
+            "gtd_points": "245점 이상",
+            "gtd_claim_cost": "15점 차감",
+            "fcfs_date": "10/15 10:00~10/15 16:00 KST",
+            "fcfs_reward": "10 $ENSO",
+            "fcfs_points": "225점 이상",
+            "fcfs_claim_cost": "15점 차감",
+            "disclaimer": "보상 미완료 시 매시간 15점씩 임계치 자동 하락",
+        },
+    ),
+]
+
+
+def _shingles(text: str) -> FrozenSet[str]:
+    """대소문자/공백을 정규화한 문자 3-gram 집합"""
+    t = " ".join(text.lower().split())
+    return frozenset(t[i:i + 3] for i in range(max(1, len(t) - 2)))
+
+
+@lru_cache(maxsize=1)
+def _library_shingles() -> List[FrozenSet[str]]:
+    return [_shingles(ex.text) for ex in FEW_SHOT_EXAMPLES]
+
+
+def select_examples(text: str, k: int) -> List[FewShotExample]:
+    """입력과 가장 비슷한 예시 k 개 (Jaccard 유사도). 순서는 라이브러리 순서를 유지"""
+    if k <= 0:
+        return []
+    if k >= len(FEW_SHOT_EXAMPLES):
+        return list(FEW_SHOT_EXAMPLES)
+    target = _shingles(text)
+    scored = []
+    for idx, sh in enumerate(_library_shingles()):
+        union = len(target | sh) or 1
+        scored.append((len(target & sh) / union, idx))
+    chosen = sorted(idx for _, idx in sorted(scored, reverse=True)[:k])
+    return [FEW_SHOT_EXAMPLES[i] for i in chosen]
+
+
+def build_messages(text: str, k: int) -> List[Dict[str, str]]:
+    """고정 시스템 프롬프트 + 선택된 예시(user/assistant 쌍) + 실제 입력"""
+    messages = [{"role": "system", "content": PROMPT_CORE}]
+    for ex in select_examples(text, k):
+        messages.append({"role": "user", "content": ex.text})
+        messages.append({"role": "assistant", "content": json.dumps(ex.output, ensure_ascii=False)})
+    messages.append({"role": "user", "content": text})
+    return messages
+
+
+# 배치 모드 지시문: 고정 프롬프트를 건드리지 않도록 user 메시지 앞에 붙인다
+BATCH_INSTRUCTION = (
+    "아래 {count}개의 공지를 각각 독립적으로 분석하세요. "
+    "위 스키마의 JSON 객체를 공지마다 하나씩 만들고, 각 객체에 입력 번호를 \"index\" 로 넣어 "
+    "{{\"results\": [{{\"index\": 0, ...}}, ...]}} 형식의 JSON 하나로만 답하세요."
+)
+
+
+def _batch_user_content(texts: List[str]) -> str:
+    parts = [BATCH_INSTRUCTION.format(count=len(texts))]
+    for idx, text in enumerate(texts):
+        parts.append(f"### index {idx}\n{text}")
+    return "\n\n".join(parts)
+
+
+def build_batch_messages(texts: List[str], k: int) -> List[Dict[str, str]]:
+    """여러 공지를 한 요청으로 묶은 메시지 (예시는 전체 입력 기준으로 선택)
+
+    예시도 배치 형식(번호 붙인 입력 → {"results": [...]})의 한 쌍으로 보여 줘
+    단일 객체로 답하는 일을 줄인다.
+    """
+    messages = [{"role": "system", "content": PROMPT_CORE}]
+    examples = select_examples("\n".join(texts), k)
+    if examples:
+        results = [{"index": idx, **ex.output} for idx, ex in enumerate(examples)]
+        messages.append({"role": "user", "content": _batch_user_content([ex.text for ex in examples])})
+        messages.append({"role": "assistant", "content": json.dumps({"results": results}, ensure_ascii=False)})
+    messages.append({"role": "user", "content": _batch_user_content(texts)})
+    return messages
@@ -0,0 +1,135 @@
+from __future__ import annotations
+
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+from datetime import datetime, timezone
+from typing import List, Optional, Tuple
+
+from source_registry import ChatMeta
+from utils.keyword_matcher import MatchResult
+from utils.metrics import metrics
+
+
+# 소스 종류별 기본 우선순위: 공지 채널 > 미해석 > 연결된 토론 그룹
+_SOURCE_WEIGHT = {"broadcast": 3.0, "unknown": 1.5, "megagroup": 0.5}
+_KEYWORD_WEIGHT_CAP = 3.0
+_AGE_PENALTY_PER_MIN = 0.2
+
+
+def _source_kind(meta: Optional[ChatMeta]) -> str:
+    if meta is None:
+        return "unknown"
+    if meta.broadcast:
+        return "broadcast"
+    if meta.megagroup or meta.linked_from:
+        return "megagroup"
+    return "unknown"
+
+
+def message_priority(
+    meta: Optional[ChatMeta],
+    match: Optional[MatchResult],
+    sent_at: Optional[datetime],
+) -> float:
+    """GPT 대기열 우선순위 점수 (클수록 먼저). 소스 종류 + 키워드 점수 - 나이"""
+    score = _SOURCE_WEIGHT[_source_kind(meta)]
+    if match is not None:
+        score += min(max(match.score, 0.0), _KEYWORD_WEIGHT_CAP)
+    if sent_at is not None:
+        age_min = max(0.0, (datetime.now(timezone.utc) - sent_at).total_seconds() / 60)
+        score -= age_min * _AGE_PENALTY_PER_MIN
+    return score
+
+
+class GptGate:
+    """GPT 단계 앞의 우선순위 대기열 + 동시 실행 제한
+
+    빈 슬롯이 없으면 우선순위 힙에서 대기(지연)한다. 대기열이 max_queue 를 넘으면
+    가장 낮은 우선순위 항목을 버리고(shed), 슬롯을 얻었을 때 max_wait_s 보다
+    오래 기다린 항목도 버린다. acquire() 가 False 면 호출자는 GPT 를 건너뛴다.
+    """
+
+    def __init__(self, concurrency: int = 4, max_queue: int = 20, max_wait_s: float = 60.0):
+        self.concurrency = max(1, concurrency)
+        self.max_queue = max(0, max_queue)
+        self.max_wait_s = max_wait_s
+        self._active = 0
+        # (-priority, seq, enqueued_at, future)
+        self._heap: List[Tuple[float, int, float, asyncio.Future]] = []
+        self._seq = itertools.count()
+
+    @property
+    def depth(self) -> int:
+        return len(self._heap)
+
+    @property
+    def active(self) -> int:
+        return self._active
+
+    def _update_gauges(self) -> None:
+        metrics.set_gauge("gpt_queue.depth", len(self._heap))
+        metrics.set_gauge("gpt_queue.active", self._active)
+
+    def _shed(self, entry: Tuple[float, int, float, asyncio.Future], reason: str) -> None:
+        neg_prio, _, enqueued_at, fut = entry
+        metrics.inc(f"gpt_queue.shed[{reason}]")
+        logging.warning(
+            "gpt queue shed (%s): priority=%.2f waited=%.1fs depth=%d",
+            reason,
+            -neg_prio,
+            time.monotonic() - enqueued_at,
+            len(self._heap),
+        )
+        if not fut.done():
+            fut.set_result(False)
+
+    async def acquire(self, priority: float) -> bool:
+        if self._active < self.concurrency and not self._heap:
+            self._active += 1
+            metrics.observe("gpt_queue.wait_s", 0.0)
+            self._update_gauges()
+            return True
+
+        enqueued_at = time.monotonic()
+        fut: asyncio.Future = asyncio.get_running_loop().create_future()
+        entry = (-priority, next(self._seq), enqueued_at, fut)
+        heapq.heappush(self._heap, entry)
+        if len(self._heap) > self.max_queue:
+            # 가장 낮은 우선순위(같으면 가장 최근) 항목을 버린다
+            victim = max(self._heap)
+            self._heap.remove(victim)
+            heapq.heapify(self._heap)
+            self._shed(victim, "overflow")
+        self._update_gauges()
+
+        try:
+            granted = await fut
+        except asyncio.CancelledError:
+            if fut.done() and not fut.cancelled() and fut.result():
+                # 슬롯을 넘겨받은 직후 취소됨: 다음 대기자에게 양보
+                self.release()
+            elif entry in self._heap:
+                self._heap.remove(entry)
+                heapq.heapify(self._heap)
+                self._update_gauges()
+            raise
+        if granted:
+            metrics.observe("gpt_queue.wait_s", time.monotonic() - enqueued_at)
+        return granted
+
+    def release(self) -> None:
+        self._active = max(0, self._active - 1)
+        now = time.monotonic()
+        while self._heap and self._active < self.concurrency:
+            entry = heapq.heappop(self._heap)
+            if now - entry[2] > self.max_wait_s:
+                self._shed(entry, "stale")
+                continue
+            if entry[3].done():
+                continue
+            self._active += 1
+            entry[3].set_result(True)
+        self._update_gauges()
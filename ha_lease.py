@@ -0,0 +1,193 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import socket
+import sqlite3
+import threading
+import time
+from collections import deque
+from typing import Awaitable, Callable, Deque, List, Optional, Tuple
+
+from utils.metrics import metrics
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS leases (
+    name TEXT PRIMARY KEY,
+    holder TEXT NOT NULL,
+    expires_at REAL NOT NULL,
+    epoch INTEGER NOT NULL
+);
+"""
+
+
+def default_instance_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+class SQLiteLease:
+    """공유 SQLite 파일에 두는 리더 리스
+
+    acquire() 는 리스가 비었거나 만료됐거나 이미 내 것이면 expires_at 을 연장하고
+    True 를 돌려준다. BEGIN IMMEDIATE 로 쓰기 잠금을 잡아 두 인스턴스가 동시에
+    가져가지 못한다. 만료 판정은 벽시계 기준이라 인스턴스 간 시계가 맞아야 한다.
+    같은 acquire()/release() 를 가진 객체면 다른 공유 저장소로 바꿔 끼울 수 있다.
+    """
+
+    def __init__(self, path: str, holder: str, ttl_s: float = 9.0, name: str = "telebot"):
+        self.path = path
+        self.holder = holder
+        self.ttl_s = ttl_s
+        self.name = name
+        self.epoch = 0
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=5.0)
+        self._conn.executescript(_SCHEMA)
+        self._lock = threading.Lock()
+
+    def _acquire(self) -> Tuple[bool, Optional[str]]:
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute(
+                    "SELECT holder, expires_at, epoch FROM leases WHERE name=?", (self.name,)
+                ).fetchone()
+                if row and row[0] != self.holder and row[1] > now:
+                    self._conn.execute("COMMIT")
+                    return False, row[0]
+                # 주인이 바뀔 때마다 epoch 증가 (로그로 인계 이력 추적)
+                epoch = (row[2] + (row[0] != self.holder)) if row else 1
+                self._conn.execute(
+                    "INSERT INTO leases(name, holder, expires_at, epoch) VALUES(?, ?, ?, ?) "
+                    "ON CONFLICT(name) DO UPDATE SET holder=excluded.holder, "
+                    "expires_at=excluded.expires_at, epoch=excluded.epoch",
+                    (self.name, self.holder, now + self.ttl_s, epoch),
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        self.epoch = epoch
+        return True, self.holder
+
+    async def acquire(self) -> Tuple[bool, Optional[str]]:
+        """(획득/갱신 여부, 현재 주인)"""
+        return await asyncio.to_thread(self._acquire)
+
+    def _release(self) -> None:
+        with self._lock:
+            self._conn.execute(
+                "UPDATE leases SET expires_at=0 WHERE name=? AND holder=?", (self.name, self.holder)
+            )
+
+    async def release(self) -> None:
+        """정상 종료 시 리스를 바로 내려놓아 대기 인스턴스가 만료를 기다리지 않게 한다"""
+        try:
+            await asyncio.to_thread(self._release)
+        except sqlite3.Error:
+            logging.warning("lease release failed: %s", self.path)
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class ReplayBuffer:
+    """대기 중에 받은 최근 메시지 (승격 직후 재처리, 원장이 중복을 거른다)"""
+
+    def __init__(self, window_s: float):
+        self.window_s = window_s
+        self._items: Deque[Tuple[float, object]] = deque()
+
+    def _trim(self, now: float) -> None:
+        while self._items and now - self._items[0][0] > self.window_s:
+            self._items.popleft()
+
+    def add(self, item: object) -> None:
+        now = time.monotonic()
+        self._items.append((now, item))
+        self._trim(now)
+
+    def drain(self) -> List[object]:
+        self._trim(time.monotonic())
+        items = [item for _, item in self._items]
+        self._items.clear()
+        return items
+
+
+class HaCoordinator:
+    """리스로 활성/대기 역할을 정하는 루프
+
+    ttl 의 1/3 마다 리스를 갱신(대기 중이면 획득 시도)한다. 대기 인스턴스는 활성
+    인스턴스가 죽으면 리스 만료 후 한 주기 안에 승격된다. 활성 인스턴스가 리스를
+    잃거나 ttl 동안 갱신하지 못하면 on_demote 를 호출한다(두 인스턴스가 동시에
+    처리하지 않도록 호출자는 처리를 멈춰야 한다). on_promote 가 실패해도 리스를
+    내려놓고 on_demote 를 호출한다.
+    """
+
+    def __init__(
+        self,
+        lease: SQLiteLease,
+        on_promote: Callable[[], Awaitable[None]],
+        on_demote: Callable[[], Awaitable[None]],
+        on_standby_tick: Optional[Callable[[], Awaitable[None]]] = None,
+    ):
+        self.lease = lease
+        self.on_promote = on_promote
+        self.on_demote = on_demote
+        self.on_standby_tick = on_standby_tick
+        self.active = False
+        self._stopping = False
+
+    async def run(self) -> None:
+        interval = max(0.5, self.lease.ttl_s / 3)
+        last_renewed = 0.0
+        last_holder: Optional[str] = None
+        while not self._stopping:
+            try:
+                held, holder = await self.lease.acquire()
+            except Exception as e:
+                logging.warning("lease renew failed: %s", e)
+                held, holder = False, None
+            now = time.monotonic()
+            if held:
+                last_renewed = now
+            if held and not self.active:
+                self.active = True
+                metrics.inc("ha.promoted")
+                metrics.set_gauge("ha.active", 1)
+                logging.warning("🟢 lease acquired, promoting to active (epoch=%d)", self.lease.epoch)
+                try:
+                    await self.on_promote()
+                except Exception:
+                    # 반쯤 승격된 상태로 리스를 쥐고 있으면 안 된다: 내려놓고 처리를 멈춘다
+                    logging.exception("promotion failed, releasing lease")
+                    metrics.inc("ha.promote_failed")
+                    self.active = False
+                    metrics.set_gauge("ha.active", 0)
+                    await self.lease.release()
+                    await self.on_demote()
+            elif self.active and (holder not in (None, self.lease.holder) or now - last_renewed >= self.lease.ttl_s):
+                self.active = False
+                metrics.inc("ha.demoted")
+                metrics.set_gauge("ha.active", 0)
+                logging.error("🔴 lease lost (holder=%s), leaving active role", holder)
+                await self.on_demote()
+            elif not self.active:
+                if holder != last_holder:
+                    logging.info("standby: lease held by %s", holder)
+                if self.on_standby_tick:
+                    try:
+                        await self.on_standby_tick()
+                    except Exception:
+                        logging.debug("standby tick failed", exc_info=True)
+            last_holder = holder
+            await asyncio.sleep(interval)
+
+    async def stop(self) -> None:
+        self._stopping = True
+        if self.active:
+            self.active = False
+            await self.lease.release()
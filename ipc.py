@@ -0,0 +1,152 @@
+from __future__ import annotations
+
+import asyncio
+import base64
+import itertools
+import json
+import logging
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+
+# 사진 등 큰 페이로드를 한 줄 JSON 으로 주고받으므로 넉넉히
+STREAM_LIMIT = 32 * 1024 * 1024
+
+
+def parse_address(address: str) -> Tuple[str, Optional[str], Optional[int]]:
+    """"host:port" 면 TCP, 아니면 유닉스 소켓 경로"""
+    host, sep, port = address.rpartition(":")
+    if sep and port.isdigit():
+        return "tcp", host or "127.0.0.1", int(port)
+    return "unix", address, None
+
+
+async def open_connection(address: str) -> Tuple[asyncio.StreamReader, asyncio.StreamWriter]:
+    kind, target, port = parse_address(address)
+    if kind == "tcp":
+        return await asyncio.open_connection(target, port, limit=STREAM_LIMIT)
+    return await asyncio.open_unix_connection(target, limit=STREAM_LIMIT)
+
+
+async def start_server(handler, address: str) -> asyncio.AbstractServer:
+    kind, target, port = parse_address(address)
+    if kind == "tcp":
+        return await asyncio.start_server(handler, target, port, limit=STREAM_LIMIT)
+    return await asyncio.start_unix_server(handler, target, limit=STREAM_LIMIT)
+
+
+def encode(msg: Dict[str, Any]) -> bytes:
+    return json.dumps(msg, ensure_ascii=False, default=str).encode("utf-8") + b"\n"
+
+
+def b64(data: Optional[bytes]) -> Optional[str]:
+    return base64.b64encode(data).decode("ascii") if data else None
+
+
+def unb64(data: Optional[str]) -> Optional[bytes]:
+    return base64.b64decode(data) if data else None
+
+
+class IpcClient:
+    """워커 → 감독 프로세스 연결 (줄 단위 JSON 요청/응답 + 감독 측 푸시)"""
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self._reader = reader
+        self._writer = writer
+        self._ids = itertools.count(1)
+        self._pending: Dict[int, asyncio.Future] = {}
+        self.on_push: Optional[Callable[[Dict[str, Any]], Awaitable[None]]] = None
+        self.closed = asyncio.Event()
+        self._reader_task = asyncio.create_task(self._read_loop())
+
+    @classmethod
+    async def connect(cls, address: str) -> "IpcClient":
+        reader, writer = await open_connection(address)
+        return cls(reader, writer)
+
+    async def _read_loop(self) -> None:
+        try:
+            while True:
+                line = await self._reader.readline()
+                if not line:
+                    break
+                msg = json.loads(line)
+                req_id = msg.get("id")
+                if req_id is None:
+                    if self.on_push:
+                        asyncio.create_task(self.on_push(msg))
+                    continue
+                fut = self._pending.pop(req_id, None)
+                if fut and not fut.done():
+                    if msg.get("ok"):
+                        fut.set_result(msg.get("result"))
+                    else:
+                        fut.set_exception(RuntimeError(msg.get("error") or "ipc error"))
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError) as e:
+            logging.error("ipc connection error: %s", e)
+        finally:
+            self.closed.set()
+            for fut in self._pending.values():
+                if not fut.done():
+                    fut.set_exception(ConnectionError("ipc connection closed"))
+            self._pending.clear()
+
+    async def call(self, op: str, timeout_s: float = 60.0, **params: Any) -> Any:
+        if self.closed.is_set():
+            raise ConnectionError("ipc connection closed")
+        req_id = next(self._ids)
+        fut = asyncio.get_running_loop().create_future()
+        self._pending[req_id] = fut
+        self._writer.write(encode({"id": req_id, "op": op, **params}))
+        await self._writer.drain()
+        try:
+            return await asyncio.wait_for(fut, timeout_s)
+        finally:
+            self._pending.pop(req_id, None)
+
+    # --- 공유 서비스 래퍼 ---
+
+    async def claim_content(self, chash: int) -> bool:
+        """다른 워커가 같은 본문을 이미 처리 중/완료했으면 False"""
+        return bool(await self.call("claim", hash=chash))
+
+    async def release_content(self, chash: int) -> None:
+        await self.call("release", hash=chash)
+
+    async def gpt_get(self, chash: int) -> Optional[dict]:
+        return await self.call("gpt_get", hash=chash)
+
+    async def gpt_put(self, chash: int, data: dict) -> None:
+        await self.call("gpt_put", hash=chash, data=data)
+
+    async def send_html_message(
+        self,
+        bot_token: str,
+        chat_id: int,
+        text: str,
+        timeout_s: int = 10,
+        photo_bytes: Optional[bytes] = None,
+        return_message_id: bool = False,
+    ):
+        """bot_sender.send_html_message 와 같은 모양 (토큰/대상은 감독 설정 사용)"""
+        return await self.call("send", timeout_s=timeout_s * 6, html=text, photo=b64(photo_bytes))
+
+    async def update_message_text(
+        self,
+        bot_token: str,
+        chat_id: int,
+        message_id: int,
+        text: str,
+        timeout_s: int = 10,
+        caption: bool = False,
+    ) -> bool:
+        return bool(await self.call(
+            "edit", timeout_s=timeout_s * 6, message_id=message_id, html=text, caption=caption
+        ))
+
+    async def close(self) -> None:
+        self._reader_task.cancel()
+        self._writer.close()
+        try:
+            await self._writer.wait_closed()
+        except Exception:
+            pass
@@ -0,0 +1,356 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
+
+from utils.metrics import metrics
+
+if TYPE_CHECKING:
+    from digest import DigestItem
+
+
+# 처리 상태
+STATUS_PROCESSING = "processing"
+STATUS_SENT = "sent"
+STATUS_DROPPED = "dropped"
+STATUS_FAILED = "failed"  # 재전달 시 다시 처리 허용
+STATUS_DIGESTED = "digested"  # 요약 메시지 대기 중 (발송되면 sent)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS processed (
+    chat_id INTEGER NOT NULL,
+    msg_id INTEGER NOT NULL,
+    content_hash INTEGER,
+    status TEXT NOT NULL,
+    sent_message_id INTEGER,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (chat_id, msg_id)
+);
+CREATE INDEX IF NOT EXISTS idx_processed_content ON processed(content_hash);
+CREATE INDEX IF NOT EXISTS idx_processed_updated ON processed(updated_at);
+CREATE TABLE IF NOT EXISTS alerts (
+    chat_id INTEGER NOT NULL,
+    msg_id INTEGER NOT NULL,
+    sent_message_id INTEGER NOT NULL,
+    source_text TEXT NOT NULL,
+    data TEXT NOT NULL,
+    html TEXT NOT NULL,
+    has_photo INTEGER NOT NULL,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (chat_id, msg_id)
+);
+CREATE TABLE IF NOT EXISTS digest_queue (
+    chat_id INTEGER NOT NULL,
+    msg_id INTEGER NOT NULL,
+    content_hash INTEGER,
+    data TEXT NOT NULL,
+    source_link TEXT NOT NULL,
+    queued_at REAL NOT NULL,
+    PRIMARY KEY (chat_id, msg_id)
+);
+"""
+
+# 이보다 짧은 본문은 내용 기반 중복 판정에서 제외 (사진만 있는 메시지 등)
+_MIN_CONTENT_LEN = 10
+
+
+@dataclass
+class SentAlert:
+    """발송한 알림과 그때의 원문/추출 결과 (수정 메시지 반영용)"""
+    chat_id: int
+    msg_id: int
+    sent_message_id: int
+    source_text: str
+    data: Dict[str, Any]
+    html: str
+    has_photo: bool
+
+
+def _h64(data: bytes) -> int:
+    """8바이트 blake2b → 부호 있는 64비트 정수 (SQLite INTEGER 범위)"""
+    return int.from_bytes(hashlib.blake2b(data, digest_size=8).digest(), "big", signed=True)
+
+
+def content_hash(text: str) -> Optional[int]:
+    normalized = " ".join((text or "").lower().split())
+    if len(normalized) < _MIN_CONTENT_LEN:
+        return None
+    return _h64(normalized.encode("utf-8"))
+
+
+class _BoundedHashSet:
+    """64비트 해시만 보관하는 고정 크기 집합 (가장 오래된 항목부터 제거)"""
+
+    def __init__(self, capacity: int):
+        self.capacity = max(1, capacity)
+        # 삽입 순서 유지: 지운 뒤 다시 넣은 해시는 맨 뒤(가장 최근)로 간다
+        self._items: OrderedDict[int, None] = OrderedDict()
+        self.evicted = False
+
+    def add(self, h: int) -> None:
+        if h in self._items:
+            return
+        self._items[h] = None
+        if len(self._items) > self.capacity:
+            self._items.popitem(last=False)
+            self.evicted = True
+
+    def discard(self, h: int) -> None:
+        self._items.pop(h, None)
+
+    def __contains__(self, h: int) -> bool:
+        return h in self._items
+
+
+class MessageLedger:
+    """처리한 소스 메시지 원장 (SQLite) + 메모리 해시 집합
+
+    duplicate_of() 는 메모리 집합만 보고 O(1) 로 판정한다. 메모리 용량을 넘어
+    오래된 항목이 밀려난 뒤에만 SQLite 기본키 조회로 보완한다.
+    DB 쓰기는 스레드에서 수행해 이벤트 루프를 막지 않는다.
+
+    open()/reload() 시점에 "processing" 으로 남은 행은 이전 프로세스(또는 리스를 잃은
+    활성 인스턴스)가 끝내지 못한 것이므로 failed 처럼 다시 처리를 허용한다. DB 조회
+    보완에서는 processing_grace_s 보다 오래된 processing 행도 같은 취급을 한다.
+    """
+
+    def __init__(self, path: str, memory_capacity: int = 200_000, processing_grace_s: float = 120.0):
+        self.path = path
+        self.processing_grace_s = processing_grace_s
+        self._keys = _BoundedHashSet(memory_capacity)
+        self._contents = _BoundedHashSet(memory_capacity)
+        self._conn: Optional[sqlite3.Connection] = None
+        self._db_lock = threading.Lock()
+        # 이 시각 이전에 갱신된 processing 행은 주인이 사라진 것으로 본다
+        self._abandoned_before = 0.0
+
+    def open(self) -> None:
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        self._abandoned_before = time.time()
+        self._load_recent(*self._read_recent())
+
+    def _retryable(self, status: str, updated_at: float) -> bool:
+        if status == STATUS_FAILED:
+            return True
+        if status != STATUS_PROCESSING:
+            return False
+        return updated_at < max(self._abandoned_before, time.time() - self.processing_grace_s)
+
+    def _read_recent(self) -> Tuple[list, int]:
+        with self._db_lock:
+            rows = self._conn.execute(
+                "SELECT chat_id, msg_id, content_hash, status, updated_at FROM processed "
+                "ORDER BY updated_at DESC LIMIT ?",
+                (self._keys.capacity,),
+            ).fetchall()
+            total = self._conn.execute("SELECT COUNT(*) FROM processed").fetchone()[0]
+        return rows, total
+
+    def _load_recent(self, rows: list, total: int) -> None:
+        for chat_id, msg_id, chash, status, updated_at in reversed(rows):
+            if self._retryable(status, updated_at):
+                continue
+            self._keys.add(self._key(chat_id, msg_id))
+            if chash is not None:
+                self._contents.add(chash)
+        if total > len(rows):
+            self._keys.evicted = True
+        logging.info("ledger loaded: path=%s rows=%d in_memory=%d", self.path, total, len(rows))
+
+    async def reload(self) -> None:
+        """다른 프로세스가 같은 DB 에 기록한 최근 항목을 메모리 집합에 반영 (HA 승격 시)
+
+        이전 활성 인스턴스가 처리 중이던 메시지는 재처리 대상이 된다.
+        """
+        if self._conn:
+            self._abandoned_before = time.time()
+            self._load_recent(*await asyncio.to_thread(self._read_recent))
+
+    def close(self) -> None:
+        if self._conn:
+            with self._db_lock:
+                self._conn.close()
+            self._conn = None
+
+    @staticmethod
+    def _key(chat_id: int, msg_id: int) -> int:
+        return _h64(f"{chat_id}:{msg_id}".encode())
+
+    def _db_has(self, chat_id: int, msg_id: int) -> bool:
+        if not self._conn:
+            return False
+        with self._db_lock:
+            row = self._conn.execute(
+                "SELECT status, updated_at FROM processed WHERE chat_id=? AND msg_id=?",
+                (chat_id, msg_id),
+            ).fetchone()
+        return bool(row) and not self._retryable(row[0], row[1])
+
+    def duplicate_of(self, chat_id: int, msg_id: int, chash: Optional[int]) -> Optional[str]:
+        """중복이면 사유("id" | "content")를, 새 메시지면 None 반환"""
+        if self._key(chat_id, msg_id) in self._keys:
+            return "id"
+        if chash is not None and chash in self._contents:
+            return "content"
+        if self._keys.evicted and self._db_has(chat_id, msg_id):
+            return "id"
+        return None
+
+    def _write(self, chat_id: int, msg_id: int, chash: Optional[int], status: str, sent_message_id: Optional[int]) -> None:
+        if not self._conn:
+            return
+        with self._db_lock:
+            self._conn.execute(
+                "INSERT INTO processed(chat_id, msg_id, content_hash, status, sent_message_id, updated_at) "
+                "VALUES(?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT(chat_id, msg_id) DO UPDATE SET "
+                "status=excluded.status, sent_message_id=COALESCE(excluded.sent_message_id, sent_message_id), "
+                "content_hash=COALESCE(excluded.content_hash, content_hash), updated_at=excluded.updated_at",
+                (chat_id, msg_id, chash, status, sent_message_id, time.time()),
+            )
+
+    async def _persist(self, *args) -> None:
+        try:
+            await asyncio.to_thread(self._write, *args)
+        except Exception:
+            logging.exception("ledger write failed")
+
+    async def begin(self, chat_id: int, msg_id: int, chash: Optional[int]) -> None:
+        """처리 시작 표시: 메모리에는 즉시 반영해 동시 재전달도 막는다"""
+        self._keys.add(self._key(chat_id, msg_id))
+        if chash is not None:
+            self._contents.add(chash)
+        await self._persist(chat_id, msg_id, chash, STATUS_PROCESSING, None)
+
+    async def finish(
+        self,
+        chat_id: int,
+        msg_id: int,
+        chash: Optional[int],
+        status: str,
+        sent_message_id: Optional[int] = None,
+    ) -> None:
+        if status == STATUS_FAILED:
+            self._keys.discard(self._key(chat_id, msg_id))
+            if chash is not None:
+                self._contents.discard(chash)
+        metrics.inc(f"ledger.{status}")
+        await self._persist(chat_id, msg_id, chash, status, sent_message_id)
+
+    async def mark(self, chat_id: int, msg_id: int, status: str) -> None:
+        """처리 없이 상태만 기록 (앨범의 나머지 조각 등)"""
+        self._keys.add(self._key(chat_id, msg_id))
+        await self._persist(chat_id, msg_id, None, status, None)
+
+    def _write_alert(self, alert: SentAlert) -> None:
+        if not self._conn:
+            return
+        with self._db_lock:
+            self._conn.execute(
+                "INSERT INTO alerts(chat_id, msg_id, sent_message_id, source_text, data, html, has_photo, updated_at) "
+                "VALUES(?, ?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT(chat_id, msg_id) DO UPDATE SET sent_message_id=excluded.sent_message_id, "
+                "source_text=excluded.source_text, data=excluded.data, html=excluded.html, "
+                "has_photo=excluded.has_photo, updated_at=excluded.updated_at",
+                (
+                    alert.chat_id,
+                    alert.msg_id,
+                    alert.sent_message_id,
+                    alert.source_text,
+                    json.dumps(alert.data, ensure_ascii=False),
+                    alert.html,
+                    int(alert.has_photo),
+                    time.time(),
+                ),
+            )
+
+    async def record_alert(self, alert: SentAlert) -> None:
+        try:
+            await asyncio.to_thread(self._write_alert, alert)
+        except Exception:
+            logging.exception("ledger alert write failed")
+
+    def _read_alert(self, chat_id: int, msg_id: int) -> Optional[SentAlert]:
+        if not self._conn:
+            return None
+        with self._db_lock:
+            row = self._conn.execute(
+                "SELECT sent_message_id, source_text, data, html, has_photo FROM alerts WHERE chat_id=? AND msg_id=?",
+                (chat_id, msg_id),
+            ).fetchone()
+        if not row:
+            return None
+        return SentAlert(chat_id, msg_id, row[0], row[1], json.loads(row[2]), row[3], bool(row[4]))
+
+    async def get_alert(self, chat_id: int, msg_id: int) -> Optional[SentAlert]:
+        try:
+            return await asyncio.to_thread(self._read_alert, chat_id, msg_id)
+        except Exception:
+            logging.exception("ledger alert read failed")
+            return None
+
+    def _write_digest(self, item: DigestItem) -> None:
+        if not self._conn:
+            return
+        with self._db_lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO digest_queue(chat_id, msg_id, content_hash, data, source_link, queued_at) "
+                "VALUES(?, ?, ?, ?, ?, ?)",
+                (
+                    item.chat_id,
+                    item.msg_id,
+                    item.chash,
+                    json.dumps(item.data, ensure_ascii=False),
+                    item.source_link,
+                    time.time(),
+                ),
+            )
+
+    async def queue_digest(self, item: DigestItem) -> None:
+        """요약 대기 항목 저장 (재시작/승격 후 pending_digest 로 다시 넘겨받는다)"""
+        try:
+            await asyncio.to_thread(self._write_digest, item)
+        except Exception:
+            logging.exception("ledger digest write failed")
+
+    def _delete_digest(self, keys: List[Tuple[int, int]]) -> None:
+        if not self._conn:
+            return
+        with self._db_lock:
+            self._conn.executemany("DELETE FROM digest_queue WHERE chat_id=? AND msg_id=?", keys)
+
+    async def unqueue_digest(self, items: List[DigestItem]) -> None:
+        try:
+            await asyncio.to_thread(self._delete_digest, [(i.chat_id, i.msg_id) for i in items])
+        except Exception:
+            logging.exception("ledger digest delete failed")
+
+    def _read_digest(self) -> List[DigestItem]:
+        from digest import DigestItem
+
+        if not self._conn:
+            return []
+        with self._db_lock:
+            rows = self._conn.execute(
+                "SELECT chat_id, msg_id, content_hash, data, source_link FROM digest_queue ORDER BY queued_at"
+            ).fetchall()
+        return [DigestItem(r[0], r[1], r[2], json.loads(r[3]), r[4]) for r in rows]
+
+    async def pending_digest(self) -> List[DigestItem]:
+        """아직 요약 메시지로 보내지 못한 항목 (이전 프로세스/활성 인스턴스가 남긴 것 포함)"""
+        try:
+            return await asyncio.to_thread(self._read_digest)
+        except Exception:
+            logging.exception("ledger digest read failed")
+            return []
@@ -1,22 +1,73 @@
 from __future__ import annotations
 
+import sys
+import time
+
+_PROCESS_START = time.perf_counter()
+
+from utils.startup_profile import StartupProfiler
+
+# --profile-startup 이면 이후 모든 import 시간을 기록
+_profiler = StartupProfiler(_PROCESS_START, enabled="--profile-startup" in sys.argv)
+_profiler.install_import_hook()
+
 import asyncio
 import logging
-from typing import Optional
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
 
 from telethon import TelegramClient, events
-from telethon.tl.types import Message, MessageMediaPhoto
-from telethon.tl.functions.channels import GetFullChannelRequest
 
 from config import load_config, AppConfig
-from utils.logging_utils import setup_logging
+from utils.logging_utils import LazyJson, log_sampled, reset_trace_id, sampler, set_trace_id, setup_logging
+from utils.http_clients import close_all as close_http_clients
+from utils.metrics import metrics, run_metrics_reporter
+from utils.loop_monitor import LoopMonitor
+from utils.runtime_profiler import RuntimeProfiler
 from utils.text_utils import normalize_text
-from filters import passes_local_filters
-from gpt_client import call_openai_structured
-from formatter import format_html
-from bot_sender import send_html_message, check_bot_access
-from price_fetcher import PriceFetcher
-from price_scheduler import PriceScheduler
+from config_reload import ConfigReloader
+from filters import evaluate_local_filters, get_keyword_matcher
+from client_pool import ClientPool, PooledAccount
+from source_registry import SourceCache, SourceRegistry, load_sources
+from catchup import CatchupRunner, CatchupState, LivePriority
+from ledger import (
+    MessageLedger,
+    STATUS_DIGESTED,
+    STATUS_DROPPED,
+    STATUS_FAILED,
+    STATUS_SENT,
+    SentAlert,
+    content_hash,
+)
+from session_store import SnapshotStringSession, build_session
+
+if TYPE_CHECKING:
+    from telethon.tl.types import Message
+    from digest import DigestBuffer, DigestItem
+    from gpt_queue import GptGate
+    from ha_lease import HaCoordinator
+    from ipc import IpcClient
+    from price_fetcher import PriceFetcher, PriceInfo
+    from price_scheduler import PriceScheduler
+    from template_cache import TemplateCache
+
+
+@dataclass
+class AppContext:
+    """메시지 처리 파이프라인이 공유하는 런타임 객체 묶음"""
+    cfg: AppConfig
+    client: TelegramClient
+    registry: SourceRegistry
+    pool: ClientPool
+    price_fetcher: Optional["PriceFetcher"] = None
+    price_scheduler: Optional["PriceScheduler"] = None
+    ledger: Optional[MessageLedger] = None
+    templates: Optional[TemplateCache] = None
+    gpt_gate: Optional[GptGate] = None
+    ipc: Optional["IpcClient"] = None  # 감독 모드 워커일 때만
+    digest: Optional[DigestBuffer] = None  # DIGEST_MODE 일 때만
+    # 처리 중인 원본 (chat_id, msg_id) → 그동안 도착한 마지막 수정본 (처리가 끝나면 반영)
+    pending_edits: Dict[Tuple[int, int], Optional[Message]] = field(default_factory=dict)
 
 
 def _extract_message_text(msg: Message) -> str:
@@ -59,14 +110,27 @@ def _build_source_link(msg: Message, chat_username: Optional[str], chat_id: int)
     return "N/A"
 
 
-async def _get_photo(msg: Message, client: TelegramClient) -> Optional[bytes]:
-    """메시지에서 사진을 바이트로 다운로드"""
-    if not msg.media or not isinstance(msg.media, MessageMediaPhoto):
+async def _get_photo(msg: Message, pool: ClientPool, username: Optional[str]) -> Optional[bytes]:
+    """메시지에서 사진을 바이트로 다운로드 (FloodWait 중이 아닌 계정 사용)"""
+    if not msg.media:
         return None
-    
+    from telethon.tl.types import MessageMediaPhoto
+    if not isinstance(msg.media, MessageMediaPhoto):
+        return None
+
+    async def _download(acct: PooledAccount) -> Optional[bytes]:
+        media = msg.media
+        if not acct.primary:
+            # 파일 참조는 받은 계정 기준이므로 이 계정으로 메시지를 다시 받는다
+            copy = await acct.client.get_messages(username, ids=msg.id)
+            media = getattr(copy, "media", None)
+            if media is None:
+                return None
+        return await acct.client.download_media(media, file=bytes)
+
     try:
-        photo_bytes = await client.download_media(msg.media, file=bytes)
-        return photo_bytes
+        # 공개 채널(username)만 다른 계정이 대신 받을 수 있다
+        return await pool.call(_download, "download_media", primary_only=not username)
     except Exception:
         logging.exception("failed to download photo")
         return None
@@ -98,55 +162,238 @@ def _extract_listing_time(data: dict) -> Optional[str]:
     return None
 
 
-async def handle_message(
-    cfg: AppConfig,
-    client: TelegramClient,
-    msg: Message,
-    price_fetcher: PriceFetcher,
-    price_scheduler: PriceScheduler,
-) -> None:
+async def handle_message(ctx: AppContext, msg: Message, album: Optional[List[Message]] = None) -> None:
+    """메시지 한 건(앨범이면 캡션이 있는 대표 조각 + album 에 전체 조각) 처리"""
     if not msg:
         logging.debug("drop: empty message event")
         return
 
-    chat = await msg.get_chat()
-    chat_id = getattr(chat, "id", 0)
-    username = getattr(chat, "username", None)
+    chat_id = getattr(msg, "chat_id", None) or 0
+    # 이 메시지의 모든 단계 로그에 같은 trace id 가 붙는다
+    token = set_trace_id(f"{chat_id}:{msg.id}")
+    try:
+        await _handle_traced(ctx, msg, chat_id, album)
+    finally:
+        reset_trace_id(token)
+
+
+def _album_photo(album: Optional[List[Message]]) -> Optional[Message]:
+    """앨범에서 사진이 있는 첫 조각"""
+    if not album:
+        return None
+    from telethon.tl.types import MessageMediaPhoto
+    return next((m for m in album if isinstance(getattr(m, "media", None), MessageMediaPhoto)), None)
+
+
+async def _handle_traced(ctx: AppContext, msg: Message, chat_id: int, album: Optional[List[Message]]) -> None:
+    cfg = ctx.cfg
+    text = _extract_message_text(msg)
+
+    # 원장 중복 검사를 가장 먼저 (메모리 조회만, 네트워크 없음)
+    chash = content_hash(text)
+    ledger = ctx.ledger
+    if ledger:
+        dup = ledger.duplicate_of(chat_id, msg.id, chash)
+        if dup:
+            log_sampled(f"dup:{chat_id}", "dropped: duplicate (%s) | chat_id=%s msg_id=%s", dup, chat_id, msg.id)
+            return
+
+    meta = ctx.registry.get(chat_id)
+    if meta:
+        username = meta.username
+        title = meta.title
+    else:
+        # 미해석 채팅: 업데이트에 실려 온 엔티티만 사용 (네트워크 조회 없음)
+        chat = getattr(msg, "chat", None)
+        username = getattr(chat, "username", None)
+        title = getattr(chat, "title", None)
+        if not cfg.is_allowed_channel(chat_id, username):
+            # 목록 밖 채팅은 채팅별로 첫 건과 이후 N건마다만 기록
+            suppressed = sampler.should_log(f"skipped:{chat_id}")
+            if suppressed is not None:
+                logging.warning(
+                    "🔴 SKIPPED MESSAGE | chat_username=%s (@%s) | chat_id=%s | suppressed=%d | configured_channels=%s",
+                    title or "N/A",
+                    username if username else "None",
+                    chat_id,
+                    suppressed,
+                    cfg.source_channels,
+                )
+            return
 
-    if not cfg.is_allowed_channel(chat_id, username):
-        logging.warning(
-            "🔴 SKIPPED MESSAGE | chat_username=%s (@%s) | chat_id=%s | configured_channels=%s",
-            getattr(chat, "title", "N/A"),
-            username if username else "None",
-            chat_id,
-            cfg.source_channels,
-        )
-        return
-    
     logging.info(
         "✅ ACCEPTED MESSAGE | chat_username=%s (@%s) | chat_id=%s",
-        getattr(chat, "title", "N/A"),
+        title or "N/A",
         username if username else "None",
         chat_id,
     )
 
-    text = _extract_message_text(msg)
-    if not passes_local_filters(cfg, text):
+    # 같은 공지를 다른 워커의 채널에서 먼저 받았으면 중복
+    claimed = False
+    if ctx.ipc and chash is not None:
+        try:
+            if not await ctx.ipc.claim_content(chash):
+                log_sampled(
+                    f"dup:{chat_id}", "dropped: duplicate (other worker) | chat_id=%s msg_id=%s", chat_id, msg.id
+                )
+                return
+            claimed = True
+        except Exception as e:
+            logging.warning("cross-worker claim failed, continuing: %s", e)
+
+    if ledger:
+        await ledger.begin(chat_id, msg.id, chash)
+    key = (chat_id, msg.id)
+    ctx.pending_edits[key] = None
+    status, sent_message_id = STATUS_FAILED, None
+    try:
+        status, sent_message_id = await _process_accepted(ctx, msg, chat_id, username, text, _album_photo(album))
+    finally:
+        edit = ctx.pending_edits.pop(key, None)
+        if ledger:
+            await ledger.finish(chat_id, msg.id, chash, status, sent_message_id)
+            # 앨범의 나머지 조각은 대표 메시지로 처리됐으므로 따로 처리하지 않는다
+            for m in album or ():
+                if m.id != msg.id:
+                    await ledger.mark(chat_id, m.id, STATUS_DROPPED)
+        if claimed and status == STATUS_FAILED:
+            # 실패한 본문은 다른 워커가 다시 시도할 수 있게 반납
+            try:
+                await ctx.ipc.release_content(chash)
+            except Exception:
+                pass
+    if edit is not None and status == STATUS_SENT:
+        # 처리 중에 원본이 수정됐으면 방금 보낸 알림에 바로 반영
+        logging.info("applying edit received during processing | chat_id=%s msg_id=%s", chat_id, msg.id)
+        await handle_edit(ctx, edit)
+
+
+def _reward_of(data: dict) -> str:
+    """GTD 보상 우선, 없으면 FCFS 보상"""
+    reward = data.get("gtd_reward", "N/A")
+    if reward == "N/A":
+        reward = data.get("fcfs_reward", "N/A")
+    return reward
+
+
+async def _lookup_price(ctx: AppContext, data: dict) -> Tuple[Optional["PriceInfo"], Optional[float]]:
+    """추출 결과의 토큰 가격과 보상 총 가치 (없으면 None)"""
+    token_symbol = data.get("tokenSymbol", "N/A")
+    if not token_symbol or token_symbol == "N/A" or ctx.price_fetcher is None:
+        return None, None
+    price_info = await ctx.price_fetcher.fetch_price(token_symbol)
+    if not price_info:
+        return None, None
+    # GTD 또는 FCFS 보상으로 총 가치 계산
+    total_value = None
+    reward = _reward_of(data)
+    if reward != "N/A":
+        total_value = ctx.price_fetcher.calculate_value(reward, price_info)
+    logging.info(
+        "price found: %s = $%.4f (value=%.2f USDT)",
+        token_symbol,
+        price_info.price_usd,
+        total_value or 0,
+    )
+    return price_info, total_value
+
+
+def _schedule_price_check(ctx: AppContext, data: dict, sent_message_id: int, html: str, has_photo: bool) -> bool:
+    """상장 시간이 있으면 발송한 알림에 가격 체크 예약 (같은 알림이면 덮어씀)"""
+    listing_time = _extract_listing_time(data)
+    if not listing_time:
+        return False
+    token_symbol = data.get("tokenSymbol", "N/A")
+    scheduled = ctx.price_scheduler.schedule(
+        token_symbol=token_symbol,
+        listing_time_str=listing_time,
+        bot_token=ctx.cfg.bot_token,
+        chat_id=ctx.cfg.target_chat_id,
+        message_id=sent_message_id,
+        reward_str=_reward_of(data),
+        current_html=html,
+        has_photo=has_photo,
+    )
+    if scheduled:
+        logging.info(
+            "price check scheduled: token=%s listing=%s",
+            token_symbol,
+            listing_time,
+        )
+    return scheduled
+
+
+# 텔레그램 메시지 본문 최대 길이
+_TELEGRAM_TEXT_LIMIT = 4096
+
+
+async def _process_accepted(
+    ctx: AppContext,
+    msg: Message,
+    chat_id: int,
+    username: Optional[str],
+    text: str,
+    photo_msg: Optional[Message] = None,
+) -> Tuple[str, Optional[int]]:
+    """필터 → GPT → 가격 → 발송. (원장 상태, 발송된 message_id) 반환"""
+    # 무거운 파이프라인 모듈은 시작 직후 워밍업에서 로드되므로 여기서는 sys.modules 조회만 발생
+    from gpt_client import call_openai_structured
+    from formatter import format_html
+    from bot_sender import send_html_message
+    from gpt_queue import message_priority
+
+    cfg = ctx.cfg
+
+    passed, match = evaluate_local_filters(cfg, text)
+    if not passed:
         logging.info(
-            "dropped by local filters | chat=%s id=%s text_len=%d allow=%s block=%s",
+            "dropped by local filters | chat=%s id=%s text_len=%d matched=%s score=%.1f",
             username or chat_id,
             chat_id,
             len(text),
-            cfg.allow_keywords,
-            cfg.block_keywords,
+            match.matched,
+            match.score,
         )
-        return
+        return STATUS_DROPPED, None
 
     if not cfg.openai_api_key:
         logging.warning("dropped: OPENAI_API_KEY missing")
-        return
+        return STATUS_DROPPED, None
 
-    data = call_openai_structured(cfg, text, cfg.http_timeout_seconds)
+    # 학습된 채널 템플릿이 신뢰 상태면 GPT 호출 생략
+    tpl_match = ctx.templates.match(chat_id, text) if ctx.templates else None
+    chash = content_hash(text)
+    data = None
+    if tpl_match and tpl_match.trusted:
+        data = tpl_match.data
+        logging.info("template hit: chat=%s key=%s (gpt skipped)", username or chat_id, tpl_match.key)
+    elif ctx.ipc and chash is not None:
+        # 다른 워커가 같은 본문으로 받은 GPT 결과 재사용
+        try:
+            data = await ctx.ipc.gpt_get(chash)
+        except Exception as e:
+            logging.warning("shared gpt cache lookup failed: %s", e)
+        if data:
+            logging.info("shared gpt cache hit: chat=%s (gpt skipped)", username or chat_id)
+    if data is None:
+        gate = ctx.gpt_gate
+        if gate:
+            priority = message_priority(ctx.registry.get(chat_id), match, getattr(msg, "date", None))
+            if not await gate.acquire(priority):
+                logging.info("dropped: gpt queue shed | chat=%s priority=%.2f", username or chat_id, priority)
+                return STATUS_FAILED, None
+        try:
+            data = await call_openai_structured(cfg, text, cfg.http_timeout_seconds)
+        finally:
+            if gate:
+                gate.release()
+        if data and ctx.ipc and chash is not None:
+            try:
+                await ctx.ipc.gpt_put(chash, data)
+            except Exception as e:
+                logging.warning("shared gpt cache store failed: %s", e)
+        if data and ctx.templates:
+            await ctx.templates.observe(chat_id, text, data, tpl_match)
     if not data:
         logging.info(
             "dropped: gpt parse fail | chat=%s id=%s model=%s", 
@@ -154,52 +401,50 @@ async def handle_message(
             chat_id,
             cfg.openai_model,
         )
-        return
+        return STATUS_FAILED, None
 
-    import json
-    logging.info("GPT JSON: %s", json.dumps(data, ensure_ascii=False, indent=2))
+    logging.info(
+        "gpt result | postType=%s eventType=%s token=%s",
+        data.get("postType"),
+        data.get("eventType"),
+        data.get("tokenSymbol"),
+    )
+    logging.debug("GPT JSON: %s", LazyJson(data, indent=2))
 
     post_type = data.get("postType")
+    if ctx.digest and post_type != "irrelevant" and post_type in cfg.digest_post_types:
+        # 우선순위 낮은 공지는 모아서 요약 메시지 하나로 보낸다
+        from digest import DigestItem
+
+        item = DigestItem(chat_id, msg.id, content_hash(text), data, _build_source_link(msg, username, chat_id))
+        # 발송 전에 죽어도 재시작/승격한 인스턴스가 이어서 보내도록 먼저 저장
+        if ctx.ledger:
+            await ctx.ledger.queue_digest(item)
+        ctx.digest.add(item)
+        log_sampled(f"digest:{chat_id}", "queued for digest: postType=%s | chat=%s", post_type, username or chat_id)
+        return STATUS_DIGESTED, None
     if post_type in ["irrelevant", "pre-announcement"]:
         logging.info("dropped: postType=%s | chat=%s", post_type, username or chat_id)
-        return
+        return STATUS_DROPPED, None
 
     # 가격 정보 조회 (1차 시도)
     token_symbol = data.get("tokenSymbol", "N/A")
-    price_info = None
-    total_value = None
-    
-    if token_symbol and token_symbol != "N/A":
-        price_info = price_fetcher.fetch_price(token_symbol)
-        
-        if price_info:
-            # GTD 또는 FCFS 보상으로 총 가치 계산
-            reward = data.get("gtd_reward", "N/A")
-            if reward == "N/A":
-                reward = data.get("fcfs_reward", "N/A")
-            if reward != "N/A":
-                total_value = price_fetcher.calculate_value(reward, price_info)
-            
-            logging.info(
-                "price found: %s = $%.4f (value=%.2f USDT)",
-                token_symbol,
-                price_info.price_usd,
-                total_value or 0,
-            )
-        else:
-            logging.info("price not found yet: %s (will schedule)", token_symbol)
+    price_info, total_value = await _lookup_price(ctx, data)
+    if token_symbol and token_symbol != "N/A" and not price_info:
+        logging.info("price not found yet: %s (will schedule)", token_symbol)
 
     source_link = _build_source_link(msg, username, chat_id)
     html = format_html(data, source_link, price_info, total_value)
     if not html:
         logging.info("dropped: empty html | chat=%s", username or chat_id)
-        return
+        return STATUS_DROPPED, None
 
-    # 이미지 다운로드
-    photo_bytes = await _get_photo(msg, client)
+    # 이미지 다운로드 (앨범이면 사진이 있는 첫 조각)
+    photo_bytes = await _get_photo(photo_msg or msg, ctx.pool, username)
 
-    # 메시지 발송
-    result = send_html_message(
+    # 메시지 발송 (감독 모드 워커는 감독 프로세스의 단일 발송 창구 사용)
+    sender = ctx.ipc.send_html_message if ctx.ipc else send_html_message
+    result = await sender(
         cfg.bot_token, 
         cfg.target_chat_id, 
         html, 
@@ -208,9 +453,9 @@ async def handle_message(
         return_message_id=True,  # message_id 반환 요청
     )
     
-    if not result:
+    if not result or (isinstance(result, dict) and not result.get("success")):
         logging.error("failed to send message")
-        return
+        return STATUS_FAILED, None
     
     sent_message_id = result.get("message_id") if isinstance(result, dict) else None
     
@@ -225,96 +470,445 @@ async def handle_message(
         sent_message_id,
     )
     
+    if sent_message_id and ctx.ledger:
+        # 원본이 수정되면 이 알림을 고칠 수 있도록 원문/추출 결과를 남긴다
+        await ctx.ledger.record_alert(SentAlert(
+            chat_id, msg.id, sent_message_id, text, data, html, photo_bytes is not None,
+        ))
+
     # 가격을 못 찾았고, 상장 시간이 있으면 스케줄링
     if not price_info and sent_message_id:
-        listing_time = _extract_listing_time(data)
-        if listing_time:
-            reward = data.get("gtd_reward", "N/A")
-            if reward == "N/A":
-                reward = data.get("fcfs_reward", "N/A")
-            
-            scheduled = price_scheduler.schedule(
-                token_symbol=token_symbol,
-                listing_time_str=listing_time,
-                bot_token=cfg.bot_token,
-                chat_id=cfg.target_chat_id,
-                message_id=sent_message_id,
-                reward_str=reward,
-                current_html=html,
+        _schedule_price_check(ctx, data, sent_message_id, html, photo_bytes is not None)
+
+    return STATUS_SENT, sent_message_id
+
+
+async def send_digest(ctx: AppContext, items: List[DigestItem]) -> None:
+    """모인 알림을 요약 메시지로 발송하고 원장에 결과 기록"""
+    from formatter import format_digest_html
+    from bot_sender import send_html_message
+
+    cfg = ctx.cfg
+    html = format_digest_html([(item.data, item.source_link) for item in items])
+    if len(html) > _TELEGRAM_TEXT_LIMIT and len(items) > 1:
+        # 메시지 길이 제한을 넘으면 반씩 나눠 보낸다
+        half = len(items) // 2
+        await send_digest(ctx, items[:half])
+        await send_digest(ctx, items[half:])
+        return
+
+    sender = ctx.ipc.send_html_message if ctx.ipc else send_html_message
+    result = await sender(
+        cfg.bot_token,
+        cfg.target_chat_id,
+        html,
+        cfg.http_timeout_seconds,
+        return_message_id=True,
+    )
+    ok = bool(result) and not (isinstance(result, dict) and not result.get("success"))
+    sent_message_id = result.get("message_id") if isinstance(result, dict) else None
+    if ok:
+        metrics.inc("digest.sent")
+        logging.info("digest sent | items=%d | sent_msg_id=%s", len(items), sent_message_id)
+    else:
+        metrics.inc("digest.failed")
+        logging.error("failed to send digest | items=%d", len(items))
+    if ctx.ledger:
+        for item in items:
+            await ctx.ledger.finish(
+                item.chat_id,
+                item.msg_id,
+                item.chash,
+                STATUS_SENT if ok else STATUS_FAILED,
+                sent_message_id,
             )
-            
-            if scheduled:
-                logging.info(
-                    "price check scheduled: token=%s listing=%s",
-                    token_symbol,
-                    listing_time,
-                )
+        await ctx.ledger.unqueue_digest(items)
+    if not ok and ctx.ipc:
+        # 실패한 본문은 다른 워커가 다시 시도할 수 있게 반납
+        for item in items:
+            if item.chash is None:
+                continue
+            try:
+                await ctx.ipc.release_content(item.chash)
+            except Exception:
+                pass
+
+
+async def handle_edit(ctx: AppContext, msg: Message) -> None:
+    """원본 공지가 수정되면 이미 발송한 알림을 새 내용으로 고친다 (새 알림은 보내지 않음)"""
+    if not msg or not ctx.ledger:
+        return
+    chat_id = getattr(msg, "chat_id", None) or 0
+    token = set_trace_id(f"{chat_id}:{msg.id}:edit")
+    try:
+        await _handle_edit_traced(ctx, msg, chat_id)
+    finally:
+        reset_trace_id(token)
+
+
+async def _handle_edit_traced(ctx: AppContext, msg: Message, chat_id: int) -> None:
+    from gpt_client import call_openai_structured
+    from formatter import format_html
+    from bot_sender import update_message_text
+    from gpt_queue import message_priority
+    from message_groups import changed_fields, is_relevant_edit
+
+    cfg = ctx.cfg
+    alert = await ctx.ledger.get_alert(chat_id, msg.id)
+    if not alert:
+        key = (chat_id, msg.id)
+        if key in ctx.pending_edits:
+            # 원본이 아직 GPT/발송 중: 마지막 수정본만 보관했다가 알림이 기록되면 반영
+            ctx.pending_edits[key] = msg
+            metrics.inc("edit.deferred")
+            logging.info("edit deferred until original is processed | chat_id=%s msg_id=%s", chat_id, msg.id)
+        # 그 밖에 발송하지 않은 메시지의 수정은 무시
+        return
+    text = _extract_message_text(msg)
+    if text == alert.source_text:
+        return
+    meta = ctx.registry.get(chat_id)
+    username = meta.username if meta else None
+
+    if not is_relevant_edit(alert.source_text, text):
+        # 문구만 바뀜: 원문만 갱신하고 재분석하지 않는다
+        log_sampled(f"edit:{chat_id}", "edit ignored: no slot change | chat=%s msg_id=%s", username or chat_id, msg.id)
+        metrics.inc("edit.cosmetic")
+        alert.source_text = text
+        await ctx.ledger.record_alert(alert)
+        return
+    if not cfg.openai_api_key:
+        return
+
+    gate = ctx.gpt_gate
+    if gate:
+        priority = message_priority(meta, None, getattr(msg, "edit_date", None) or getattr(msg, "date", None))
+        if not await gate.acquire(priority):
+            logging.info("edit skipped: gpt queue shed | chat=%s priority=%.2f", username or chat_id, priority)
+            return
+    try:
+        data = await call_openai_structured(cfg, text, cfg.http_timeout_seconds)
+    finally:
+        if gate:
+            gate.release()
+    if not data:
+        logging.info("edit skipped: gpt parse fail | chat=%s msg_id=%s", username or chat_id, msg.id)
+        return
+
+    fields = changed_fields(alert.data, data)
+    if not fields:
+        log_sampled(
+            f"edit:{chat_id}", "edit ignored: extraction unchanged | chat=%s msg_id=%s", username or chat_id, msg.id
+        )
+        metrics.inc("edit.unchanged")
+        alert.source_text = text
+        await ctx.ledger.record_alert(alert)
+        return
+    if data.get("postType") in ["irrelevant", "pre-announcement"]:
+        # 정정으로 공지 성격이 바뀐 경우 기존 알림은 그대로 둔다
+        log_sampled(f"edit:{chat_id}", "edit ignored: postType=%s | chat=%s", data.get("postType"), username or chat_id)
+        return
+
+    price_info, total_value = await _lookup_price(ctx, data)
+    html = format_html(data, _build_source_link(msg, username, chat_id), price_info, total_value)
+    if not html or html == alert.html:
+        return
+
+    updater = ctx.ipc.update_message_text if ctx.ipc else update_message_text
+    ok = await updater(
+        cfg.bot_token,
+        cfg.target_chat_id,
+        alert.sent_message_id,
+        html,
+        cfg.http_timeout_seconds,
+        caption=alert.has_photo,
+    )
+    if not ok:
+        logging.error("failed to update alert for edited message | sent_msg_id=%s", alert.sent_message_id)
+        metrics.inc("edit.failed")
+        return
+
+    await ctx.ledger.record_alert(SentAlert(
+        chat_id, msg.id, alert.sent_message_id, text, data, html, alert.has_photo,
+    ))
+    # 기존 가격 체크는 이전 본문을 들고 있으므로 새 내용 기준으로 다시 예약 (상장 시각이 바뀌었을 수 있음)
+    if price_info or not _schedule_price_check(ctx, data, alert.sent_message_id, html, alert.has_photo):
+        ctx.price_scheduler.cancel(alert.sent_message_id)
+    metrics.inc("edit.applied")
+    logging.info(
+        "alert updated from edit | chat=%s msg_id=%s sent_msg_id=%s changed=%s",
+        username or chat_id,
+        msg.id,
+        alert.sent_message_id,
+        fields,
+    )
+
+
+def _load_pipeline(ctx: AppContext) -> None:
+    """GPT/포맷터/발송/가격 모듈을 로드하고 가격 조회기·스케줄러를 생성"""
+    from utils.retry_utils import configure_upstream
+
+    for upstream in ("openai", "telegram", *ctx.cfg.price_providers):
+        configure_upstream(
+            upstream,
+            retry_ratio=ctx.cfg.retry_budget_ratio,
+            failure_threshold=ctx.cfg.circuit_failure_threshold,
+            reset_timeout_s=ctx.cfg.circuit_reset_seconds,
+        )
+    with _profiler.phase("import pipeline modules"):
+        import gpt_client  # noqa: F401
+        import formatter  # noqa: F401
+        import bot_sender  # noqa: F401
+        from price_cache import PriceCache, SharedPriceStore
+        from price_fetcher import PriceFetcher
+        from price_providers import build_providers
+        from price_scheduler import PriceScheduler, ScheduledCheckStore
+
+    cfg = ctx.cfg
+    store = SharedPriceStore(cfg.price_cache_store_path) if cfg.price_cache_store_path else None
+    price_cache = PriceCache(
+        max_entries=cfg.price_cache_max_entries,
+        ttl_s=cfg.price_cache_ttl_seconds,
+        stale_s=cfg.price_cache_stale_seconds,
+        negative_ttl_s=cfg.price_negative_ttl_seconds,
+        store=store,
+    )
+    providers = build_providers(
+        cfg.price_providers,
+        {
+            "coingecko": cfg.price_coingecko_url,
+            "binance": cfg.price_binance_url,
+            "dexscreener": cfg.price_dexscreener_url,
+        },
+        timeout_s=cfg.http_timeout_seconds,
+    )
+    ctx.price_fetcher = PriceFetcher(
+        timeout_s=cfg.http_timeout_seconds,
+        cache=price_cache,
+        providers=providers,
+        hedge_delay_s=cfg.price_hedge_delay_ms / 1000,
+    )
+    ctx.price_scheduler = PriceScheduler(
+        ctx.price_fetcher,
+        http_timeout_s=cfg.http_timeout_seconds,
+        updater=ctx.ipc.update_message_text if ctx.ipc else None,
+        store=ScheduledCheckStore(cfg.price_schedule_store_path) if cfg.price_schedule_store_path else None,
+    )
+
+
+def _arg_value(name: str) -> Optional[str]:
+    """sys.argv 에서 "name VALUE" 형태의 값"""
+    if name in sys.argv:
+        i = sys.argv.index(name)
+        if i + 1 < len(sys.argv):
+            return sys.argv[i + 1]
+    return None
 
 
 async def main_async() -> None:
-    cfg = load_config()
-    setup_logging(cfg.log_level)
+    with _profiler.phase("load config + logging"):
+        cfg = load_config()
+        setup_logging(cfg.log_level, cfg.log_format, cfg.log_sample_every)
     logging.info("starting telebot | log_level=%s", cfg.log_level)
+    base_cfg = cfg  # 설정 재로드 비교 기준 (워커별로 바꾼 값 제외)
+
+    ipc = None
+    worker_arg = _arg_value("--worker")
+    if worker_arg is not None:
+        # 감독 모드 워커: 배정받은 채널만 구독하고 세션/로컬 상태는 워커별로 분리
+        from ipc import IpcClient
+        ipc = await IpcClient.connect(_arg_value("--ipc") or cfg.supervisor_ipc)
+        sources = await ipc.call("hello", worker_id=int(worker_arg))
+        cfg = cfg.for_worker(int(worker_arg), sources)
+        logging.info("running as worker %s | session=%s", worker_arg, cfg.session_name)
     logging.info("source_channels=%s target_chat_id=%s", cfg.source_channels, cfg.target_chat_id)
 
-    # 가격 조회 및 스케줄러 초기화
-    price_fetcher = PriceFetcher(timeout_s=cfg.http_timeout_seconds)
-    price_scheduler = PriceScheduler(price_fetcher, http_timeout_s=cfg.http_timeout_seconds)
+    session = build_session(cfg.session_backend, cfg.session_name, cfg.session_commit_interval_seconds)
+    client = TelegramClient(session, cfg.api_id, cfg.api_hash)
+    # 엔티티/미디어 요청을 나눠 맡을 보조 계정 (업데이트는 기본 계정만 받는다)
+    extra_sessions = [
+        (name, build_session(cfg.session_backend, name, cfg.session_commit_interval_seconds))
+        for name in cfg.extra_session_names
+    ]
+    # 보조 계정은 로그인이 끝난 뒤에야 풀에 넣는다
+    pool = ClientPool([PooledAccount(cfg.session_name, client, primary=True)])
+    extra_accounts = [PooledAccount(name, TelegramClient(s, cfg.api_id, cfg.api_hash)) for name, s in extra_sessions]
+    ctx = AppContext(cfg=cfg, client=client, registry=SourceRegistry(), pool=pool, ipc=ipc)
+    registry = ctx.registry
+    source_cache: Optional[SourceCache] = None
 
-    client = TelegramClient(cfg.session_name, cfg.api_id, cfg.api_hash)
+    async def _on_ipc_push(msg: dict) -> None:
+        if msg.get("op") != "assign":
+            return
+        # 다른 워커가 죽거나 돌아오면 감독이 채널 배정을 다시 보낸다
+        ctx.cfg = ctx.cfg.with_sources(msg.get("sources") or [])
+        logging.info("sources reassigned: %s", ctx.cfg.source_channels)
+        if source_cache is not None:
+            await load_sources(pool, ctx.cfg.source_channels, registry, source_cache, cfg.source_resolve_concurrency)
 
-    async def resolve_source_chats() -> list:
-        resolved = []
-        for src in cfg.source_channels:
-            try:
-                ent = await client.get_entity(src)
-                
-                # 채널인 경우 자동으로 join 시도
-                if hasattr(ent, 'broadcast') and ent.broadcast:
-                    try:
-                        from telethon.tl.functions.channels import JoinChannelRequest
-                        await client(JoinChannelRequest(ent))
-                        logging.info("✅ joined channel: %s", getattr(ent, 'username', src))
-                    except Exception as join_err:
-                        # 이미 가입되어 있거나, 권한 문제일 수 있음
-                        logging.debug("join attempt for %s: %s", src, join_err)
-                
-                resolved.append(ent)
+    if ipc:
+        ipc.on_push = _on_ipc_push
+    first_message_seen = False
+    catchup_state = CatchupState(cfg.catchup_state_path)
+    catchup_state.load()
+    live = LivePriority()
+    ctx.ledger = MessageLedger(cfg.ledger_path, cfg.ledger_memory_keys)
+    ctx.ledger.open()
+    if cfg.template_cache_enabled:
+        from template_cache import TemplateCache
+
+        ctx.templates = TemplateCache(
+            cfg.template_cache_path,
+            min_confirmations=cfg.template_min_confirmations,
+            reverify_every=cfg.template_reverify_every,
+            max_per_channel=cfg.template_max_per_channel,
+        )
+        ctx.templates.load()
+    from gpt_queue import GptGate
+
+    ctx.gpt_gate = GptGate(cfg.gpt_concurrency, cfg.gpt_queue_max, cfg.gpt_queue_max_wait_seconds)
+    if cfg.digest_enabled:
+        from digest import DigestBuffer
+
+        ctx.digest = DigestBuffer(
+            cfg.digest_window_seconds,
+            cfg.digest_max_items,
+            lambda items: _flush_digest(items),
+        )
+
+    # HA 대기 중에는 처리하지 않고 최근 메시지만 보관 (승격 직후 재처리).
+    # 코디네이터가 만들어지기 전(시작 중)에도 리스를 얻기 전까지는 대기로 본다.
+    ha: Optional[HaCoordinator] = None
+    standby_buffer = None
+    if cfg.ha_enabled:
+        from ha_lease import HaCoordinator, ReplayBuffer, SQLiteLease, default_instance_id
+
+        standby_buffer = ReplayBuffer(cfg.ha_lease_ttl_seconds * 3)
+
+    def _standby() -> bool:
+        return cfg.ha_enabled and not (ha and ha.active)
+
+    async def _flush_digest(items: List[DigestItem]) -> None:
+        if _standby():
+            # 리스를 잃었으면 보내지 않는다: 원장에 남은 항목은 활성 인스턴스가 넘겨받는다
+            logging.warning("digest flush skipped on standby | items=%d", len(items))
+            return
+        await send_digest(ctx, items)
+
+    # 앨범(grouped_id)은 조각을 잠시 모아 캡션이 있는 조각 하나로 처리
+    # catch-up 진행 위치는 처리가 끝난 뒤에만 기록한다 (모으는 중 종료되면 다음 catch-up 이 다시 가져옴)
+    def _mark_handled(messages: list) -> None:
+        for m in messages:
+            catchup_state.mark(getattr(m, "chat_id", None) or 0, m.id)
+
+    async def _on_album(group: list) -> None:
+        try:
+            await handle_message(ctx, pick_album_caption(group), album=group)
+        finally:
+            _mark_handled(group)
+
+    albums = None
+    if cfg.album_window_ms > 0:
+        from message_groups import AlbumCollector, pick_album_caption
+
+        albums = AlbumCollector(cfg.album_window_ms / 1000, _on_album)
+
+    async def _ingest(m: Message) -> None:
+        if albums and getattr(m, "grouped_id", None):
+            albums.add(m)
+            return
+        try:
+            await handle_message(ctx, m)
+        finally:
+            _mark_handled([m])
+
+    async def _on_message(event: events.newmessage.NewMessage.Event) -> None:
+        nonlocal first_message_seen
+        if _standby():
+            if event.message:
+                standby_buffer.add(event.message)
+            return
+        live.enter()
+        try:
+            meta = registry.get(event.chat_id)
+            logging.debug(
+                "📨 NEW MESSAGE EVENT | chat_id=%s | username=@%s | title=%s | msg_id=%s",
+                event.chat_id,
+                meta.username if meta else "None",
+                meta.title if meta else "N/A",
+                event.message.id if event.message else "None",
+            )
+            await _ingest(event.message)
+        except Exception:
+            logging.exception("handle_message error")
+        finally:
+            live.exit()
+            if not first_message_seen:
+                first_message_seen = True
+                elapsed = _profiler.since_start()
+                metrics.set_gauge("startup.time_to_first_message_s", elapsed)
+                logging.info("first message handled %.3fs after process start", elapsed)
+
+    async def _on_edit(event: events.messageedited.MessageEdited.Event) -> None:
+        if _standby():
+            return
+        try:
+            await handle_edit(ctx, event.message)
+        except Exception:
+            logging.exception("handle_edit error")
+
+    async with client:
+        with _profiler.phase("telegram connect + auth"):
+            await client.start()
+
+        snapshot_task = None
+        if isinstance(session, SnapshotStringSession):
+            # 로그인 직후 인증 정보를 바로 남기고, 이후에는 주기적으로만 기록
+            await session.snapshot()
+            snapshot_task = asyncio.create_task(session.run_snapshots(cfg.session_snapshot_interval_seconds))
+
+        # 소스 목록은 registry 에서 O(1) 로 조회 (백그라운드 갱신도 즉시 반영).
+        # 해석 전에는 registry 가 비어 있어 handle_message 의 설정 기반 검사로 걸러진다.
+        client.add_event_handler(_on_message, events.NewMessage(func=lambda e: registry.accepts(e.chat_id)))
+        if cfg.edit_tracking_enabled:
+            client.add_event_handler(_on_edit, events.MessageEdited(func=lambda e: registry.accepts(e.chat_id)))
+        metrics.set_gauge("startup.handler_registered_s", _profiler.since_start())
+        logging.info("message handler registered %.3fs after process start", _profiler.since_start())
+
+        # 핸들러 등록과 파이프라인 로드 사이에는 await 가 없어야 한다 (가격 조회기/스케줄러가 None 인 구간)
+        _load_pipeline(ctx)
+
+        for (name, extra_session), acct in zip(extra_sessions, extra_accounts):
+            with _profiler.phase(f"telegram connect + auth ({name})"):
+                # start() 는 로그인되지 않은 세션이면 stdin 으로 전화번호를 물어 멈추므로 쓰지 않는다
                 try:
-                    full = await client(GetFullChannelRequest(ent))
-                    linked_id = getattr(full.full_chat, "linked_chat_id", None)
-                    if linked_id:
-                        linked_ent = await client.get_entity(linked_id)
-                        resolved.append(linked_ent)
+                    await acct.client.connect()
+                    authorized = await acct.client.is_user_authorized()
                 except Exception:
-                    pass
-                tname = ent.__class__.__name__
-                uname = getattr(ent, "username", None)
-                eid = getattr(ent, "id", None)
-                title = getattr(ent, "title", None)
-                broadcast = getattr(ent, "broadcast", None)
-                megagroup = getattr(ent, "megagroup", None)
-                logging.info(
-                    "resolved: type=%s username=%s id=%s title=%s broadcast=%s megagroup=%s",
-                    tname,
-                    uname,
-                    eid,
-                    title,
-                    broadcast,
-                    megagroup,
-                )
-                if tname.lower() == "user":
-                    logging.warning(
-                        "entity is a User, not a Channel/Chat. Make sure SOURCE_CHANNELS points to a channel username (@...) or -100... id"
-                    )
-            except Exception:
-                logging.warning("failed to resolve source channel: %s", src)
-        printable = [getattr(e, "username", None) or getattr(e, "id", None) for e in resolved]
-        logging.info("resolved sources=%s", printable)
-        return resolved
+                    logging.exception("extra account %s failed to connect, excluded from pool", name)
+                    await acct.client.disconnect()
+                    continue
+                if not authorized:
+                    logging.warning("extra account %s is not logged in, excluded from pool", name)
+                    await acct.client.disconnect()
+                    continue
+            if isinstance(extra_session, SnapshotStringSession):
+                await extra_session.snapshot()
+            pool.accounts.append(acct)
+        if len(pool.accounts) > 1:
+            logging.info("client pool accounts=%s", [a.name for a in pool.accounts])
+
+        with _profiler.phase("resolve sources"):
+            source_cache = SourceCache(cfg.source_cache_path, cfg.source_cache_ttl_hours * 3600)
+            source_cache.load()
+            refresh_task = await load_sources(
+                pool,
+                ctx.cfg.source_channels,
+                registry,
+                source_cache,
+                cfg.source_resolve_concurrency,
+            )
 
-    async with client:
-        await client.start()
         try:
             me = await client.get_me()
             logging.info(
@@ -325,48 +919,192 @@ async def main_async() -> None:
             )
         except Exception:
             logging.warning("could not fetch self account info")
-        
-        sources = await resolve_source_chats()
-        
-        if cfg.bot_token and cfg.target_chat_id:
-            check_bot_access(cfg.bot_token, cfg.target_chat_id, cfg.http_timeout_seconds)
 
-        async def _on_message(event: events.newmessage.NewMessage.Event) -> None:
-            try:
-                chat = await event.get_chat()
-                logging.info(
-                    "📨 NEW MESSAGE EVENT | chat_id=%s | username=@%s | title=%s | msg_id=%s",
-                    event.chat_id,
-                    getattr(chat, "username", "None"),
-                    getattr(chat, "title", "N/A"),
-                    event.message.id if event.message else "None",
+        if cfg.bot_token and cfg.target_chat_id and not ipc:
+            from bot_sender import check_bot_access
+            with _profiler.phase("bot access check"):
+                await check_bot_access(cfg.bot_token, cfg.target_chat_id, cfg.http_timeout_seconds)
+
+        metrics_task = asyncio.create_task(run_metrics_reporter(cfg.metrics_log_interval_seconds, cfg.metrics_file))
+        loop_monitor = None
+        if cfg.loop_monitor_enabled:
+            loop_monitor = LoopMonitor(
+                lag_threshold_s=cfg.loop_lag_threshold_ms / 1000,
+                stall_s=cfg.loop_stall_seconds,
+            )
+            loop_monitor.start()
+
+        def _runtime_state() -> dict:
+            gate = ctx.gpt_gate
+            return {
+                "gpt_queue_depth": gate.depth if gate else None,
+                "gpt_active": gate.active if gate else None,
+                "scheduled_price_checks": len(ctx.price_scheduler.tasks) if ctx.price_scheduler else 0,
+                "ha_active": ha.active if ha else None,
+                "digest_pending": ctx.digest.pending if ctx.digest else None,
+            }
+
+        RuntimeProfiler(cfg.profile_dir, cfg.profile_duration_seconds, _runtime_state).install(
+            asyncio.get_running_loop()
+        )
+
+        async def _apply_reload(changes: dict) -> None:
+            if ctx.ipc:
+                # 워커의 채널은 감독이 배정한다
+                changes = {k: v for k, v in changes.items() if k not in ("source_channels", "source_channels_raw")}
+            new_cfg = ctx.cfg.with_updates(changes)
+            # 새 키워드 오토마톤을 먼저 만들어 두어 교체 직후 메시지가 빌드 비용을 내지 않게 한다
+            get_keyword_matcher(new_cfg)
+            if "source_channels" in changes:
+                # 캐시에 있는 기존 채널은 네트워크 없이 등록되고 새 채널만 해석된다
+                await load_sources(pool, new_cfg.source_channels, registry, source_cache, new_cfg.source_resolve_concurrency)
+            # 처리 중인 메시지는 시작 시점의 설정 객체를 계속 쓰고, 새 메시지부터 새 설정을 본다
+            ctx.cfg = new_cfg
+            if "log_level" in changes:
+                logging.getLogger().setLevel(getattr(logging, new_cfg.log_level.upper(), logging.INFO))
+            if "log_sample_every" in changes:
+                sampler.every = max(1, new_cfg.log_sample_every)
+
+        reloader = ConfigReloader(base_cfg, _apply_reload)
+        reloader.install(asyncio.get_running_loop())
+        reload_task = asyncio.create_task(reloader.watch())
+
+        scheduler_task = None
+        catchup_task = None
+        digest_restore_task = None
+
+        async def _start_processing(reason: str) -> None:
+            """처리 역할 시작: 저장된 가격 체크 예약 복원 + 스케줄러 + catch-up"""
+            nonlocal scheduler_task, catchup_task, digest_restore_task
+            await ctx.price_scheduler.restore(cfg.bot_token)
+            # 이전 프로세스(또는 이전 활성 인스턴스)가 보내지 못한 요약 항목 이어받기
+            pending = await ctx.ledger.pending_digest()
+            if pending:
+                logging.info("restored %d pending digest items", len(pending))
+                if ctx.digest:
+                    for item in pending:
+                        ctx.digest.add(item)
+                else:
+                    # DIGEST_MODE 를 끈 뒤 남은 항목: 한 번에 보내고 종료 시 완료를 기다린다
+                    digest_restore_task = asyncio.create_task(send_digest(ctx, pending))
+            scheduler_task = asyncio.create_task(ctx.price_scheduler.run())
+            if not cfg.only_new_posts:
+                # 재시작/재연결 공백 구간 백필 (라이브 메시지가 항상 우선)
+                runner = CatchupRunner(
+                    client,
+                    registry,
+                    catchup_state,
+                    live,
+                    _ingest,
+                    concurrency=cfg.catchup_concurrency,
+                    max_age_minutes=cfg.catchup_max_age_minutes,
+                    max_messages=cfg.catchup_max_messages,
                 )
-                await handle_message(cfg, client, event.message, price_fetcher, price_scheduler)
-            except Exception:
-                logging.exception("handle_message error")
+                asyncio.create_task(runner.run_once(reason))
+                catchup_task = asyncio.create_task(runner.watch())
+
+        async def _replay(messages: list) -> None:
+            for m in messages:
+                try:
+                    await _ingest(m)
+                except Exception:
+                    logging.exception("replay handle_message error")
 
-        if sources:
-            client.add_event_handler(_on_message, events.NewMessage(chats=sources))
+        async def _promote() -> None:
+            # 이전 활성 인스턴스가 남긴 원장을 먼저 읽어 중복 발송을 막는다
+            await ctx.ledger.reload()
+            await _start_processing("takeover")
+            replay = standby_buffer.drain()
+            if replay:
+                logging.info("replaying %d messages received while standby", len(replay))
+                asyncio.create_task(_replay(replay))
+
+        async def _demote() -> None:
+            # 다른 인스턴스가 이미 처리 중일 수 있으므로 즉시 종료 (재시작되면 대기 인스턴스로 합류)
+            await client.disconnect()
+
+        ha_task = None
+        if cfg.ha_enabled:
+            lease = SQLiteLease(
+                cfg.ha_lease_path,
+                cfg.ha_instance_id or default_instance_id(),
+                cfg.ha_lease_ttl_seconds,
+            )
+            ha = HaCoordinator(lease, _promote, _demote, on_standby_tick=ctx.price_fetcher.warm)
+            ha_task = asyncio.create_task(ha.run())
+            logging.info("HA mode: instance=%s lease=%s", lease.holder, cfg.ha_lease_path)
         else:
-            client.add_event_handler(_on_message, events.NewMessage())
+            await _start_processing("startup")
+
+        ipc_watch = None
+        if ipc:
+            async def _exit_on_ipc_loss() -> None:
+                # 감독 프로세스가 사라지면 워커도 종료 (감독이 다시 띄운다)
+                await ipc.closed.wait()
+                logging.error("supervisor connection lost, shutting down worker")
+                await client.disconnect()
+
+            ipc_watch = asyncio.create_task(_exit_on_ipc_loss())
 
-        # 가격 스케줄러를 백그라운드에서 실행
-        scheduler_task = asyncio.create_task(price_scheduler.run())
+        metrics.set_gauge("startup.ready_s", _profiler.since_start())
+        _profiler.report()
 
         try:
             await client.run_until_disconnected()
         finally:
+            if albums:
+                # 모으는 중인 앨범을 먼저 처리해야 그 결과가 요약/원장에 반영된다
+                await albums.close()
+            if ctx.digest:
+                # 모아 둔 알림은 종료 전에 보낸다 (대기 인스턴스면 건너뛰고 원장에 남긴다)
+                await ctx.digest.close()
+            if digest_restore_task:
+                await asyncio.gather(digest_restore_task, return_exceptions=True)
+            if ha:
+                # 리스를 바로 내려놓아 대기 인스턴스가 만료를 기다리지 않고 승격되게 한다
+                ha_task.cancel()
+                await ha.stop()
+                ha.lease.close()
             # 종료 시 스케줄러 정리
-            price_scheduler.stop()
-            await scheduler_task
+            ctx.price_scheduler.stop()
+            if scheduler_task:
+                await scheduler_task
+            metrics_task.cancel()
+            reload_task.cancel()
+            if loop_monitor:
+                loop_monitor.stop()
+            if catchup_task:
+                catchup_task.cancel()
+            if ipc_watch:
+                ipc_watch.cancel()
+                await ipc.close()
+            await catchup_state.flush()
+            if snapshot_task:
+                snapshot_task.cancel()
+                await session.snapshot()
+            for acct in extra_accounts:
+                await acct.client.disconnect()
+            ctx.ledger.close()
+            if ctx.price_fetcher and ctx.price_fetcher.cache.store:
+                ctx.price_fetcher.cache.store.close()
+            if ctx.price_scheduler.store:
+                ctx.price_scheduler.store.close()
+            await close_http_clients()
+            if refresh_task and not refresh_task.done():
+                refresh_task.cancel()
 
 
 def main() -> None:
+    if "--supervisor" in sys.argv:
+        from supervisor import run_supervisor
+        entry = run_supervisor()
+    else:
+        entry = main_async()
     try:
-        asyncio.run(main_async())
+        asyncio.run(entry)
     except KeyboardInterrupt:
         pass
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
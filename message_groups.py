@@ -0,0 +1,89 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+from collections import Counter
+from typing import Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+from template_cache import slot_values
+from utils.metrics import metrics
+
+
+class AlbumCollector:
+    """grouped_id 가 같은 앨범 메시지를 짧은 구간 동안 모아 한 번에 넘긴다
+
+    앨범은 사진마다 NewMessage 이벤트로 따로 오고 캡션은 보통 하나에만 있다.
+    첫 조각이 도착한 뒤 window_s 가 지나면 모인 조각을 id 순으로 on_album 에 넘긴다.
+    """
+
+    def __init__(self, window_s: float, on_album: Callable[[List[object]], Awaitable[None]]):
+        self.window_s = window_s
+        self.on_album = on_album
+        self._groups: Dict[Tuple[int, int], List[object]] = {}
+        self._timers: Dict[Tuple[int, int], asyncio.TimerHandle] = {}
+        self._tasks: Set[asyncio.Task] = set()
+
+    @property
+    def pending(self) -> int:
+        return len(self._groups)
+
+    def add(self, msg: object) -> None:
+        key = (getattr(msg, "chat_id", None) or 0, msg.grouped_id)
+        group = self._groups.get(key)
+        if group is None:
+            self._groups[key] = [msg]
+            self._timers[key] = asyncio.get_running_loop().call_later(self.window_s, self._flush, key)
+        elif all(m.id != msg.id for m in group):
+            group.append(msg)
+
+    def _take(self, key: Tuple[int, int]) -> Optional[List[object]]:
+        timer = self._timers.pop(key, None)
+        if timer is not None:
+            timer.cancel()
+        group = self._groups.pop(key, None)
+        if not group:
+            return None
+        group.sort(key=lambda m: m.id)
+        metrics.observe("album.size", len(group))
+        return group
+
+    def _flush(self, key: Tuple[int, int]) -> None:
+        group = self._take(key)
+        if group:
+            task = asyncio.ensure_future(self._deliver(group))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _deliver(self, group: List[object]) -> None:
+        try:
+            await self.on_album(group)
+        except Exception:
+            logging.exception("album handling error")
+
+    async def close(self) -> None:
+        """종료 시 모으는 중인 앨범을 바로 처리하고 진행 중인 처리가 끝나길 기다린다"""
+        for key in list(self._groups):
+            group = self._take(key)
+            if group:
+                await self._deliver(group)
+        if self._tasks:
+            await asyncio.gather(*list(self._tasks), return_exceptions=True)
+
+
+def _text_of(msg: object) -> str:
+    return getattr(msg, "raw_text", None) or getattr(msg, "message", None) or ""
+
+
+def pick_album_caption(group: List[object]) -> object:
+    """캡션(본문)이 가장 긴 조각을 대표 메시지로 (없으면 첫 조각)"""
+    return max(group, key=lambda m: len(_text_of(m).strip()), default=group[0])
+
+
+def is_relevant_edit(old_text: str, new_text: str) -> bool:
+    """수정으로 토큰명/티커/시각/숫자 슬롯이 바뀌었는지 (문구만 바뀌었으면 False)"""
+    return Counter(slot_values(old_text)) != Counter(slot_values(new_text))
+
+
+def changed_fields(old: Optional[dict], new: dict) -> List[str]:
+    old = old or {}
+    return sorted(k for k in set(old) | set(new) if old.get(k) != new.get(k))
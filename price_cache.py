@@ -0,0 +1,156 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
+from utils.metrics import metrics
+
+
+# 조회 결과 상태
+FRESH = "fresh"
+STALE = "stale"  # 바로 돌려주되 백그라운드 갱신 필요
+NEGATIVE = "negative"  # 최근에 "없음" 으로 확인됨
+MISS = "miss"
+
+
+@dataclass
+class CachedPrice:
+    symbol: str
+    price_usd: Optional[float]  # None 이면 음성 항목
+    url: Optional[str]
+    stored_at: float  # time.time()
+
+    @property
+    def negative(self) -> bool:
+        return self.price_usd is None
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS prices (
+    symbol TEXT PRIMARY KEY,
+    price_usd REAL,
+    url TEXT,
+    stored_at REAL NOT NULL
+);
+"""
+
+
+class SharedPriceStore:
+    """같은 호스트의 여러 봇 프로세스가 공유하는 가격 캐시 (SQLite WAL)
+
+    읽기는 로컬 기본키 조회라 동기로, 쓰기는 스레드에서 수행한다.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=5.0)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        self._lock = threading.Lock()
+
+    def get(self, symbol: str) -> Optional[CachedPrice]:
+        try:
+            with self._lock:
+                row = self._conn.execute(
+                    "SELECT price_usd, url, stored_at FROM prices WHERE symbol=?", (symbol,)
+                ).fetchone()
+        except sqlite3.Error:
+            logging.warning("shared price store read failed: %s", self.path)
+            return None
+        if not row:
+            return None
+        return CachedPrice(symbol, row[0], row[1], row[2])
+
+    def _write(self, entry: CachedPrice) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO prices(symbol, price_usd, url, stored_at) VALUES(?, ?, ?, ?) "
+                "ON CONFLICT(symbol) DO UPDATE SET price_usd=excluded.price_usd, url=excluded.url, "
+                "stored_at=excluded.stored_at WHERE excluded.stored_at > prices.stored_at",
+                (entry.symbol, entry.price_usd, entry.url, entry.stored_at),
+            )
+
+    async def put(self, entry: CachedPrice) -> None:
+        try:
+            await asyncio.to_thread(self._write, entry)
+        except sqlite3.Error:
+            logging.warning("shared price store write failed: %s", self.path)
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class PriceCache:
+    """크기 제한 LRU + TTL 가격 캐시
+
+    - ttl_s 이내: FRESH
+    - ttl_s ~ ttl_s + stale_s: STALE (즉시 사용, 호출자가 백그라운드 갱신)
+    - 음성 항목은 negative_ttl_s 동안 NEGATIVE
+    메모리에 없으면 공유 저장소(있다면)를 확인해 메모리로 올린다.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 1024,
+        ttl_s: float = 60.0,
+        stale_s: float = 300.0,
+        negative_ttl_s: float = 120.0,
+        store: Optional[SharedPriceStore] = None,
+    ):
+        self.max_entries = max(1, max_entries)
+        self.ttl_s = ttl_s
+        self.stale_s = stale_s
+        self.negative_ttl_s = negative_ttl_s
+        self.store = store
+        self._items: "OrderedDict[str, CachedPrice]" = OrderedDict()
+
+    def _classify(self, entry: CachedPrice, now: float) -> str:
+        age = now - entry.stored_at
+        if entry.negative:
+            return NEGATIVE if age < self.negative_ttl_s else MISS
+        if age < self.ttl_s:
+            return FRESH
+        if age < self.ttl_s + self.stale_s:
+            return STALE
+        return MISS
+
+    def _remember(self, entry: CachedPrice) -> None:
+        self._items[entry.symbol] = entry
+        self._items.move_to_end(entry.symbol)
+        while len(self._items) > self.max_entries:
+            self._items.popitem(last=False)
+            metrics.inc("price_cache.evicted")
+
+    def lookup(self, symbol: str) -> Tuple[str, Optional[CachedPrice]]:
+        now = time.time()
+        entry = self._items.get(symbol)
+        state = self._classify(entry, now) if entry else MISS
+        if state == MISS and self.store is not None:
+            shared = self.store.get(symbol)
+            if shared is not None:
+                shared_state = self._classify(shared, now)
+                if shared_state != MISS:
+                    self._remember(shared)
+                    entry, state = shared, shared_state
+                    metrics.inc("price_cache.shared_hit")
+        if state == MISS:
+            self._items.pop(symbol, None)
+        else:
+            self._items.move_to_end(symbol)
+        metrics.inc(f"price_cache.{state}")
+        return state, (entry if state != MISS else None)
+
+    async def put(self, symbol: str, price_usd: Optional[float], url: Optional[str] = None) -> CachedPrice:
+        entry = CachedPrice(symbol, price_usd, url, time.time())
+        self._remember(entry)
+        if self.store is not None:
+            await self.store.put(entry)
+        return entry
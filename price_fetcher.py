@@ -1,29 +1,48 @@
 from __future__ import annotations
 
-import httpx
+import asyncio
 import logging
 import re
-from typing import Optional, Dict
-from datetime import datetime, timedelta
-from utils.retry_utils import run_with_retries
+import time
+from typing import List, Optional, Dict
+from datetime import datetime
+from price_cache import FRESH, NEGATIVE, STALE, CachedPrice, PriceCache
+from price_providers import CoinGeckoProvider, PriceProvider, hedged_lookup
 
 
 class PriceInfo:
     """토큰 가격 정보"""
-    def __init__(self, symbol: str, price_usd: float, coingecko_url: str):
+    def __init__(self, symbol: str, price_usd: float, coingecko_url: str, provider: str = "coingecko"):
         self.symbol = symbol
         self.price_usd = price_usd
-        self.coingecko_url = coingecko_url
+        self.coingecko_url = coingecko_url  # 가격 출처 링크 (공급자에 따라 거래소/DEX 페이지)
+        self.provider = provider
         self.fetched_at = datetime.utcnow()
 
+    @classmethod
+    def from_cached(cls, entry: CachedPrice) -> "PriceInfo":
+        info = cls(entry.symbol, entry.price_usd, entry.url or "", provider="cache")
+        info.fetched_at = datetime.utcfromtimestamp(entry.stored_at)
+        return info
+
 
 class PriceFetcher:
-    """CoinGecko API를 통한 토큰 가격 조회"""
+    """가격 공급자(CoinGecko, 거래소 티커, DEX 집계기)를 통한 토큰 가격 조회"""
     
-    def __init__(self, timeout_s: int = 10):
+    def __init__(
+        self,
+        timeout_s: int = 10,
+        cache: Optional[PriceCache] = None,
+        providers: Optional[List[PriceProvider]] = None,
+        hedge_delay_s: float = 0.3,
+    ):
         self.timeout_s = timeout_s
-        self.cache: Dict[str, PriceInfo] = {}
-        self.cache_ttl_seconds = 60  # 1분 캐시
+        self.cache = cache or PriceCache()
+        self.providers = providers or [CoinGeckoProvider(timeout_s=timeout_s)]
+        self.hedge_delay_s = hedge_delay_s
+        # 같은 심볼 동시 조회는 한 번의 API 호출로 합친다
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self._last_warm = 0.0
     
     def _clean_symbol(self, symbol: str) -> str:
         """$ENSO -> enso"""
@@ -34,123 +53,92 @@ class PriceFetcher:
             cleaned = cleaned[1:]
         return cleaned.lower()
     
-    def _search_coingecko(self, symbol: str) -> Optional[Dict]:
-        """CoinGecko에서 토큰 검색"""
-        url = "https://api.coingecko.com/api/v3/search"
-        params = {"query": symbol}
-        
-        try:
-            with httpx.Client(timeout=self.timeout_s) as client:
-                r = client.get(url, params=params)
-                if r.status_code != 200:
-                    logging.warning("coingecko search failed: http=%s", r.status_code)
-                    return None
-                
-                data = r.json()
-                coins = data.get("coins", [])
-                
-                # 심볼이 정확히 일치하는 첫 번째 결과 찾기
-                for coin in coins:
-                    if coin.get("symbol", "").lower() == symbol.lower():
-                        # <--- 수정: [ ] 가 아니라 { } (딕셔너리)여야 합니다.
-                        return {
-                            "id": coin.get("id"),
-                            "symbol": coin.get("symbol"),
-                            "name": coin.get("name"),
-                        }
-                
-                # 정확한 일치가 없으면 첫 번째 결과 사용
-                if coins:
-                    return {
-                        "id": coins[0].get("id"),
-                        "symbol": coins[0].get("symbol"),
-                        "name": coins[0].get("name"),
-                    }
-                
-                return None
-        except Exception:
-            logging.exception("coingecko search exception")
-            return None
+    async def resolve_pins(self, token_symbol: str) -> Dict[str, str]:
+        """공급자별 ref(coin id, 거래쌍 등)를 미리 확정. 실패한 공급자는 빠진다"""
+        symbol = self._clean_symbol(token_symbol)
+        if not symbol or symbol == "n/a":
+            return {}
+        results = await asyncio.gather(*(p.resolve(symbol) for p in self.providers), return_exceptions=True)
+        pins: Dict[str, str] = {}
+        for provider, ref in zip(self.providers, results):
+            if isinstance(ref, BaseException):
+                logging.debug("price pin failed: %s %s (%s)", provider.name, symbol, ref)
+            elif ref:
+                pins[provider.name] = ref
+        return pins
     
-    def _get_price(self, coin_id: str) -> Optional[float]:
-        """CoinGecko에서 가격 조회"""
-        url = f"https://api.coingecko.com/api/v3/simple/price"
-        params = {
-            "ids": coin_id,
-            "vs_currencies": "usd"
-        }
-        
-        try:
-            with httpx.Client(timeout=self.timeout_s) as client:
-                r = client.get(url, params=params)
-                if r.status_code != 200:
-                    logging.warning("coingecko price failed: http=%s", r.status_code)
-                    return None
-                
-                data = r.json()
-                price = data.get(coin_id, {}).get("usd")
-                return float(price) if price else None
-        except Exception:
-            logging.exception("coingecko price exception")
-            return None
+    async def warm(self, min_interval_s: float = 20.0) -> None:
+        """공급자 커넥션을 열어 둔다 (min_interval_s 안의 반복 호출은 무시)"""
+        now = time.monotonic()
+        if now - self._last_warm < min_interval_s:
+            return
+        self._last_warm = now
+        results = await asyncio.gather(*(p.ping() for p in self.providers), return_exceptions=True)
+        for provider, result in zip(self.providers, results):
+            if isinstance(result, BaseException):
+                logging.debug("price provider warm-up failed: %s (%s)", provider.name, result)
     
-    def fetch_price(self, token_symbol: str, use_cache: bool = True) -> Optional[PriceInfo]:
-        """토큰 가격 조회 (캐시 지원)"""
+    async def fetch_price(
+        self,
+        token_symbol: str,
+        use_cache: bool = True,
+        pins: Optional[Dict[str, str]] = None,
+    ) -> Optional[PriceInfo]:
+        """토큰 가격 조회 (캐시 지원)
+
+        use_cache=False 면 캐시를 건너뛰고 새로 조회한다 (결과는 캐시에 반영).
+        pins 가 있으면 해당 공급자는 검색 없이 가격만 조회한다.
+        """
         if not token_symbol or token_symbol == "N/A":
             return None
         
         symbol = self._clean_symbol(token_symbol)
         
         # 캐시 체크
-        if use_cache and symbol in self.cache:
-            cached = self.cache[symbol]
-            age = (datetime.utcnow() - cached.fetched_at).total_seconds()
-            if age < self.cache_ttl_seconds:
-                logging.debug("price cache hit: %s (age=%ds)", symbol, age)
-                return cached
-        
-        # API 조회
-        def _do_fetch() -> Optional[PriceInfo]:
-            # 1. 토큰 검색
-            coin_info = self._search_coingecko(symbol)
-            if not coin_info:
-                logging.info("token not found on coingecko: %s", symbol)
-                return None
-            
-            coin_id = coin_info["id"]
-            
-            # 2. 가격 조회
-            price = self._get_price(coin_id)
-            if price is None:
-                logging.info("price not available: %s (id=%s)", symbol, coin_id)
+        if use_cache:
+            state, entry = self.cache.lookup(symbol)
+            if state == FRESH:
+                logging.debug("price cache hit: %s", symbol)
+                return PriceInfo.from_cached(entry)
+            if state == NEGATIVE:
+                logging.debug("price negative cache hit: %s", symbol)
                 return None
-            
-            # 3. CoinGecko URL 생성
-            coingecko_url = f"https://www.coingecko.com/en/coins/{coin_id}"
-            
-            price_info = PriceInfo(
-                symbol=symbol,
-                price_usd=price,
-                coingecko_url=coingecko_url
-            )
-            
-            # 캐시 저장
-            self.cache[symbol] = price_info
-            
-            logging.info(
-                "price fetched: %s = $%.4f (url=%s)",
-                symbol,
-                price,
-                coingecko_url
-            )
-            
-            return price_info
+            if state == STALE:
+                # 약간 오래된 가격은 바로 쓰고 갱신은 백그라운드로
+                logging.debug("price cache stale, refreshing in background: %s", symbol)
+                self._refresh(symbol, pins)
+                return PriceInfo.from_cached(entry)
         
         try:
-            return run_with_retries(_do_fetch, attempts=2, base_delay_s=1.0)
-        except Exception:
-            logging.exception("fetch_price failed: %s", symbol)
+            return await asyncio.shield(self._refresh(symbol, pins))
+        except Exception as e:
+            logging.warning("fetch_price failed: %s (%s)", symbol, e)
+            return None
+    
+    def _refresh(self, symbol: str, pins: Optional[Dict[str, str]] = None) -> asyncio.Task:
+        task = self._inflight.get(symbol)
+        if task is None:
+            task = asyncio.create_task(self._fetch_and_store(symbol, pins))
+            self._inflight[symbol] = task
+            task.add_done_callback(lambda t: self._on_refresh_done(symbol, t))
+        return task
+    
+    def _on_refresh_done(self, symbol: str, task: asyncio.Task) -> None:
+        self._inflight.pop(symbol, None)
+        if not task.cancelled() and task.exception() is not None:
+            # 백그라운드 갱신 실패는 여기서 기록 (대기 중인 호출자는 따로 경고)
+            logging.debug("price refresh failed: %s (%s)", symbol, task.exception())
+    
+    async def _fetch_and_store(self, symbol: str, pins: Optional[Dict[str, str]] = None) -> Optional[PriceInfo]:
+        """공급자 헤지 조회 후 캐시 저장. 미상장/가격 없음은 음성 항목으로 저장"""
+        quote = await hedged_lookup(self.providers, symbol, self.hedge_delay_s, pins)
+        if quote is None:
+            logging.info("price not found: %s (providers=%s)", symbol, ",".join(p.name for p in self.providers))
+            await self.cache.put(symbol, None)
             return None
+        logging.info("price fetched: %s = $%.6g via %s (url=%s)", symbol, quote.price_usd, quote.provider, quote.url)
+        await self.cache.put(symbol, quote.price_usd, quote.url)
+        return PriceInfo(symbol, quote.price_usd, quote.url, quote.provider)
     
     def calculate_value(self, reward_str: str, price_info: Optional[PriceInfo]) -> Optional[float]:
         """보상 문자열에서 총 가치 계산
@@ -0,0 +1,271 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence
+
+import httpx
+
+from utils.http_clients import get_async_client
+from utils.metrics import metrics
+from utils.retry_utils import HttpStatusError, parse_retry_after, run_with_retries
+
+
+@dataclass
+class ProviderQuote:
+    """한 공급자가 돌려준 가격"""
+    provider: str
+    price_usd: float
+    url: str
+    ref_id: str  # 공급자 내부 식별자 (coin id, 거래쌍 등)
+
+
+_KEEPALIVE_S = 60.0
+
+
+def _raise_for_status(r: httpx.Response, provider: str, what: str) -> None:
+    if r.status_code == 200:
+        return
+    logging.warning("%s %s failed: http=%s", provider, what, r.status_code)
+    raise HttpStatusError(
+        provider,
+        r.status_code,
+        retry_after=parse_retry_after(r.headers.get("retry-after")),
+    )
+
+
+class PriceProvider:
+    """가격 공급자 기본 클래스
+
+    lookup() 은 신뢰할 만한 가격(심볼 정확 일치 등)만 돌려주고, 없으면 None.
+    base_url 을 바꾸면 로컬 대역 서버로 테스트할 수 있다.
+    """
+
+    name = "base"
+    default_base_url = ""
+    ping_path = ""
+
+    def __init__(self, base_url: Optional[str] = None, timeout_s: float = 10.0):
+        self.base_url = (base_url or self.default_base_url).rstrip("/")
+        self.timeout_s = timeout_s
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        # 상장 직전 체크 간격(15~30초)보다 길게 유휴 커넥션을 유지
+        return get_async_client(self.name, limits=httpx.Limits(keepalive_expiry=_KEEPALIVE_S))
+
+    async def _lookup(self, symbol: str) -> Optional[ProviderQuote]:
+        raise NotImplementedError
+
+    async def _quote_ref(self, symbol: str, ref: str) -> Optional[ProviderQuote]:
+        """미리 고정한 ref 로 가격만 조회 (기본: 전체 조회)"""
+        return await self._lookup(symbol)
+
+    async def resolve(self, symbol: str) -> Optional[str]:
+        """심볼 → 공급자 ref 를 미리 확정. 고정할 것이 없으면 None"""
+        return None
+
+    async def lookup(self, symbol: str, ref: Optional[str] = None) -> Optional[ProviderQuote]:
+        if ref:
+            func = lambda: self._quote_ref(symbol, ref)  # noqa: E731
+        else:
+            func = lambda: self._lookup(symbol)  # noqa: E731
+        return await run_with_retries(func, upstream=self.name, attempts=2, base_delay_s=1.0)
+
+    async def ping(self) -> None:
+        """커넥션/TLS 세션을 미리 열어 두기 위한 가벼운 요청 (응답 코드는 무시)"""
+        await self.client.get(f"{self.base_url}{self.ping_path}", timeout=self.timeout_s)
+
+
+class CoinGeckoProvider(PriceProvider):
+    name = "coingecko"
+    default_base_url = "https://api.coingecko.com/api/v3"
+    ping_path = "/ping"
+
+    async def search(self, symbol: str) -> Optional[Dict]:
+        """심볼이 정확히 일치하는 첫 코인 (검색 결과는 시가총액 순)"""
+        r = await self.client.get(f"{self.base_url}/search", params={"query": symbol}, timeout=self.timeout_s)
+        _raise_for_status(r, self.name, "search")
+        for coin in r.json().get("coins", []):
+            if coin.get("symbol", "").lower() == symbol.lower():
+                return {"id": coin.get("id"), "symbol": coin.get("symbol"), "name": coin.get("name")}
+        return None
+
+    async def price(self, coin_id: str) -> Optional[float]:
+        r = await self.client.get(
+            f"{self.base_url}/simple/price",
+            params={"ids": coin_id, "vs_currencies": "usd"},
+            timeout=self.timeout_s,
+        )
+        _raise_for_status(r, self.name, "price")
+        price = r.json().get(coin_id, {}).get("usd")
+        return float(price) if price else None
+
+    async def _quote_ref(self, symbol: str, ref: str) -> Optional[ProviderQuote]:
+        price = await self.price(ref)
+        if price is None:
+            return None
+        return ProviderQuote(self.name, price, f"https://www.coingecko.com/en/coins/{ref}", ref)
+
+    async def _lookup(self, symbol: str) -> Optional[ProviderQuote]:
+        coin = await self.search(symbol)
+        if not coin or not coin.get("id"):
+            return None
+        return await self._quote_ref(symbol, coin["id"])
+
+    async def resolve(self, symbol: str) -> Optional[str]:
+        coin = await run_with_retries(lambda: self.search(symbol), upstream=self.name, attempts=2, base_delay_s=1.0)
+        return coin.get("id") if coin else None
+
+
+class BinanceProvider(PriceProvider):
+    """거래소 현물 티커 (SYMBOL + USDT)"""
+
+    name = "binance"
+    default_base_url = "https://api.binance.com"
+    ping_path = "/api/v3/ping"
+    quote_asset = "USDT"
+
+    async def _lookup(self, symbol: str) -> Optional[ProviderQuote]:
+        pair = f"{symbol.upper()}{self.quote_asset}"
+        r = await self.client.get(
+            f"{self.base_url}/api/v3/ticker/price",
+            params={"symbol": pair},
+            timeout=self.timeout_s,
+        )
+        if r.status_code == 400:
+            # 존재하지 않는 거래쌍
+            return None
+        _raise_for_status(r, self.name, "ticker")
+        price = r.json().get("price")
+        if not price or float(price) <= 0:
+            return None
+        url = f"https://www.binance.com/en/trade/{symbol.upper()}_{self.quote_asset}"
+        return ProviderQuote(self.name, float(price), url, pair)
+
+
+class DexScreenerProvider(PriceProvider):
+    """DEX 집계기: 심볼 정확 일치 + 최소 유동성 이상인 거래쌍 중 유동성 최대"""
+
+    name = "dexscreener"
+    default_base_url = "https://api.dexscreener.com"
+
+    def __init__(self, base_url: Optional[str] = None, timeout_s: float = 10.0, min_liquidity_usd: float = 50_000.0):
+        super().__init__(base_url, timeout_s)
+        self.min_liquidity_usd = min_liquidity_usd
+
+    def _best_pair(self, pairs: List[Dict], symbol: str) -> Optional[Dict]:
+        best = None
+        best_liq = 0.0
+        for pair in pairs:
+            base = pair.get("baseToken") or {}
+            if (base.get("symbol") or "").lower() != symbol.lower():
+                continue
+            liq = float((pair.get("liquidity") or {}).get("usd") or 0)
+            if liq < self.min_liquidity_usd or not pair.get("priceUsd"):
+                continue
+            if liq > best_liq:
+                best, best_liq = pair, liq
+        return best
+
+    def _quote(self, pair: Dict) -> ProviderQuote:
+        ref = f"{pair.get('chainId')}/{pair.get('pairAddress')}"
+        return ProviderQuote(self.name, float(pair["priceUsd"]), pair.get("url") or "", ref)
+
+    async def _search(self, symbol: str) -> Optional[Dict]:
+        r = await self.client.get(f"{self.base_url}/latest/dex/search", params={"q": symbol}, timeout=self.timeout_s)
+        _raise_for_status(r, self.name, "search")
+        return self._best_pair(r.json().get("pairs") or [], symbol)
+
+    async def _lookup(self, symbol: str) -> Optional[ProviderQuote]:
+        pair = await self._search(symbol)
+        return self._quote(pair) if pair else None
+
+    async def _quote_ref(self, symbol: str, ref: str) -> Optional[ProviderQuote]:
+        r = await self.client.get(f"{self.base_url}/latest/dex/pairs/{ref}", timeout=self.timeout_s)
+        _raise_for_status(r, self.name, "pair")
+        pair = self._best_pair(r.json().get("pairs") or [], symbol)
+        return self._quote(pair) if pair else None
+
+    async def resolve(self, symbol: str) -> Optional[str]:
+        pair = await run_with_retries(lambda: self._search(symbol), upstream=self.name, attempts=2, base_delay_s=1.0)
+        return self._quote(pair).ref_id if pair else None
+
+
+PROVIDER_TYPES = {p.name: p for p in (CoinGeckoProvider, BinanceProvider, DexScreenerProvider)}
+
+
+def build_providers(
+    names: Sequence[str],
+    base_urls: Optional[Dict[str, Optional[str]]] = None,
+    timeout_s: float = 10.0,
+) -> List[PriceProvider]:
+    providers: List[PriceProvider] = []
+    for name in names:
+        cls = PROVIDER_TYPES.get(name)
+        if cls is None:
+            logging.warning("unknown price provider ignored: %s", name)
+            continue
+        providers.append(cls(base_url=(base_urls or {}).get(name), timeout_s=timeout_s))
+    return providers
+
+
+async def _timed_lookup(provider: PriceProvider, symbol: str, ref: Optional[str] = None) -> Optional[ProviderQuote]:
+    t0 = time.perf_counter()
+    try:
+        quote = await provider.lookup(symbol, ref)
+    except asyncio.CancelledError:
+        metrics.inc(f"price.cancelled[{provider.name}]")
+        raise
+    except Exception as e:
+        metrics.inc(f"price.error[{provider.name}]")
+        logging.debug("price provider failed: %s %s (%s)", provider.name, symbol, e)
+        raise
+    metrics.observe(f"price.latency_s[{provider.name}]", time.perf_counter() - t0)
+    metrics.inc(f"price.{'hit' if quote else 'miss'}[{provider.name}]")
+    return quote
+
+
+async def hedged_lookup(
+    providers: Sequence[PriceProvider],
+    symbol: str,
+    hedge_delay_s: float = 0.3,
+    pins: Optional[Dict[str, str]] = None,
+) -> Optional[ProviderQuote]:
+    """공급자를 우선순위 순서로 hedge_delay_s 간격을 두고 병렬 조회, 첫 가격 사용
+
+    앞선 공급자가 결과 없이 끝나면 다음 공급자를 바로 시작한다. 가격을 준 공급자가
+    없을 때, 하나라도 오류였다면 나머지가 "결과 없음"이어도 마지막 오류를 전파한다
+    (오류 난 공급자에는 가격이 있을 수 있으므로 음성 캐시하지 않는다). 모든 공급자가
+    오류 없이 결과 없음일 때만 None 을 돌려준다.
+    pins 에 공급자별 ref 가 있으면 검색 없이 가격만 조회한다.
+    """
+    pending: set = set()
+    queue = list(providers)
+    last_error: Optional[BaseException] = None
+    try:
+        while queue or pending:
+            if queue:
+                ref = (pins or {}).get(queue[0].name)
+                task = asyncio.create_task(_timed_lookup(queue[0], symbol, ref))
+                task.provider = queue.pop(0).name  # type: ignore[attr-defined]
+                pending.add(task)
+            timeout = hedge_delay_s if queue else None
+            done, pending = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is not None:
+                    last_error = task.exception()
+                    continue
+                quote = task.result()
+                if quote is not None:
+                    metrics.inc(f"price.win[{quote.provider}]")
+                    return quote
+    finally:
+        for task in pending:
+            task.cancel()
+    if last_error is not None:
+        # 일부 공급자의 "결과 없음"만으로는 없는 토큰이라고 단정할 수 없다
+        raise last_error
+    return None
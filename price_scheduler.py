@@ -1,13 +1,18 @@
 from __future__ import annotations
 
 import asyncio
+import json
 import logging
-from typing import Optional
+import sqlite3
+import threading
+import time
+from typing import Awaitable, Callable, Dict, List, Optional, Set
 from datetime import datetime, timedelta
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 
 from price_fetcher import PriceFetcher, PriceInfo
-import httpx
+from bot_sender import update_message_text
+from utils.metrics import metrics
 
 
 @dataclass
@@ -25,16 +30,125 @@ class ScheduledPriceCheck:
     price_found: bool = False
     check_count: int = 0
     last_check: Optional[datetime] = None
+    next_check_at: Optional[datetime] = None
+    
+    # 예약 시점에 미리 확정한 공급자별 ref (coingecko coin id 등)
+    pins: Dict[str, str] = field(default_factory=dict)
+    revalidated: bool = False
+    has_photo: bool = False  # 사진 알림이면 캡션을 수정
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS scheduled_checks (
+    message_id INTEGER PRIMARY KEY,
+    payload TEXT NOT NULL,
+    updated_at REAL NOT NULL
+);
+"""
+
+
+class ScheduledCheckStore:
+    """예약된 가격 체크 저장소 (SQLite WAL)
+
+    재시작하거나 대기 인스턴스가 승격될 때 예약을 그대로 이어받는다.
+    봇 토큰은 저장하지 않고 복원 시 현재 설정 값을 쓴다.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=5.0)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        self._lock = threading.Lock()
+
+    def _read_all(self) -> list:
+        with self._lock:
+            return self._conn.execute("SELECT payload FROM scheduled_checks").fetchall()
+
+    async def load_all(self, bot_token: str) -> List[ScheduledPriceCheck]:
+        tasks = []
+        for (payload,) in await asyncio.to_thread(self._read_all):
+            try:
+                d = json.loads(payload)
+                tasks.append(ScheduledPriceCheck(
+                    token_symbol=d["token_symbol"],
+                    listing_time=datetime.fromisoformat(d["listing_time"]),
+                    bot_token=bot_token,
+                    chat_id=d["chat_id"],
+                    message_id=d["message_id"],
+                    reward_str=d["reward_str"],
+                    current_html=d["current_html"],
+                    pins=d.get("pins") or {},
+                    has_photo=bool(d.get("has_photo")),
+                ))
+            except (ValueError, KeyError, TypeError):
+                logging.warning("skipping unreadable scheduled check: %.80s", payload)
+        return tasks
+
+    def _write(self, task: ScheduledPriceCheck) -> None:
+        payload = json.dumps({
+            "token_symbol": task.token_symbol,
+            "listing_time": task.listing_time.isoformat(),
+            "chat_id": task.chat_id,
+            "message_id": task.message_id,
+            "reward_str": task.reward_str,
+            "current_html": task.current_html,
+            "pins": task.pins,
+            "has_photo": task.has_photo,
+        }, ensure_ascii=False)
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO scheduled_checks(message_id, payload, updated_at) VALUES(?, ?, ?) "
+                "ON CONFLICT(message_id) DO UPDATE SET payload=excluded.payload, updated_at=excluded.updated_at",
+                (task.message_id, payload, time.time()),
+            )
+
+    def _delete(self, message_id: int) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM scheduled_checks WHERE message_id=?", (message_id,))
+
+    async def save(self, task: ScheduledPriceCheck) -> None:
+        try:
+            await asyncio.to_thread(self._write, task)
+        except sqlite3.Error:
+            logging.warning("scheduled check store write failed: %s", self.path)
+
+    async def delete(self, message_id: int) -> None:
+        try:
+            await asyncio.to_thread(self._delete, message_id)
+        except sqlite3.Error:
+            logging.warning("scheduled check store delete failed: %s", self.path)
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+# 체크 구간 시작 이 시간 전에 ref 를 재확인
+REVALIDATE_LEAD = timedelta(minutes=2)
+# 체크 구간 시작 이 시간 전부터 공급자 커넥션 유지
+WARM_LEAD = timedelta(minutes=3)
 
 
 class PriceScheduler:
     """상장 전후 가격 모니터링 스케줄러"""
     
-    def __init__(self, price_fetcher: PriceFetcher, http_timeout_s: int = 10):
+    def __init__(
+        self,
+        price_fetcher: PriceFetcher,
+        http_timeout_s: int = 10,
+        updater: Optional[Callable[..., Awaitable[bool]]] = None,
+        store: Optional[ScheduledCheckStore] = None,
+    ):
         self.fetcher = price_fetcher
         self.http_timeout_s = http_timeout_s
+        # 메시지 수정 함수 (감독 모드 워커는 감독 프로세스의 단일 발송 창구를 쓴다)
+        self.updater = updater or update_message_text
+        self.store = store
         self.tasks: dict[int, ScheduledPriceCheck] = {}  # message_id -> task
         self.running = False
+        self._background: Set[asyncio.Task] = set()
     
     def schedule(
         self,
@@ -45,6 +159,7 @@ class PriceScheduler:
         message_id: int,
         reward_str: str,
         current_html: str,
+        has_photo: bool = False,
     ) -> bool:
         """상장 시간 기준으로 가격 체크 스케줄링"""
         
@@ -68,9 +183,12 @@ class PriceScheduler:
             message_id=message_id,
             reward_str=reward_str,
             current_html=current_html,
+            has_photo=has_photo,
         )
         
         self.tasks[message_id] = task
+        if self.store:
+            self._spawn(self.store.save(task))
         
         logging.info(
             "scheduled price check: token=%s listing=%s msg_id=%s",
@@ -79,8 +197,57 @@ class PriceScheduler:
             message_id,
         )
         
+        # 검색(심볼 → coin id 등)은 지금 끝내 두고, 상장 시점에는 가격 요청만 보낸다
+        self._spawn(self._pin(task))
+        
         return True
     
+    def _spawn(self, coro) -> None:
+        try:
+            bg = asyncio.get_running_loop().create_task(coro)
+        except RuntimeError:
+            coro.close()
+            return
+        self._background.add(bg)
+        bg.add_done_callback(self._background.discard)
+    
+    async def _pin(self, task: ScheduledPriceCheck) -> None:
+        try:
+            pins = await self.fetcher.resolve_pins(task.token_symbol)
+        except Exception:
+            logging.exception("price pin failed: token=%s", task.token_symbol)
+            return
+        task.pins.update(pins)
+        logging.info("price refs pinned: token=%s pins=%s", task.token_symbol, pins or "none")
+        if self.store and task.message_id in self.tasks:
+            await self.store.save(task)
+    
+    async def restore(self, bot_token: str) -> int:
+        """저장소의 예약을 불러와 이어서 모니터링. 복원한 개수 반환"""
+        if not self.store:
+            return 0
+        restored = 0
+        now = datetime.utcnow()
+        for task in await self.store.load_all(bot_token):
+            if now > task.listing_time + timedelta(minutes=5):
+                await self.store.delete(task.message_id)
+                continue
+            if task.message_id not in self.tasks:
+                self.tasks[task.message_id] = task
+                restored += 1
+        if restored:
+            logging.info("restored %d scheduled price checks from %s", restored, self.store.path)
+        return restored
+    
+    def _remove(self, message_id: int) -> None:
+        self.tasks.pop(message_id, None)
+        if self.store:
+            self._spawn(self.store.delete(message_id))
+    
+    def cancel(self, message_id: int) -> None:
+        """예약된 가격 체크 취소 (알림이 다른 내용으로 수정된 경우 등)"""
+        self._remove(message_id)
+    
     def _parse_listing_time(self, time_str: str) -> Optional[datetime]:
         """KST 시간 문자열을 UTC datetime으로 변환
         
@@ -119,8 +286,8 @@ class PriceScheduler:
         task.check_count += 1
         task.last_check = datetime.utcnow()
         
-        # 가격 조회 (캐시 사용 안 함)
-        price_info = self.fetcher.fetch_price(task.token_symbol, use_cache=False)
+        # 가격 조회 (캐시 사용 안 함, 고정된 ref 로 검색 생략)
+        price_info = await self.fetcher.fetch_price(task.token_symbol, use_cache=False, pins=task.pins)
         
         if not price_info:
             logging.debug(
@@ -132,6 +299,9 @@ class PriceScheduler:
         
         # 가격 발견!
         task.price_found = True
+        since_listing = (task.last_check - task.listing_time).total_seconds()
+        metrics.observe("price.time_to_first_price_s", since_listing)
+        metrics.inc(f"price.first_price_provider[{price_info.provider}]")
         
         # 총 가치 계산
         total_value = self.fetcher.calculate_value(task.reward_str, price_info)
@@ -144,12 +314,13 @@ class PriceScheduler:
         )
         
         # 메시지 수정
-        success = update_message_text(
+        success = await self.updater(
             task.bot_token,
             task.chat_id,
             task.message_id,
             new_html,
             self.http_timeout_s,
+            caption=task.has_photo,
         )
         
         if success:
@@ -211,9 +382,17 @@ class PriceScheduler:
         # 종료 시간: 상장 후 5분
         end_time = task.listing_time + timedelta(minutes=5)
         
-        # 아직 시작 전이면 대기
+        # 아직 시작 전이면 대기 (루프를 막지 않도록 여기서 sleep 하지 않는다)
         if now < start_time:
-            wait_seconds = (start_time - now).total_seconds()
+            lead = start_time - now
+            wait_seconds = lead.total_seconds()
+            
+            if lead <= REVALIDATE_LEAD and not task.revalidated:
+                # 예약 이후 새로 생긴 코인/거래쌍을 반영
+                task.revalidated = True
+                self._spawn(self._pin(task))
+            if lead <= WARM_LEAD:
+                self._spawn(self.fetcher.warm())
             
             # 10분 이상 남았으면 로그를 5분마다만 출력
             # 10분 이내면 1분마다 출력
@@ -232,9 +411,6 @@ class PriceScheduler:
                     wait_seconds / 60,
                 )
                 task._last_wait_log = now
-            
-            # 실제 대기는 최대 1분씩
-            await asyncio.sleep(min(wait_seconds, 60))
             return
         
         # 종료 시간 지났으면 제거
@@ -243,12 +419,15 @@ class PriceScheduler:
                 "price check ended: token=%s (not found)",
                 task.token_symbol,
             )
-            del self.tasks[message_id]
+            self._remove(message_id)
             return
         
         # 이미 가격 찾았으면 제거
         if task.price_found:
-            del self.tasks[message_id]
+            self._remove(message_id)
+            return
+        
+        if task.next_check_at and now < task.next_check_at:
             return
         
         # 가격 체크
@@ -257,12 +436,12 @@ class PriceScheduler:
         except Exception:
             logging.exception("price check error: msg_id=%s", message_id)
         
-        # 다음 체크까지 대기
+        # 다음 체크 시각
         # 상장 전: 15초, 상장 후: 30초 (API 부담 줄이기)
         if now < task.listing_time:
-            await asyncio.sleep(15)
+            task.next_check_at = now + timedelta(seconds=15)
         else:
-            await asyncio.sleep(30)
+            task.next_check_at = now + timedelta(seconds=30)
     
     async def run(self) -> None:
         """스케줄러 메인 루프"""
@@ -277,9 +456,9 @@ class PriceScheduler:
                 for msg_id in message_ids:
                     await self._monitor_task(msg_id)
                 
-                # 태스크 없으면 길게 대기
+                # 태스크 없으면 길게 대기 (새 예약은 다음 주기에 반영)
                 if not self.tasks:
-                    await asyncio.sleep(30)
+                    await asyncio.sleep(5)
                 else:
                     await asyncio.sleep(1)
                     
@@ -291,4 +470,6 @@ class PriceScheduler:
     
     def stop(self) -> None:
         """스케줄러 중지"""
-        self.running = False
\ No newline at end of file
+        self.running = False
+        for bg in list(self._background):
+            bg.cancel()
\ No newline at end of file
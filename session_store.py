@@ -0,0 +1,119 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import time
+from typing import Optional, Union
+
+from telethon.sessions import SQLiteSession, StringSession
+
+
+BACKEND_SQLITE = "sqlite"  # Telethon 기본 (롤백 저널, 매 save 마다 commit)
+BACKEND_SQLITE_WAL = "sqlite-wal"
+BACKEND_MEMORY = "memory"
+BACKENDS = (BACKEND_SQLITE, BACKEND_SQLITE_WAL, BACKEND_MEMORY)
+
+
+class WalSQLiteSession(SQLiteSession):
+    """WAL 모드 + 묶음 commit 세션
+
+    synchronous=NORMAL 이라 commit 이 fsync 를 기다리지 않고, save() 는
+    commit_interval_s 에 한 번만 실제로 commit 한다. 로그인 키/DC 가 바뀐
+    직후의 save() 는 바로 commit 해 인증 정보는 잃지 않는다.
+    """
+
+    def __init__(self, session_id: str, commit_interval_s: float = 30.0):
+        # 부모 __init__ 에서 _cursor()/save() 가 호출되므로 먼저 설정
+        self.commit_interval_s = commit_interval_s
+        self._last_commit = time.monotonic()
+        self._force_commit = False
+        super().__init__(session_id)
+
+    def _cursor(self):
+        if self._conn is None:
+            cursor = super()._cursor()
+            cursor.execute("PRAGMA journal_mode=WAL")
+            cursor.execute("PRAGMA synchronous=NORMAL")
+            return cursor
+        return super()._cursor()
+
+    def _update_session_table(self):
+        super()._update_session_table()
+        self._force_commit = True
+
+    def save(self):
+        if self._conn is None:
+            return
+        now = time.monotonic()
+        if self._force_commit or now - self._last_commit >= self.commit_interval_s:
+            self._conn.commit()
+            self._last_commit = now
+            self._force_commit = False
+
+
+def _write_private(path: str, data: str) -> None:
+    tmp = f"{path}.tmp"
+    fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+class SnapshotStringSession(StringSession):
+    """메모리 세션 + 주기적 비동기 스냅샷
+
+    디스크에는 DC/인증 키 문자열만 남긴다(엔티티/업데이트 상태는 메모리).
+    재시작 후 놓친 메시지는 catch-up 이, 소스 채팅 접근 정보는 소스 캐시가 보완한다.
+    """
+
+    def __init__(self, path: str, legacy_sqlite: Optional[str] = None):
+        string = None
+        from_file = os.path.exists(path)
+        if from_file:
+            with open(path, "r", encoding="utf-8") as f:
+                string = f.read().strip() or None
+        elif legacy_sqlite and os.path.exists(legacy_sqlite):
+            # 기존 SQLite 세션에서 로그인 정보를 옮겨 재인증을 피한다
+            legacy = SQLiteSession(legacy_sqlite)
+            string = StringSession.save(legacy) or None
+            legacy.close()
+            if string:
+                logging.info("session migrated from %s to %s", legacy_sqlite, path)
+        super().__init__(string)
+        self.path = path
+        # 이관한 세션은 첫 snapshot() 에서 바로 파일로 남긴다
+        self._snapshot = (string or "") if from_file else ""
+
+    async def snapshot(self) -> bool:
+        """바뀐 내용이 있으면 파일로 기록. 기록했으면 True"""
+        current = StringSession.save(self)
+        if not current or current == self._snapshot:
+            return False
+        try:
+            await asyncio.to_thread(_write_private, self.path, current)
+        except OSError:
+            logging.exception("failed to write session snapshot: %s", self.path)
+            return False
+        self._snapshot = current
+        return True
+
+    async def run_snapshots(self, interval_s: float = 60.0) -> None:
+        while True:
+            await asyncio.sleep(interval_s)
+            await self.snapshot()
+
+
+def build_session(
+    backend: str,
+    session_name: str,
+    commit_interval_s: float = 30.0,
+) -> Union[str, SQLiteSession, SnapshotStringSession]:
+    """TelegramClient 에 넘길 세션 객체 생성"""
+    if backend == BACKEND_SQLITE_WAL:
+        return WalSQLiteSession(session_name, commit_interval_s)
+    if backend == BACKEND_MEMORY:
+        return SnapshotStringSession(f"{session_name}.string", legacy_sqlite=f"{session_name}.session")
+    if backend != BACKEND_SQLITE:
+        logging.warning("unknown SESSION_BACKEND=%s, using %s", backend, BACKEND_SQLITE)
+    return session_name
@@ -0,0 +1,288 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import os
+import time
+from dataclasses import asdict, dataclass, replace
+from typing import Dict, FrozenSet, Iterable, List, Optional, Tuple
+
+from telethon import utils as tl_utils
+from telethon.errors import FloodWaitError
+from telethon.tl.functions.channels import GetFullChannelRequest, JoinChannelRequest
+from telethon.tl.types import InputPeerChannel
+
+from client_pool import ClientPool, PooledAccount
+
+
+@dataclass(frozen=True)
+class ChatMeta:
+    """핫패스에서 쓰는 소스 채팅 메타데이터 (엔티티 조회 없이 사용)"""
+    chat_id: int  # -100... 형태의 marked id
+    username: Optional[str]
+    title: Optional[str]
+    broadcast: bool
+    megagroup: bool
+    source: str  # SOURCE_CHANNELS 의 원래 항목
+    linked_from: Optional[int] = None  # 토론방이면 원 채널의 chat_id
+    access_hash: Optional[int] = None
+
+    @property
+    def label(self) -> str:
+        return self.username or str(self.chat_id)
+
+    def input_peer(self) -> object:
+        """캐시된 access_hash 로 만든 InputPeer (없으면 marked id 그대로)"""
+        if self.access_hash is not None:
+            real_id, _ = tl_utils.resolve_id(self.chat_id)
+            return InputPeerChannel(real_id, self.access_hash)
+        return self.chat_id
+
+
+def chat_meta_from_entity(ent: object, source: str, linked_from: Optional[int] = None) -> ChatMeta:
+    return ChatMeta(
+        chat_id=tl_utils.get_peer_id(ent),
+        username=getattr(ent, "username", None),
+        title=getattr(ent, "title", None),
+        broadcast=bool(getattr(ent, "broadcast", False)),
+        megagroup=bool(getattr(ent, "megagroup", False)),
+        source=source,
+        linked_from=linked_from,
+        access_hash=getattr(ent, "access_hash", None),
+    )
+
+
+class SourceRegistry:
+    """해석이 끝난 소스 채팅 목록
+
+    ids 는 frozenset 이고 meta 는 id → ChatMeta 사전이다. 갱신 시에는 새 객체를
+    만들어 통째로 교체하므로 읽는 쪽은 잠금 없이 O(1) 조회만 하면 된다.
+    """
+
+    def __init__(self) -> None:
+        self.ids: FrozenSet[int] = frozenset()
+        self.meta: Dict[int, ChatMeta] = {}
+
+    def replace(self, metas: Iterable[ChatMeta]) -> None:
+        meta = {m.chat_id: m for m in metas}
+        self.meta = meta
+        self.ids = frozenset(meta)
+
+    def add(self, metas: Iterable[ChatMeta]) -> None:
+        merged = dict(self.meta)
+        merged.update({m.chat_id: m for m in metas})
+        self.meta = merged
+        self.ids = frozenset(merged)
+
+    def get(self, chat_id: Optional[int]) -> Optional[ChatMeta]:
+        if chat_id is None:
+            return None
+        return self.meta.get(chat_id)
+
+    def accepts(self, chat_id: Optional[int]) -> bool:
+        """이벤트 필터용: 등록된 소스가 없으면 전부 통과 (handle_message 에서 재검사)"""
+        return not self.ids or chat_id in self.ids
+
+    def __contains__(self, chat_id: object) -> bool:
+        return chat_id in self.ids
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+
+class SourceCache:
+    """소스 해석 결과(id, access_hash, 토론방 id)를 JSON 파일로 보관
+
+    형식: {"<source>": {"resolved_at": ts, "chats": [ChatMeta, ...]}}
+    """
+
+    def __init__(self, path: str, ttl_seconds: float):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.entries: Dict[str, dict] = {}
+
+    def load(self) -> None:
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if isinstance(data, dict):
+                self.entries = data
+        except Exception:
+            logging.warning("source cache unreadable, ignoring: %s", self.path)
+
+    def save(self) -> None:
+        if not self.path:
+            return
+        tmp = f"{self.path}.tmp"
+        try:
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(self.entries, f, ensure_ascii=False, indent=1)
+            os.replace(tmp, self.path)
+        except Exception:
+            logging.exception("failed to write source cache: %s", self.path)
+
+    def get(self, source: str) -> Optional[List[ChatMeta]]:
+        entry = self.entries.get(source)
+        if not entry:
+            return None
+        try:
+            return [ChatMeta(**c) for c in entry.get("chats", [])]
+        except TypeError:
+            return None
+
+    def is_stale(self, source: str) -> bool:
+        entry = self.entries.get(source) or {}
+        return time.time() - float(entry.get("resolved_at", 0)) > self.ttl_seconds
+
+    def put(self, source: str, metas: List[ChatMeta]) -> None:
+        self.entries[source] = {
+            "resolved_at": time.time(),
+            "chats": [asdict(m) for m in metas],
+        }
+
+
+async def _lookup_source(acct: PooledAccount, src: object) -> Tuple[PooledAccount, object, Optional[object]]:
+    """한 계정으로 엔티티와 연결된 토론방 엔티티 조회 (access_hash 가 계정별이라 같은 계정으로)"""
+    ent = await acct.client.get_entity(src)
+    linked_ent = None
+    try:
+        full = await acct.client(GetFullChannelRequest(ent))
+        linked_id = getattr(full.full_chat, "linked_chat_id", None)
+        if linked_id:
+            # 토론방 엔티티는 GetFullChannel 응답의 chats 에 이미 들어 있음
+            linked_ent = next((c for c in getattr(full, "chats", []) if getattr(c, "id", None) == linked_id), None)
+            if linked_ent is None:
+                linked_ent = await acct.client.get_entity(linked_id)
+    except FloodWaitError:
+        raise
+    except Exception:
+        pass
+    return acct, ent, linked_ent
+
+
+async def resolve_one_source(pool: ClientPool, src: object) -> List[ChatMeta]:
+    """소스 하나를 해석 (채널 가입 + 연결된 토론방 포함)
+
+    조회는 풀에서 여유 있는 계정이 맡고, 가입은 업데이트를 받는 기본 계정만 한다.
+    숫자 id 는 그 채팅을 본 적 있는 기본 계정만 해석할 수 있다.
+    """
+    source = str(src)
+    acct, ent, linked_ent = await pool.call(
+        lambda a: _lookup_source(a, src),
+        "get_entity",
+        primary_only=isinstance(src, int),
+    )
+
+    # 채널인 경우 기본 계정이 아직 가입하지 않았을 때만 join 시도
+    # (다른 계정이 조회했으면 left 는 그 계정 기준이라 판단할 수 없으므로 시도)
+    if getattr(ent, "broadcast", False) and (getattr(ent, "left", False) or not acct.primary):
+        target = ent if acct.primary else src
+        try:
+            await pool.call(lambda a: a.client(JoinChannelRequest(target)), "join", primary_only=True)
+            logging.info("✅ joined channel: %s", getattr(ent, "username", src))
+        except Exception as join_err:
+            # 권한 문제 등
+            logging.debug("join attempt for %s: %s", src, join_err)
+
+    meta = chat_meta_from_entity(ent, source)
+    metas = [meta]
+    if linked_ent is not None:
+        metas.append(chat_meta_from_entity(linked_ent, source, linked_from=meta.chat_id))
+    if not acct.primary:
+        # 다른 계정의 access_hash 는 기본 계정(catch-up)에서 쓸 수 없다
+        metas = [replace(m, access_hash=None) for m in metas]
+
+    tname = ent.__class__.__name__
+    logging.info(
+        "resolved: type=%s username=%s id=%s title=%s broadcast=%s megagroup=%s",
+        tname,
+        meta.username,
+        meta.chat_id,
+        meta.title,
+        meta.broadcast,
+        meta.megagroup,
+    )
+    if tname.lower() == "user":
+        logging.warning(
+            "entity is a User, not a Channel/Chat. Make sure SOURCE_CHANNELS points to a channel username (@...) or -100... id"
+        )
+    return metas
+
+
+async def resolve_sources(
+    pool: ClientPool,
+    sources: Iterable[object],
+    concurrency: int,
+) -> Dict[str, List[ChatMeta]]:
+    """여러 소스를 동시성 제한 하에 병렬 해석. 실패한 소스는 결과에서 빠진다."""
+    sem = asyncio.Semaphore(max(1, concurrency))
+
+    async def _one(src: object) -> Optional[List[ChatMeta]]:
+        async with sem:
+            try:
+                return await resolve_one_source(pool, src)
+            except Exception:
+                logging.warning("failed to resolve source channel: %s", src)
+                return None
+
+    sources = list(sources)
+    results = await asyncio.gather(*(_one(src) for src in sources))
+    return {str(src): metas for src, metas in zip(sources, results) if metas}
+
+
+async def load_sources(
+    pool: ClientPool,
+    sources: Iterable[object],
+    registry: SourceRegistry,
+    cache: SourceCache,
+    concurrency: int,
+) -> Optional[asyncio.Task]:
+    """캐시 히트는 즉시 등록하고, 미스만 병렬 해석한다.
+
+    오래된 캐시 항목은 백그라운드 태스크로 갱신하며 그 태스크를 반환한다.
+    """
+    sources = list(sources)
+    cached: List[ChatMeta] = []
+    misses: List[object] = []
+    stale: List[object] = []
+    for src in sources:
+        metas = cache.get(str(src))
+        if metas:
+            cached.extend(metas)
+            if cache.is_stale(str(src)):
+                stale.append(src)
+        else:
+            misses.append(src)
+
+    fresh: Dict[str, List[ChatMeta]] = {}
+    if misses:
+        fresh = await resolve_sources(pool, misses, concurrency)
+        for source, metas in fresh.items():
+            cache.put(source, metas)
+        cache.save()
+
+    registry.replace(cached + [m for metas in fresh.values() for m in metas])
+    logging.info(
+        "resolved sources=%s (cached=%d resolved=%d failed=%d)",
+        [m.label for m in registry.meta.values()],
+        len(sources) - len(misses),
+        len(fresh),
+        len(misses) - len(fresh),
+    )
+
+    if not stale:
+        return None
+
+    async def _refresh() -> None:
+        refreshed = await resolve_sources(pool, stale, concurrency)
+        for source, metas in refreshed.items():
+            cache.put(source, metas)
+        if refreshed:
+            cache.save()
+            registry.add(m for metas in refreshed.values() for m in metas)
+            logging.info("source cache refreshed: %d/%d", len(refreshed), len(stale))
+
+    return asyncio.create_task(_refresh())
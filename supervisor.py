@@ -0,0 +1,282 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import signal
+import subprocess
+import sys
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Sequence
+
+from config import AppConfig, load_config
+from config_reload import ConfigReloader
+from ipc import encode, parse_address, start_server, unb64
+from ledger import _BoundedHashSet
+from utils.http_clients import close_all as close_http_clients
+from utils.logging_utils import setup_logging
+from utils.metrics import metrics, run_metrics_reporter
+
+
+def _weight(worker_id: int, source: str) -> int:
+    digest = hashlib.blake2b(f"{worker_id}:{source}".encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "big")
+
+
+def assign_sources(sources: Sequence[object], workers: Sequence[int]) -> Dict[int, List[object]]:
+    """랑데부(HRW) 해싱: 채널마다 가중치가 가장 큰 워커에 배정
+
+    워커가 빠지면 그 워커의 채널만 다른 워커로 옮겨지고 나머지 배정은 그대로다.
+    """
+    result: Dict[int, List[object]] = {w: [] for w in workers}
+    if not workers:
+        return result
+    for src in sources:
+        owner = max(workers, key=lambda w: _weight(w, str(src)))
+        result[owner].append(src)
+    return result
+
+
+class Supervisor:
+    """SOURCE_CHANNELS 를 N 개 워커 프로세스로 나눠 실행하는 감독 프로세스
+
+    워커마다 자기 사용자 세션(<TG_SESSION>_w<i>)으로 배정된 채널만 구독한다.
+    감독은 로컬 IPC 로 공유 서비스를 제공한다:
+    - 본문 해시 기반 교차 워커 중복 판정 (claim/release)
+    - GPT 결과 캐시 (gpt_get/gpt_put)
+    - 봇 발송/수정 단일 창구 (send/edit)
+    가격 캐시는 워커들이 같은 SQLite 공유 저장소를 쓴다.
+    IPC 연결이 끊긴 워커는 죽은 것으로 보고 채널을 재배정한 뒤, 백오프 후 재시작한다.
+    """
+
+    def __init__(self, cfg: AppConfig, script: str):
+        self.cfg = cfg
+        self.script = script
+        self.n_workers = max(1, cfg.supervisor_workers)
+        self.address = cfg.supervisor_ipc
+        self.procs: Dict[int, subprocess.Popen] = {}
+        self.restart_at: Dict[int, float] = {}
+        self.backoff: Dict[int, float] = {}
+        self.conns: Dict[int, asyncio.StreamWriter] = {}
+        self.assigned: Dict[int, List[object]] = {}
+        self._claims = _BoundedHashSet(200_000)
+        self._gpt_cache: "OrderedDict[int, dict]" = OrderedDict()
+        self._gpt_cache_size = 2048
+        self._stopping = False
+
+    # --- 워커 프로세스 관리 ---
+
+    def _spawn(self, worker_id: int) -> None:
+        cmd = [sys.executable, self.script, "--worker", str(worker_id), "--ipc", self.address]
+        if "--profile-startup" in sys.argv:
+            cmd.append("--profile-startup")
+        self.procs[worker_id] = subprocess.Popen(cmd)
+        logging.info("worker %d started: pid=%d", worker_id, self.procs[worker_id].pid)
+        metrics.inc("supervisor.worker_started")
+
+    def _check_workers(self) -> None:
+        now = time.monotonic()
+        for worker_id in range(self.n_workers):
+            proc = self.procs.get(worker_id)
+            if proc is not None and proc.poll() is not None:
+                delay = min(self.backoff.get(worker_id, 2.0) * 2, 300.0)
+                self.backoff[worker_id] = delay
+                self.restart_at[worker_id] = now + delay
+                logging.error("worker %d exited (code=%s), restarting in %.0fs", worker_id, proc.returncode, delay)
+                metrics.inc("supervisor.worker_died")
+                del self.procs[worker_id]
+            if worker_id not in self.procs and now >= self.restart_at.get(worker_id, 0.0):
+                self._spawn(worker_id)
+
+    # --- 채널 배정 ---
+
+    async def _push(self, worker_id: int, msg: Dict[str, Any]) -> None:
+        writer = self.conns.get(worker_id)
+        if writer is None:
+            return
+        try:
+            writer.write(encode(msg))
+            await writer.drain()
+        except ConnectionError:
+            logging.warning("push to worker %d failed", worker_id)
+
+    async def _rebalance(self, skip_push: Optional[int] = None) -> None:
+        alive = sorted(self.conns)
+        new = assign_sources(self.cfg.source_channels, alive)
+        for worker_id in alive:
+            if new[worker_id] != self.assigned.get(worker_id):
+                self.assigned[worker_id] = new[worker_id]
+                logging.info("worker %d assigned %d sources: %s", worker_id, len(new[worker_id]), new[worker_id])
+                if worker_id != skip_push:
+                    await self._push(worker_id, {"op": "assign", "sources": new[worker_id]})
+        for worker_id in list(self.assigned):
+            if worker_id not in self.conns:
+                del self.assigned[worker_id]
+        metrics.set_gauge("supervisor.workers_alive", len(alive))
+
+    async def _apply_reload(self, changes: Dict[str, Any]) -> None:
+        self.cfg = self.cfg.with_updates(changes)
+        if "source_channels" in changes:
+            await self._rebalance()
+        # 키워드/모델 설정은 워커가 각자 다시 읽는다
+        for proc in self.procs.values():
+            if proc.poll() is None and hasattr(signal, "SIGHUP"):
+                proc.send_signal(signal.SIGHUP)
+
+    # --- IPC 요청 처리 ---
+
+    async def _op(self, op: str, msg: Dict[str, Any]) -> Any:
+        if op == "claim":
+            h = int(msg["hash"])
+            if h in self._claims:
+                metrics.inc("supervisor.cross_worker_duplicate")
+                return False
+            self._claims.add(h)
+            return True
+        if op == "release":
+            self._claims.discard(int(msg["hash"]))
+            return True
+        if op == "gpt_get":
+            data = self._gpt_cache.get(int(msg["hash"]))
+            metrics.inc(f"supervisor.gpt_cache.{'hit' if data is not None else 'miss'}")
+            return data
+        if op == "gpt_put":
+            h = int(msg["hash"])
+            self._gpt_cache[h] = msg["data"]
+            self._gpt_cache.move_to_end(h)
+            while len(self._gpt_cache) > self._gpt_cache_size:
+                self._gpt_cache.popitem(last=False)
+            return True
+        if op == "send":
+            from bot_sender import send_html_message
+            return await send_html_message(
+                self.cfg.bot_token,
+                self.cfg.target_chat_id,
+                msg["html"],
+                self.cfg.http_timeout_seconds,
+                photo_bytes=unb64(msg.get("photo")),
+                return_message_id=True,
+            )
+        if op == "edit":
+            from bot_sender import update_message_text
+            return await update_message_text(
+                self.cfg.bot_token,
+                self.cfg.target_chat_id,
+                int(msg["message_id"]),
+                msg["html"],
+                self.cfg.http_timeout_seconds,
+                caption=bool(msg.get("caption")),
+            )
+        raise ValueError(f"unknown op: {op}")
+
+    async def _dispatch(self, writer: asyncio.StreamWriter, msg: Dict[str, Any]) -> None:
+        try:
+            result = await self._op(msg.get("op"), msg)
+            reply = {"id": msg.get("id"), "ok": True, "result": result}
+        except Exception as e:
+            logging.exception("ipc op failed: %s", msg.get("op"))
+            reply = {"id": msg.get("id"), "ok": False, "error": str(e)}
+        try:
+            writer.write(encode(reply))
+            await writer.drain()
+        except ConnectionError:
+            pass
+
+    async def _handle_conn(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        worker_id: Optional[int] = None
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                msg = json.loads(line)
+                if msg.get("op") == "hello":
+                    worker_id = int(msg["worker_id"])
+                    self.conns[worker_id] = writer
+                    self.backoff.pop(worker_id, None)
+                    await self._rebalance(skip_push=worker_id)
+                    writer.write(encode({"id": msg.get("id"), "ok": True, "result": self.assigned.get(worker_id, [])}))
+                    await writer.drain()
+                    continue
+                asyncio.create_task(self._dispatch(writer, msg))
+        except (ConnectionError, ValueError) as e:
+            logging.warning("ipc connection from worker %s failed: %s", worker_id, e)
+        finally:
+            if worker_id is not None and self.conns.get(worker_id) is writer:
+                del self.conns[worker_id]
+                logging.warning("worker %d disconnected, rebalancing", worker_id)
+                if not self._stopping:
+                    await self._rebalance()
+            writer.close()
+
+    # --- 실행 ---
+
+    def _stop(self) -> None:
+        self._stopping = True
+
+    async def run(self) -> None:
+        kind, target, _ = parse_address(self.address)
+        if kind == "unix" and os.path.exists(target):
+            os.unlink(target)
+        server = await start_server(self._handle_conn, self.address)
+        logging.info("supervisor listening on %s, workers=%d", self.address, self.n_workers)
+        metrics_task = asyncio.create_task(
+            run_metrics_reporter(self.cfg.metrics_log_interval_seconds, self.cfg.metrics_file)
+        )
+        reloader = ConfigReloader(self.cfg, self._apply_reload)
+        reloader.install(asyncio.get_running_loop())
+        reload_task = asyncio.create_task(reloader.watch())
+
+        loop = asyncio.get_running_loop()
+        for sig in (getattr(signal, "SIGTERM", None), getattr(signal, "SIGINT", None)):
+            if sig is None:
+                continue
+            try:
+                loop.add_signal_handler(sig, self._stop)
+            except (NotImplementedError, RuntimeError):
+                pass
+
+        try:
+            while not self._stopping:
+                self._check_workers()
+                await asyncio.sleep(1.0)
+        finally:
+            self._stopping = True
+            for proc in self.procs.values():
+                if proc.poll() is None:
+                    proc.terminate()
+            for proc in self.procs.values():
+                try:
+                    await asyncio.to_thread(proc.wait, 15)
+                except subprocess.TimeoutExpired:
+                    proc.kill()
+            server.close()
+            metrics_task.cancel()
+            reload_task.cancel()
+            await close_http_clients()
+            if kind == "unix" and os.path.exists(target):
+                os.unlink(target)
+
+
+async def run_supervisor() -> None:
+    """python main.py --supervisor"""
+    cfg = load_config()
+    setup_logging(cfg.log_level, cfg.log_format, cfg.log_sample_every)
+
+    from bot_sender import check_bot_access
+    from utils.retry_utils import configure_upstream
+
+    configure_upstream(
+        "telegram",
+        retry_ratio=cfg.retry_budget_ratio,
+        failure_threshold=cfg.circuit_failure_threshold,
+        reset_timeout_s=cfg.circuit_reset_seconds,
+    )
+    if cfg.bot_token and cfg.target_chat_id:
+        await check_bot_access(cfg.bot_token, cfg.target_chat_id, cfg.http_timeout_seconds)
+
+    script = os.path.join(os.path.dirname(os.path.abspath(__file__)), "main.py")
+    await Supervisor(cfg, script).run()
@@ -0,0 +1,251 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import re
+import time
+from collections import OrderedDict
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+from utils.metrics import metrics
+
+
+# 슬롯 추출 순서가 곧 우선순위: 이름(티커) → 시각 → 숫자 → 티커
+_SLOT_RE = re.compile(
+    r"(?P<name>\b[A-Z][A-Za-z0-9\-]*(?:\s[A-Z][A-Za-z0-9\-]*){0,3})\s?\((?P<paren>[A-Z0-9]{2,10})\)"
+    r"|(?P<time>\b\d{1,2}:\d{2}\b)"
+    r"|(?P<num>\d+(?:[.,]\d+)*)"
+    r"|(?P<ticker>\b[A-Z][A-Z0-9]{1,9}\b)"
+)
+
+# 출력에 남아도 되는 고정 대문자 토큰 (입력 슬롯에서 오지 않아도 됨)
+_CONSTANT_TOKENS = {"KST", "UTC", "GTD", "FCFS", "N/A"}
+
+# 열거형 필드는 그대로 저장
+_LITERAL_FIELDS = {"postType", "eventType"}
+
+_RESIDUE_RE = re.compile(r"\d|[A-Za-z]{2,}")
+_PLACEHOLDER_RE = re.compile(r"⟦(\d+)(\+9h)?⟧")
+
+
+def _skeletonize(text: str) -> Tuple[str, List[str]]:
+    """본문을 (슬롯 자리표시 골격, 슬롯 값 목록) 으로 분해"""
+    values: List[str] = []
+    parts: List[str] = []
+    pos = 0
+    norm = " ".join(text.split())
+    for m in _SLOT_RE.finditer(norm):
+        parts.append(norm[pos:m.start()])
+        if m.group("name"):
+            values.append(m.group("name"))
+            values.append(m.group("paren"))
+            parts.append("{NAME} ({TICKER})")
+        elif m.group("time"):
+            values.append(m.group("time"))
+            parts.append("{TIME}")
+        elif m.group("num"):
+            values.append(m.group("num"))
+            parts.append("{NUM}")
+        else:
+            values.append(m.group("ticker"))
+            parts.append("{TICKER}")
+        pos = m.end()
+    parts.append(norm[pos:])
+    return "".join(parts), values
+
+
+def slot_values(text: str) -> List[str]:
+    """본문의 슬롯 값(토큰명/티커/시각/숫자)만 추출 (수정된 메시지 비교용)"""
+    return _skeletonize(text)[1]
+
+
+def _skeleton_key(skeleton: str) -> str:
+    return hashlib.blake2b(skeleton.encode("utf-8"), digest_size=12).hexdigest()
+
+
+def _shift_kst(hhmm: str) -> str:
+    h, m = hhmm.split(":")
+    return f"{(int(h) + 9) % 24:02d}:{m}"
+
+
+def _derive_field(value: str, slots: List[str]) -> Optional[str]:
+    """출력 문자열의 숫자/티커/시각을 입력 슬롯 참조로 바꾼다. 깨끗이 안 되면 None"""
+    # 같은 값이 여러 슬롯에 있으면 첫 슬롯을 참조
+    mapping: Dict[str, str] = {}
+    for idx, v in enumerate(slots):
+        mapping.setdefault(v, f"⟦{idx}⟧")
+        if re.fullmatch(r"\d{1,2}:\d{2}", v):
+            mapping.setdefault(_shift_kst(v), f"⟦{idx}+9h⟧")
+    if mapping:
+        # 한 번에 치환: 긴 값을 먼저 시도해 "150" 안의 "15" 같은 부분 일치를 피한다
+        alternation = "|".join(re.escape(v) for v in sorted(mapping, key=len, reverse=True))
+        pattern = re.compile(r"(?<![A-Za-z0-9])(?:" + alternation + r")(?![A-Za-z0-9])")
+        out = pattern.sub(lambda m: mapping[m.group(0)], value)
+    else:
+        out = value
+    residue = _PLACEHOLDER_RE.sub("", out)
+    for tok in _CONSTANT_TOKENS:
+        residue = residue.replace(tok, "")
+    if _RESIDUE_RE.search(residue):
+        return None
+    return out
+
+
+def _fill_field(template: str, slots: List[str]) -> Optional[str]:
+    def _sub(m: re.Match) -> str:
+        v = slots[int(m.group(1))]
+        return _shift_kst(v) if m.group(2) else v
+    try:
+        return _PLACEHOLDER_RE.sub(_sub, template)
+    except (IndexError, ValueError):
+        return None
+
+
+@dataclass
+class Template:
+    fields: Dict[str, Any]  # 문자열 값은 슬롯 참조를 포함할 수 있음
+    slot_count: int
+    confirmations: int = 0
+    hits: int = 0
+    created_at: float = field(default_factory=time.time)
+    last_used: float = field(default_factory=time.time)
+
+
+@dataclass
+class TemplateMatch:
+    key: str
+    data: Dict[str, Any]
+    trusted: bool  # True 면 GPT 없이 사용 가능
+
+
+class TemplateCache:
+    """채널별 공지 형식 템플릿 학습 캐시
+
+    GPT 결과가 본문 슬롯(숫자/티커/시각/토큰명)으로 깨끗이 설명되면 형식 골격을
+    키로 템플릿을 저장한다. 새 템플릿은 같은 형식의 다음 메시지에서 GPT 결과와
+    일치해야 신뢰되며, 신뢰된 뒤에도 reverify_every 번째 적중마다 다시 검증한다.
+    검증 불일치 시 즉시 제거한다.
+    """
+
+    def __init__(
+        self,
+        path: Optional[str],
+        min_confirmations: int = 1,
+        reverify_every: int = 20,
+        max_per_channel: int = 20,
+    ):
+        self.path = path
+        self.min_confirmations = min_confirmations
+        self.reverify_every = max(1, reverify_every)
+        self.max_per_channel = max(1, max_per_channel)
+        self.channels: Dict[int, "OrderedDict[str, Template]"] = {}
+
+    def load(self) -> None:
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                raw = json.load(f)
+            for chat_id, items in raw.items():
+                self.channels[int(chat_id)] = OrderedDict(
+                    (k, Template(**v)) for k, v in items.items()
+                )
+        except Exception:
+            logging.warning("template cache unreadable, ignoring: %s", self.path)
+
+    def _write(self, snapshot: dict) -> None:
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(snapshot, f, ensure_ascii=False)
+        os.replace(tmp, self.path)
+
+    async def save(self) -> None:
+        if not self.path:
+            return
+        snapshot = {
+            str(chat_id): {k: asdict(t) for k, t in items.items()}
+            for chat_id, items in self.channels.items()
+        }
+        try:
+            await asyncio.to_thread(self._write, snapshot)
+        except Exception:
+            logging.exception("failed to write template cache: %s", self.path)
+
+    def _record(self, chat_id: int, hit: bool) -> None:
+        metrics.inc(f"template.{'hit' if hit else 'miss'}[{chat_id}]")
+        hits = metrics.counters.get(f"template.hit[{chat_id}]", 0.0)
+        misses = metrics.counters.get(f"template.miss[{chat_id}]", 0.0)
+        metrics.set_gauge(f"template.hit_rate[{chat_id}]", hits / ((hits + misses) or 1))
+
+    def match(self, chat_id: int, text: str) -> Optional[TemplateMatch]:
+        skeleton, slots = _skeletonize(text)
+        key = _skeleton_key(skeleton)
+        tpl = self.channels.get(chat_id, {}).get(key)
+        if tpl is None or tpl.slot_count != len(slots):
+            self._record(chat_id, False)
+            return None
+        data: Dict[str, Any] = {}
+        for name, value in tpl.fields.items():
+            if isinstance(value, str):
+                filled = _fill_field(value, slots)
+                if filled is None:
+                    self._record(chat_id, False)
+                    return None
+                data[name] = filled
+            else:
+                data[name] = value
+        trusted = tpl.confirmations >= self.min_confirmations and (tpl.hits + 1) % self.reverify_every != 0
+        if trusted:
+            tpl.hits += 1
+            tpl.last_used = time.time()
+            self.channels[chat_id].move_to_end(key)
+        self._record(chat_id, trusted)
+        return TemplateMatch(key=key, data=data, trusted=trusted)
+
+    async def observe(
+        self,
+        chat_id: int,
+        text: str,
+        gpt_data: Dict[str, Any],
+        match: Optional[TemplateMatch],
+    ) -> None:
+        """GPT 결과로 기존 템플릿을 검증하거나 새 템플릿을 학습"""
+        changed = False
+        items = self.channels.setdefault(chat_id, OrderedDict())
+        if match is not None:
+            tpl = items.get(match.key)
+            if tpl is not None:
+                if match.data == gpt_data:
+                    tpl.confirmations += 1
+                    tpl.hits += 1
+                    changed = tpl.confirmations == self.min_confirmations
+                else:
+                    logging.info("template evicted (mismatch): chat=%s key=%s", chat_id, match.key)
+                    metrics.inc("template.evicted")
+                    del items[match.key]
+                    changed = True
+        else:
+            skeleton, slots = _skeletonize(text)
+            key = _skeleton_key(skeleton)
+            fields: Dict[str, Any] = {}
+            for name, value in gpt_data.items():
+                if isinstance(value, str) and name not in _LITERAL_FIELDS:
+                    derived = _derive_field(value, slots)
+                    if derived is None:
+                        logging.debug("template not learnable: chat=%s field=%s", chat_id, name)
+                        return
+                    fields[name] = derived
+                else:
+                    fields[name] = value
+            items[key] = Template(fields=fields, slot_count=len(slots))
+            while len(items) > self.max_per_channel:
+                items.popitem(last=False)
+            metrics.inc("template.learned")
+            logging.info("template learned: chat=%s key=%s slots=%d", chat_id, key, len(slots))
+            changed = True
+        if changed:
+            await self.save()
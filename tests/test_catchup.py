@@ -0,0 +1,81 @@
+import asyncio
+import json
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+from catchup import CatchupRunner, CatchupState, LivePriority
+from source_registry import ChatMeta, SourceRegistry
+
+CHAT = -1001
+
+
+class FakeClient:
+    def __init__(self, ids):
+        self.ids = ids
+        self.connected = True
+
+    def is_connected(self):
+        return self.connected
+
+    async def iter_messages(self, peer, min_id=0, limit=None):
+        for msg_id in sorted(self.ids, reverse=True)[:limit]:
+            if msg_id > min_id:
+                yield SimpleNamespace(id=msg_id, chat_id=CHAT, date=datetime.now(timezone.utc))
+
+
+def _registry():
+    registry = SourceRegistry()
+    registry.replace([ChatMeta(CHAT, "chan", "Chan", True, False, "@chan")])
+    return registry
+
+
+def test_live_message_before_catchup_does_not_skip_gap(tmp_path):
+    path = tmp_path / "catchup.json"
+    path.write_text(json.dumps({str(CHAT): 10}))
+
+    async def scenario():
+        state = CatchupState(str(path))
+        state.load()
+        # 재시작 직후 catch-up 보다 라이브 메시지가 먼저 처리됨
+        state.mark(CHAT, 15)
+
+        handled = []
+
+        async def handler(msg):
+            handled.append(msg.id)
+
+        runner = CatchupRunner(FakeClient(range(1, 16)), _registry(), state, LivePriority(), handler)
+        await runner.run_once("startup")
+        return state, handled
+
+    state, handled = asyncio.run(scenario())
+    assert handled == [11, 12, 13, 14]
+    assert CHAT not in state.backfill_from
+    assert state.last_ids[CHAT] == 15
+
+
+def test_pending_backfill_survives_restart(tmp_path):
+    path = tmp_path / "catchup.json"
+
+    async def first_run():
+        state = CatchupState(str(path))
+        state.last_ids[CHAT] = 10
+        state.snapshot()
+        state.mark(CHAT, 15)
+        await state.flush()
+
+    asyncio.run(first_run())
+
+    state = CatchupState(str(path))
+    state.load()
+    assert state.last_ids[CHAT] == 15
+    assert state.backfill_from[CHAT] == 10
+
+
+def test_legacy_state_file_is_read(tmp_path):
+    path = tmp_path / "catchup.json"
+    path.write_text(json.dumps({str(CHAT): 7}))
+    state = CatchupState(str(path))
+    state.load()
+    assert state.last_ids == {CHAT: 7}
+    assert state.backfill_from == {CHAT: 7}
@@ -0,0 +1,92 @@
+import asyncio
+
+from digest import DigestBuffer, DigestItem
+from formatter import format_digest_html
+
+
+def _item(msg_id, title="ABC"):
+    return DigestItem(-1001, msg_id, None, {"postType": "other", "title": title}, f"https://t.me/chan/{msg_id}")
+
+
+def test_flush_after_window_keeps_arrival_order():
+    async def scenario():
+        flushed = []
+
+        async def on_flush(items):
+            flushed.append([i.msg_id for i in items])
+
+        buf = DigestBuffer(0.05, 10, on_flush)
+        buf.add(_item(3))
+        buf.add(_item(1))
+        assert buf.pending == 2
+        await asyncio.sleep(0.1)
+        pending = buf.pending
+        await buf.close()
+        return flushed, pending
+
+    assert asyncio.run(scenario()) == ([[3, 1]], 0)
+
+
+def test_flush_when_max_items_reached():
+    async def scenario():
+        flushed = []
+
+        async def on_flush(items):
+            flushed.append([i.msg_id for i in items])
+
+        buf = DigestBuffer(60, 2, on_flush)
+        for msg_id in (1, 2, 3):
+            buf.add(_item(msg_id))
+        await asyncio.sleep(0)
+        early = list(flushed)
+        await buf.close()
+        return early, flushed
+
+    early, flushed = asyncio.run(scenario())
+    assert early == [[1, 2]]
+    assert flushed == [[1, 2], [3]]
+
+
+def test_close_waits_for_in_flight_send():
+    async def scenario():
+        sent = []
+
+        async def on_flush(items):
+            await asyncio.sleep(0.05)
+            sent.extend(i.msg_id for i in items)
+
+        buf = DigestBuffer(60, 1, on_flush)
+        buf.add(_item(1))
+        await buf.close()
+        return sent
+
+    assert asyncio.run(scenario()) == [1]
+
+
+def test_flush_error_is_contained():
+    async def scenario():
+        async def on_flush(items):
+            raise RuntimeError("bot api down")
+
+        buf = DigestBuffer(60, 5, on_flush)
+        buf.add(_item(1))
+        await buf.close()
+        return buf.pending
+
+    assert asyncio.run(scenario()) == 0
+
+
+def test_format_digest_html():
+    entries = [
+        ({"postType": "pre-announcement", "title": "바이낸스 알파 ABC", "gtd_date": "2026-10-20"}, "L1"),
+        ({"postType": "pre-tge-campaign", "title": "XYZ", "commit_amount": "100 BNB"}, "L2"),
+        ({"postType": "other", "title": ""}, "L3"),
+    ]
+    assert format_digest_html(entries) == "\n".join([
+        "<b>📋 모아보기 (3건)</b>",
+        "",
+        '🔔 <b>ABC</b> [예고] · 2026-10-20 | <a href="L1">출처</a>',
+        '🚀 <b>XYZ</b> [캠페인] · 커밋 100 BNB | <a href="L2">출처</a>',
+        '• <b>N/A</b> | <a href="L3">출처</a>',
+    ])
+    assert format_digest_html([]) == ""
@@ -0,0 +1,56 @@
+import asyncio
+
+from gpt_queue import GptGate
+
+
+def test_cancelled_waiter_leaves_queue_and_frees_nothing():
+    async def scenario():
+        gate = GptGate(concurrency=1, max_queue=5, max_wait_s=60)
+        assert await gate.acquire(1.0)
+        waiter = asyncio.create_task(gate.acquire(1.0))
+        await asyncio.sleep(0)
+        assert gate.depth == 1
+        waiter.cancel()
+        await asyncio.gather(waiter, return_exceptions=True)
+        assert waiter.cancelled()
+        assert gate.depth == 0
+        gate.release()
+        return gate.active
+
+    assert asyncio.run(scenario()) == 0
+
+
+def test_waiter_cancelled_after_grant_passes_slot_on():
+    async def scenario():
+        gate = GptGate(concurrency=1, max_queue=5, max_wait_s=60)
+        assert await gate.acquire(1.0)
+        first = asyncio.create_task(gate.acquire(2.0))
+        second = asyncio.create_task(gate.acquire(1.0))
+        await asyncio.sleep(0)
+        gate.release()  # first 에 슬롯이 넘어가지만 깨어나기 전에 취소됨
+        first.cancel()
+        await asyncio.gather(first, return_exceptions=True)
+        granted = await asyncio.wait_for(second, 1)
+        return first.cancelled(), granted, gate.active, gate.depth
+
+    assert asyncio.run(scenario()) == (True, True, 1, 0)
+
+
+def test_higher_priority_waiter_is_granted_first():
+    async def scenario():
+        gate = GptGate(concurrency=1, max_queue=5, max_wait_s=60)
+        assert await gate.acquire(0.0)
+        order = []
+
+        async def wait(name, prio):
+            await gate.acquire(prio)
+            order.append(name)
+            gate.release()
+
+        tasks = [asyncio.create_task(wait("low", 0.5)), asyncio.create_task(wait("high", 3.0))]
+        await asyncio.sleep(0)
+        gate.release()
+        await asyncio.gather(*tasks)
+        return order
+
+    assert asyncio.run(scenario()) == ["high", "low"]
@@ -0,0 +1,120 @@
+import asyncio
+import time
+
+from ha_lease import HaCoordinator, ReplayBuffer, SQLiteLease
+from ledger import MessageLedger
+
+CHAT = -1001
+
+
+def _lease(tmp_path, holder, ttl_s=9.0):
+    return SQLiteLease(str(tmp_path / "lease.sqlite3"), holder, ttl_s=ttl_s)
+
+
+def test_acquire_renew_and_exclusion(tmp_path):
+    a, b = _lease(tmp_path, "a"), _lease(tmp_path, "b")
+    assert asyncio.run(a.acquire()) == (True, "a")
+    assert asyncio.run(a.acquire()) == (True, "a")  # 갱신
+    assert asyncio.run(b.acquire()) == (False, "a")
+    assert a.epoch == 1
+
+
+def test_expired_lease_is_taken_over_with_epoch_bump(tmp_path):
+    a, b = _lease(tmp_path, "a", ttl_s=0.05), _lease(tmp_path, "b", ttl_s=0.05)
+    assert asyncio.run(a.acquire())[0]
+    time.sleep(0.1)
+    assert asyncio.run(b.acquire()) == (True, "b")
+    assert b.epoch == 2
+
+
+def test_release_lets_peer_acquire_immediately(tmp_path):
+    a, b = _lease(tmp_path, "a"), _lease(tmp_path, "b")
+    asyncio.run(a.acquire())
+    asyncio.run(a.release())
+    assert asyncio.run(b.acquire()) == (True, "b")
+
+
+def test_demote_when_renewal_finds_other_holder(tmp_path):
+    lease = _lease(tmp_path, "a", ttl_s=1.5)
+    events = []
+
+    async def on_promote():
+        events.append("promote")
+
+    async def on_demote():
+        events.append("demote")
+
+    async def scenario():
+        coord = HaCoordinator(lease, on_promote, on_demote)
+        task = asyncio.create_task(coord.run())
+        await asyncio.sleep(0.1)
+        assert coord.active
+        # 다른 인스턴스가 리스를 가져감
+        lease._conn.execute("UPDATE leases SET holder='b', expires_at=?", (time.time() + 60,))
+        await asyncio.sleep(0.7)
+        task.cancel()
+        return coord.active
+
+    assert asyncio.run(scenario()) is False
+    assert events == ["promote", "demote"]
+
+
+def test_failed_promotion_releases_lease(tmp_path):
+    lease = _lease(tmp_path, "a")
+    peer = _lease(tmp_path, "b")
+    events = []
+
+    async def on_promote():
+        raise RuntimeError("restore failed")
+
+    async def on_demote():
+        events.append("demote")
+
+    async def scenario():
+        coord = HaCoordinator(lease, on_promote, on_demote)
+        task = asyncio.create_task(coord.run())
+        await asyncio.sleep(0.1)
+        task.cancel()
+        return coord.active, await peer.acquire()
+
+    active, peer_result = asyncio.run(scenario())
+    assert active is False
+    assert events == ["demote"]
+    assert peer_result == (True, "b")
+
+
+def test_promotion_retries_messages_left_processing_by_dead_active(tmp_path):
+    ledger_path = str(tmp_path / "ledger.sqlite3")
+    standby_ledger = MessageLedger(ledger_path)
+    standby_ledger.open()
+    buffer = ReplayBuffer(30)
+
+    # 활성 인스턴스가 메시지 7 을 처리하다 죽음 (원장에는 processing 으로 남음)
+    async def dead_active():
+        active_ledger = MessageLedger(ledger_path)
+        active_ledger.open()
+        await active_ledger.begin(CHAT, 7, None)
+        active_ledger.close()
+
+    asyncio.run(dead_active())
+    buffer.add((CHAT, 7))
+
+    replayed = []
+
+    async def on_promote():
+        await standby_ledger.reload()
+        for chat_id, msg_id in buffer.drain():
+            if standby_ledger.duplicate_of(chat_id, msg_id, None) is None:
+                replayed.append(msg_id)
+
+    async def on_demote():
+        pass
+
+    async def scenario():
+        coord = HaCoordinator(_lease(tmp_path, "standby"), on_promote, on_demote)
+        task = asyncio.create_task(coord.run())
+        await asyncio.sleep(0.1)
+        task.cancel()
+
+    asyncio.run(scenario())
+    assert replayed == [7]
@@ -0,0 +1,60 @@
+from utils.keyword_matcher import (
+    DEFAULT_ALLOW_WEIGHT,
+    DEFAULT_BLOCK_WEIGHT,
+    KeywordMatcher,
+    KeywordRule,
+    parse_rule,
+)
+
+
+def test_parse_rule_weight_syntax():
+    assert parse_rule("Token  Circulation Starts|1.5", "block") == KeywordRule(
+        "token circulation starts", 1.5, "block"
+    )
+    assert parse_rule("airdrop", "allow") == KeywordRule("airdrop", DEFAULT_ALLOW_WEIGHT, "allow")
+    assert parse_rule("spam", "block").weight == DEFAULT_BLOCK_WEIGHT
+    assert parse_rule("  ", "allow") is None
+
+
+def test_parse_rule_keeps_colons_in_keyword():
+    assert parse_rule("listing at 10:00", "allow") == KeywordRule("listing at 10:00", 1.0, "allow")
+    assert parse_rule("listing at 10:00|2", "allow") == KeywordRule("listing at 10:00", 2.0, "allow")
+    assert parse_rule("a|b", "allow") == KeywordRule("a|b", 1.0, "allow")
+
+
+def test_whole_word_boundaries():
+    matcher = KeywordMatcher(allow=["drop", "$abc"], whole_word=True)
+    assert matcher.classify("Airdrop live").allow_hits == []
+    assert matcher.classify("big drop, today").matched == ["drop"]
+    assert matcher.classify("drops").allow_hits == []
+    # 단어 문자가 아닌 기호로 시작하는 키워드는 앞 경계를 따지지 않는다
+    assert matcher.classify("x$abc listed").matched == ["$abc"]
+
+    loose = KeywordMatcher(allow=["drop"])
+    assert loose.classify("Airdrop live").matched == ["drop"]
+
+
+def test_phrases_match_across_whitespace_and_case():
+    matcher = KeywordMatcher(allow=["token circulation starts", "listing at 10:00"], whole_word=True)
+    result = matcher.classify("TOKEN\n circulation   Starts — listing at 10:00 UTC")
+    assert sorted(result.matched) == ["listing at 10:00", "token circulation starts"]
+
+
+def test_overlapping_keywords_and_weights():
+    matcher = KeywordMatcher(allow=["airdrop|2", "drop|0.5", "claim"])
+    result = matcher.classify("airdrop claim airdrop")
+    assert sorted(result.matched) == ["airdrop", "claim", "drop"]
+    assert result.score == 3.5  # 같은 규칙은 한 번만 센다
+
+
+def test_block_outweighs_allow_by_default():
+    matcher = KeywordMatcher(allow=["airdrop|2"], block=["scam"])
+    result = matcher.classify("airdrop scam")
+    assert result.matched == ["airdrop", "-scam"]
+    assert result.score == 2 - DEFAULT_BLOCK_WEIGHT
+
+
+def test_weighted_block_can_be_overridden_by_allow():
+    matcher = KeywordMatcher(allow=["airdrop|2"], block=["token circulation starts|1"])
+    assert matcher.classify("Token circulation starts. Airdrop inside").score == 1.0
+    assert matcher.classify("Token circulation starts").score == -1.0
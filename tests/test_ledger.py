@@ -0,0 +1,73 @@
+import asyncio
+
+from ledger import (
+    STATUS_FAILED,
+    STATUS_PROCESSING,
+    STATUS_SENT,
+    MessageLedger,
+    _BoundedHashSet,
+)
+
+CHAT = -1001
+
+
+def _write(path, rows):
+    async def scenario():
+        ledger = MessageLedger(path)
+        ledger.open()
+        for msg_id, status in rows:
+            await ledger.begin(CHAT, msg_id, None)
+            if status != STATUS_PROCESSING:
+                await ledger.finish(CHAT, msg_id, None, status, None)
+        ledger.close()
+
+    asyncio.run(scenario())
+
+
+def test_processing_rows_from_previous_process_are_retried(tmp_path):
+    path = str(tmp_path / "ledger.sqlite3")
+    _write(path, [(1, STATUS_PROCESSING), (2, STATUS_SENT), (3, STATUS_FAILED)])
+
+    ledger = MessageLedger(path)
+    ledger.open()
+    assert ledger.duplicate_of(CHAT, 1, None) is None
+    assert ledger.duplicate_of(CHAT, 2, None) == "id"
+    assert ledger.duplicate_of(CHAT, 3, None) is None
+
+
+def test_reload_retries_rows_left_processing_by_other_instance(tmp_path):
+    path = str(tmp_path / "ledger.sqlite3")
+    standby = MessageLedger(path)
+    standby.open()
+    # 대기 인스턴스가 열린 뒤 활성 인스턴스가 처리하다 죽은 행
+    _write(path, [(5, STATUS_PROCESSING), (6, STATUS_SENT)])
+
+    asyncio.run(standby.reload())
+    assert standby.duplicate_of(CHAT, 5, None) is None
+    assert standby.duplicate_of(CHAT, 6, None) == "id"
+
+
+def test_db_fallback_respects_processing_grace(tmp_path):
+    path = str(tmp_path / "ledger.sqlite3")
+    ledger = MessageLedger(path, memory_capacity=1, processing_grace_s=60.0)
+    ledger.open()
+
+    async def scenario():
+        await ledger.begin(CHAT, 1, None)
+        await ledger.begin(CHAT, 2, None)  # 1 은 메모리에서 밀려나 DB 조회로 판정
+
+    asyncio.run(scenario())
+    assert ledger.duplicate_of(CHAT, 1, None) == "id"
+
+    ledger.processing_grace_s = 0.0
+    assert ledger.duplicate_of(CHAT, 1, None) is None
+
+
+def test_bounded_hash_set_readd_after_discard_is_most_recent():
+    items = _BoundedHashSet(2)
+    items.add(1)
+    items.add(2)
+    items.discard(1)
+    items.add(1)
+    items.add(3)
+    assert 1 in items and 3 in items and 2 not in items
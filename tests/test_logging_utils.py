@@ -0,0 +1,57 @@
+import logging
+import sys
+import threading
+
+from utils import logging_utils
+from utils.logging_utils import LogSampler, _DeferredFormatQueueHandler
+
+
+class _Capture(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.records = []
+
+    def emit(self, record):
+        self.records.append((record, threading.current_thread().name))
+
+
+def test_prepare_merges_args_but_leaves_formatting_to_listener():
+    handler = _DeferredFormatQueueHandler(None)
+    payload = {"n": 1}
+    try:
+        raise ValueError("boom")
+    except ValueError:
+        record = logging.LogRecord("t", logging.ERROR, __file__, 1, "payload=%s", (payload,), sys.exc_info())
+    prepared = handler.prepare(record)
+    payload["n"] = 2  # 큐에 넣은 뒤 바뀐 값은 반영되지 않아야 함
+    assert prepared.getMessage() == "payload={'n': 1}"
+    assert prepared.args is None
+    assert prepared.exc_info is not None and prepared.exc_text is None
+    assert "ValueError: boom" in logging.Formatter().format(prepared)
+    assert record.args is payload  # 원본 레코드는 건드리지 않는다 (dict 인자 하나는 그대로 보관됨)
+
+
+def test_sampler_logs_first_and_every_nth():
+    sampler = LogSampler(every=3)
+    assert [sampler.should_log("k") for _ in range(7)] == [0, None, None, 2, None, None, 2]
+    assert sampler.should_log("other") == 0
+
+
+def test_log_sampled_appends_suppressed_count(monkeypatch):
+    monkeypatch.setattr(logging_utils, "sampler", LogSampler(every=2))
+    capture = _Capture()
+    root = logging.getLogger()
+    root.addHandler(capture)
+    old_level = root.level
+    root.setLevel(logging.INFO)
+    try:
+        for i in range(4):
+            logging_utils.log_sampled("dup:1", "dropped: duplicate | msg_id=%s", i)
+    finally:
+        root.removeHandler(capture)
+        root.setLevel(old_level)
+    assert [r.getMessage() for r, _ in capture.records] == [
+        "dropped: duplicate | msg_id=0 | suppressed=0",
+        "dropped: duplicate | msg_id=2 | suppressed=1",
+    ]
+    assert capture.records[0][0].funcName == "test_log_sampled_appends_suppressed_count"
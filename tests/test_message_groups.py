@@ -0,0 +1,105 @@
+import asyncio
+from types import SimpleNamespace
+
+from ledger import MessageLedger, SentAlert
+from main import AppContext, handle_edit
+from message_groups import AlbumCollector, changed_fields, is_relevant_edit, pick_album_caption
+from source_registry import SourceRegistry
+
+CHAT = -1001
+
+
+def _msg(msg_id, text="", grouped_id=None):
+    return SimpleNamespace(id=msg_id, chat_id=CHAT, raw_text=text, message=text, grouped_id=grouped_id, media=None)
+
+
+def test_pick_album_caption_prefers_longest_text():
+    group = [_msg(1), _msg(2, "  "), _msg(3, "$ABC listing"), _msg(4, "short")]
+    assert pick_album_caption(group).id == 3
+    assert pick_album_caption([_msg(5), _msg(6)]).id == 5
+
+
+def test_is_relevant_edit_only_on_slot_change():
+    old = "$ABC listing at 10:00 UTC, reward 500 USDT"
+    assert not is_relevant_edit(old, "$ABC listing at 10:00 UTC! Reward: 500 USDT")
+    assert is_relevant_edit(old, "$ABC listing at 11:00 UTC, reward 500 USDT")
+    assert is_relevant_edit(old, "$ABC listing at 10:00 UTC, reward 500 USDT, 500 USDT")
+
+
+def test_changed_fields():
+    assert changed_fields(None, {"a": 1}) == ["a"]
+    assert changed_fields({"a": 1, "b": 2}, {"a": 1, "c": 3}) == ["b", "c"]
+
+
+def test_album_pieces_delivered_once_after_window():
+    async def scenario():
+        delivered = []
+
+        async def on_album(group):
+            delivered.append([m.id for m in group])
+
+        albums = AlbumCollector(0.05, on_album)
+        for m in (_msg(12, grouped_id=7), _msg(11, "caption", grouped_id=7), _msg(12, grouped_id=7)):
+            albums.add(m)
+        albums.add(_msg(20, grouped_id=8))
+        await asyncio.sleep(0.1)
+        await albums.close()
+        return delivered
+
+    assert sorted(asyncio.run(scenario())) == [[11, 12], [20]]
+
+
+def test_album_close_flushes_pending_and_waits_for_handling():
+    async def scenario():
+        handled = []
+
+        async def on_album(group):
+            await asyncio.sleep(0.05)
+            handled.append([m.id for m in group])
+
+        albums = AlbumCollector(60, on_album)
+        albums.add(_msg(1, grouped_id=7))
+        albums.add(_msg(2, grouped_id=7))
+        await albums.close()
+        return handled, albums.pending
+
+    assert asyncio.run(scenario()) == ([[1, 2]], 0)
+
+
+def _ctx(ledger):
+    return AppContext(cfg=None, client=None, registry=SourceRegistry(), pool=None, ledger=ledger)
+
+
+def test_edit_of_message_in_flight_is_deferred(tmp_path):
+    async def scenario():
+        ledger = MessageLedger(str(tmp_path / "ledger.sqlite3"))
+        ledger.open()
+        ctx = _ctx(ledger)
+        ctx.pending_edits[(CHAT, 5)] = None  # 원본이 아직 처리 중
+        first, last = _msg(5, "$ABC at 10:00"), _msg(5, "$ABC at 11:00")
+        await handle_edit(ctx, first)
+        await handle_edit(ctx, last)
+        await handle_edit(ctx, _msg(6, "unrelated edit"))
+        ledger.close()
+        return ctx.pending_edits
+
+    pending = asyncio.run(scenario())
+    assert list(pending) == [(CHAT, 5)]
+    assert pending[(CHAT, 5)].raw_text == "$ABC at 11:00"
+
+
+def test_cosmetic_edit_updates_source_text_without_reanalysis(tmp_path):
+    async def scenario():
+        ledger = MessageLedger(str(tmp_path / "ledger.sqlite3"))
+        ledger.open()
+        old = "$ABC listing at 10:00 UTC, reward 500 USDT"
+        await ledger.record_alert(SentAlert(CHAT, 5, 900, old, {"token": "ABC"}, "<b>ABC</b>", False))
+        # cfg 가 None 이라 GPT 단계까지 가면 실패한다: 문구만 바뀐 수정은 그 전에 끝나야 함
+        await handle_edit(_ctx(ledger), _msg(5, "$ABC listing at 10:00 UTC! Reward: 500 USDT"))
+        alert = await ledger.get_alert(CHAT, 5)
+        ledger.close()
+        return alert
+
+    alert = asyncio.run(scenario())
+    assert alert.source_text == "$ABC listing at 10:00 UTC! Reward: 500 USDT"
+    assert alert.html == "<b>ABC</b>"
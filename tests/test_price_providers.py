@@ -0,0 +1,136 @@
+import asyncio
+
+import httpx
+import pytest
+
+import price_providers
+from price_providers import (
+    BinanceProvider,
+    CoinGeckoProvider,
+    DexScreenerProvider,
+    PriceProvider,
+    ProviderQuote,
+    hedged_lookup,
+)
+
+BASE = "http://stub.local"
+
+
+@pytest.fixture
+def stub(monkeypatch):
+    """경로별 JSON 응답을 돌려주는 로컬 대역 (httpx.MockTransport)"""
+    routes = {}
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        status, body = routes.get(request.url.path, (404, {}))
+        if callable(body):
+            body = body(request)
+        return httpx.Response(status, json=body)
+
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    monkeypatch.setattr(price_providers, "get_async_client", lambda name, **kw: client)
+    return routes
+
+
+def test_coingecko_exact_symbol_match_and_pinned_price(stub):
+    stub["/search"] = (200, {"coins": [
+        {"id": "wrapped-abc", "symbol": "WABC", "name": "Wrapped"},
+        {"id": "abc-token", "symbol": "abc", "name": "ABC"},
+    ]})
+    stub["/simple/price"] = (200, lambda req: {req.url.params["ids"]: {"usd": 1.25}})
+    provider = CoinGeckoProvider(base_url=BASE)
+
+    quote = asyncio.run(provider.lookup("ABC"))
+    assert quote == ProviderQuote("coingecko", 1.25, "https://www.coingecko.com/en/coins/abc-token", "abc-token")
+    assert asyncio.run(provider.resolve("ABC")) == "abc-token"
+    assert asyncio.run(provider.lookup("ABC", ref="abc-token")).price_usd == 1.25
+    assert asyncio.run(provider.lookup("XYZ")) is None
+
+
+def test_binance_ticker_and_unknown_pair(stub):
+    stub["/api/v3/ticker/price"] = (200, {"symbol": "ABCUSDT", "price": "0.5000"})
+    provider = BinanceProvider(base_url=BASE)
+    quote = asyncio.run(provider.lookup("abc"))
+    assert (quote.price_usd, quote.ref_id) == (0.5, "ABCUSDT")
+    assert quote.url == "https://www.binance.com/en/trade/ABC_USDT"
+
+    stub["/api/v3/ticker/price"] = (400, {"code": -1121, "msg": "Invalid symbol."})
+    assert asyncio.run(provider.lookup("abc")) is None
+
+
+def test_dexscreener_picks_most_liquid_exact_match(stub):
+    pairs = [
+        {"chainId": "eth", "pairAddress": "0x1", "baseToken": {"symbol": "ABC"},
+         "priceUsd": "1.0", "liquidity": {"usd": 60_000}, "url": "u1"},
+        {"chainId": "bsc", "pairAddress": "0x2", "baseToken": {"symbol": "ABC"},
+         "priceUsd": "1.1", "liquidity": {"usd": 900_000}, "url": "u2"},
+        {"chainId": "eth", "pairAddress": "0x3", "baseToken": {"symbol": "ABCD"},
+         "priceUsd": "9.0", "liquidity": {"usd": 9_000_000}, "url": "u3"},
+        {"chainId": "sol", "pairAddress": "0x4", "baseToken": {"symbol": "ABC"},
+         "priceUsd": "5.0", "liquidity": {"usd": 10}, "url": "u4"},
+    ]
+    stub["/latest/dex/search"] = (200, {"pairs": pairs})
+    stub["/latest/dex/pairs/bsc/0x2"] = (200, {"pairs": [pairs[1]]})
+    provider = DexScreenerProvider(base_url=BASE)
+
+    quote = asyncio.run(provider.lookup("abc"))
+    assert (quote.price_usd, quote.ref_id, quote.url) == (1.1, "bsc/0x2", "u2")
+    assert asyncio.run(provider.resolve("abc")) == "bsc/0x2"
+    assert asyncio.run(provider.lookup("abc", ref="bsc/0x2")).price_usd == 1.1
+
+
+class _Fake(PriceProvider):
+    """지연 후 정해진 결과(가격/None/예외)를 돌려주는 공급자"""
+
+    def __init__(self, name, delay_s, result):
+        super().__init__(base_url=BASE)
+        self.name = name
+        self.delay_s = delay_s
+        self.result = result
+        self.started = False
+        self.cancelled = False
+
+    async def lookup(self, symbol, ref=None):
+        self.started = True
+        try:
+            await asyncio.sleep(self.delay_s)
+        except asyncio.CancelledError:
+            self.cancelled = True
+            raise
+        if isinstance(self.result, BaseException):
+            raise self.result
+        if self.result is None:
+            return None
+        return ProviderQuote(self.name, self.result, "", symbol)
+
+
+def test_first_price_wins_and_losers_are_cancelled():
+    fast = _Fake("fast", 0.0, 2.0)
+    later = _Fake("later", 0.0, 3.0)
+    quote = asyncio.run(hedged_lookup([fast, later], "ABC", hedge_delay_s=0.5))
+    assert quote.provider == "fast"
+    assert not later.started
+
+
+def test_slow_provider_is_hedged():
+    slow = _Fake("slow", 1.0, 2.0)
+    backup = _Fake("backup", 0.0, 3.0)
+    quote = asyncio.run(hedged_lookup([slow, backup], "ABC", hedge_delay_s=0.05))
+    assert quote.provider == "backup"
+    assert slow.cancelled
+
+
+def test_all_miss_returns_none():
+    providers = [_Fake("a", 0.0, None), _Fake("b", 0.0, None)]
+    assert asyncio.run(hedged_lookup(providers, "ABC", hedge_delay_s=0.5)) is None
+
+
+def test_miss_plus_error_reraises():
+    providers = [_Fake("a", 0.0, RuntimeError("boom")), _Fake("b", 0.0, None)]
+    with pytest.raises(RuntimeError, match="boom"):
+        asyncio.run(hedged_lookup(providers, "ABC", hedge_delay_s=0.5))
+
+
+def test_error_then_price_returns_price():
+    providers = [_Fake("a", 0.0, RuntimeError("boom")), _Fake("b", 0.0, 4.0)]
+    assert asyncio.run(hedged_lookup(providers, "ABC", hedge_delay_s=0.5)).provider == "b"
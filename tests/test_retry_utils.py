@@ -0,0 +1,44 @@
+import asyncio
+
+import pytest
+
+from utils.retry_utils import CircuitBreaker, configure_upstream, run_with_retries
+
+
+def test_cancelled_half_open_trial_frees_slot():
+    async def scenario():
+        up = configure_upstream("test-cancel", failure_threshold=1, reset_timeout_s=0.0)
+        up.breaker.record_failure()
+        assert up.breaker.state == CircuitBreaker.OPEN
+
+        started = asyncio.Event()
+
+        async def hang():
+            started.set()
+            await asyncio.sleep(10)
+
+        trial = asyncio.create_task(run_with_retries(hang, "test-cancel", attempts=1))
+        await started.wait()
+        trial.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await trial
+
+        # 취소는 실패로 세지 않고, 다음 호출이 시험 호출이 되어 회로를 닫는다
+        assert up.breaker.state == CircuitBreaker.HALF_OPEN
+
+        async def ok():
+            return 1
+
+        assert await run_with_retries(ok, "test-cancel", attempts=1) == 1
+        assert up.breaker.state == CircuitBreaker.CLOSED
+
+    asyncio.run(scenario())
+
+
+def test_half_open_allows_single_trial():
+    breaker = CircuitBreaker("test-single", failure_threshold=1, reset_timeout_s=0.0)
+    breaker.record_failure()
+    assert breaker.allow()
+    assert not breaker.allow()
+    breaker.release_trial()
+    assert breaker.allow()
@@ -0,0 +1,24 @@
+from __future__ import annotations
+
+from typing import Dict
+
+import httpx
+
+
+# 업스트림별 공유 AsyncClient (커넥션 풀/TLS 세션 재사용)
+_CLIENTS: Dict[str, httpx.AsyncClient] = {}
+
+
+def get_async_client(name: str, **kwargs) -> httpx.AsyncClient:
+    """name 별로 AsyncClient 를 하나만 만들어 재사용. kwargs 는 최초 생성 시에만 적용"""
+    client = _CLIENTS.get(name)
+    if client is None or client.is_closed:
+        client = _CLIENTS[name] = httpx.AsyncClient(**kwargs)
+    return client
+
+
+async def close_all() -> None:
+    for client in list(_CLIENTS.values()):
+        if not client.is_closed:
+            await client.aclose()
+    _CLIENTS.clear()
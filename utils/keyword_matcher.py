@@ -0,0 +1,152 @@
+from __future__ import annotations
+
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Tuple
+
+
+# 가중치 미지정 시 기본값: ALLOW 는 +1, BLOCK 은 사실상 거부권(기존 동작 유지)
+DEFAULT_ALLOW_WEIGHT = 1.0
+DEFAULT_BLOCK_WEIGHT = 100.0
+# 키워드와 가중치 구분자. 키워드 안의 콜론("listing at 10:00")과 겹치지 않도록 별도 기호
+WEIGHT_SEP = "|"
+
+
+@dataclass(frozen=True)
+class KeywordRule:
+    """키워드 규칙 하나 (`keyword` 또는 `keyword|weight` 형식에서 파싱)"""
+    keyword: str
+    weight: float
+    kind: str  # "allow" | "block"
+
+
+@dataclass
+class MatchResult:
+    """한 번의 스캔으로 얻은 분류 결과"""
+    allow_hits: List[KeywordRule] = field(default_factory=list)
+    block_hits: List[KeywordRule] = field(default_factory=list)
+    score: float = 0.0
+
+    @property
+    def matched(self) -> List[str]:
+        return [r.keyword for r in self.allow_hits] + [f"-{r.keyword}" for r in self.block_hits]
+
+
+def parse_rule(raw: str, kind: str) -> Optional[KeywordRule]:
+    """"token circulation starts|1.5" -> KeywordRule(keyword, 1.5)
+
+    가중치는 마지막 `|` 뒤에만 올 수 있다. `|` 뒤가 숫자가 아니면 전체를 키워드로 취급한다.
+    """
+    text = " ".join(raw.lower().split())
+    if not text:
+        return None
+    default = DEFAULT_BLOCK_WEIGHT if kind == "block" else DEFAULT_ALLOW_WEIGHT
+    keyword, sep, tail = text.rpartition(WEIGHT_SEP)
+    keyword = keyword.strip()
+    if sep and keyword:
+        try:
+            return KeywordRule(keyword=keyword, weight=float(tail), kind=kind)
+        except ValueError:
+            pass
+    return KeywordRule(keyword=text, weight=default, kind=kind)
+
+
+def _is_word_char(ch: str) -> bool:
+    return ch.isalnum() or ch == "_"
+
+
+class KeywordMatcher:
+    """ALLOW/BLOCK 키워드를 하나의 Aho-Corasick 오토마톤으로 묶은 매처
+
+    텍스트를 한 번만 순회하며 모든 규칙을 동시에 찾는다. whole_word=True 이면
+    키워드 앞뒤가 단어 문자(영숫자/밑줄)가 아닐 때만 매칭으로 인정한다.
+    """
+
+    def __init__(
+        self,
+        allow: Iterable[str] = (),
+        block: Iterable[str] = (),
+        whole_word: bool = False,
+    ):
+        self.whole_word = whole_word
+        self.rules: List[KeywordRule] = []
+        for kind, values in (("allow", allow), ("block", block)):
+            for raw in values:
+                rule = parse_rule(raw, kind)
+                if rule:
+                    self.rules.append(rule)
+        self.has_allow = any(r.kind == "allow" for r in self.rules)
+
+        # trie: goto[state] = {char: next_state}, out[state] = [rule index]
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[List[int]] = [[]]
+        for idx, rule in enumerate(self.rules):
+            self._insert(rule.keyword, idx)
+        self._build_failure_links()
+
+    def _insert(self, keyword: str, idx: int) -> None:
+        state = 0
+        for ch in keyword:
+            nxt = self._goto[state].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[state][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            state = nxt
+        self._out[state].append(idx)
+
+    def _build_failure_links(self) -> None:
+        queue: deque = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self._goto[state].items():
+                queue.append(nxt)
+                f = self._fail[state]
+                while f and ch not in self._goto[f]:
+                    f = self._fail[f]
+                cand = self._goto[f].get(ch, 0)
+                self._fail[nxt] = cand if cand != nxt else 0
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+    def _scan(self, lower: str) -> List[Tuple[int, int]]:
+        """(rule index, end position) 목록 반환"""
+        hits: List[Tuple[int, int]] = []
+        goto, fail, out = self._goto, self._fail, self._out
+        state = 0
+        for pos, ch in enumerate(lower):
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            if out[state]:
+                for idx in out[state]:
+                    hits.append((idx, pos))
+        return hits
+
+    def classify(self, text: str) -> MatchResult:
+        result = MatchResult()
+        if not text or not self.rules:
+            return result
+
+        lower = " ".join(text.lower().split())
+        seen = set()
+        for idx, end in self._scan(lower):
+            if idx in seen:
+                continue
+            rule = self.rules[idx]
+            if self.whole_word:
+                start = end - len(rule.keyword) + 1
+                if start > 0 and _is_word_char(lower[start - 1]) and _is_word_char(rule.keyword[0]):
+                    continue
+                if end + 1 < len(lower) and _is_word_char(lower[end + 1]) and _is_word_char(rule.keyword[-1]):
+                    continue
+            seen.add(idx)
+            if rule.kind == "allow":
+                result.allow_hits.append(rule)
+                result.score += rule.weight
+            else:
+                result.block_hits.append(rule)
+                result.score -= rule.weight
+        return result
@@ -1,19 +1,144 @@
+import atexit
+import contextvars
+import copy
+import json
 import logging
+import logging.handlers
+import queue
 import sys
 import os
+import threading
+from typing import Any, Dict, Optional
 
 
-def setup_logging(level: str) -> None:
+# 메시지 단위 추적 id: 한 소스 메시지의 모든 처리 단계 로그를 묶는다
+trace_id_var: contextvars.ContextVar[str] = contextvars.ContextVar("trace_id", default="-")
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+# LogRecord 기본 속성 (JSON 출력 시 extra 필드만 골라내기 위함)
+_RECORD_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime", "trace_id"}
+
+
+def set_trace_id(value: str) -> contextvars.Token:
+    return trace_id_var.set(value)
+
+
+def reset_trace_id(token: contextvars.Token) -> None:
+    trace_id_var.reset(token)
+
+
+class _TraceFilter(logging.Filter):
+    def filter(self, record: logging.LogRecord) -> bool:
+        # QueueHandler 로 넘어가기 전에(호출한 태스크 문맥에서) 채워야 한다
+        record.trace_id = trace_id_var.get()
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    """한 줄 JSON 로그. extra= 로 넘긴 필드도 함께 기록"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        payload: Dict[str, Any] = {
+            "ts": self.formatTime(record, "%Y-%m-%dT%H:%M:%S"),
+            "level": record.levelname,
+            "logger": record.name,
+            "trace_id": getattr(record, "trace_id", "-"),
+            "msg": record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRS and not key.startswith("_"):
+                payload[key] = value
+        if record.exc_info:
+            payload["exc"] = self.formatException(record.exc_info)
+        return json.dumps(payload, ensure_ascii=False, default=str)
+
+
+class LazyJson:
+    """로그 인자로 넘기면 실제로 출력될 때만 직렬화된다"""
+
+    __slots__ = ("obj", "indent")
+
+    def __init__(self, obj: Any, indent: Optional[int] = None):
+        self.obj = obj
+        self.indent = indent
+
+    def __str__(self) -> str:
+        return json.dumps(self.obj, ensure_ascii=False, indent=self.indent, default=str)
+
+
+class LogSampler:
+    """고빈도 로그 샘플링: 키별 첫 발생과 이후 every 번째마다만 기록
+
+    should_log() 가 None 이면 건너뛰고, 정수면 직전 기록 이후 생략된 횟수다.
+    """
+
+    def __init__(self, every: int = 100):
+        self.every = max(1, every)
+        self._counts: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def should_log(self, key: str) -> Optional[int]:
+        with self._lock:
+            n = self._counts.get(key, 0)
+            self._counts[key] = n + 1
+        if n == 0:
+            return 0
+        if n % self.every == 0:
+            return self.every - 1
+        return None
+
+
+sampler = LogSampler()
+
+
+def log_sampled(key: str, msg: str, *args: Any, level: int = logging.INFO) -> None:
+    """메시지마다 찍히는 로그를 sampler 로 걸러 기록 (생략된 횟수를 suppressed 로 덧붙임)"""
+    suppressed = sampler.should_log(key)
+    if suppressed is not None:
+        logging.log(level, f"{msg} | suppressed=%d", *args, suppressed, stacklevel=2)
+
+
+class _DeferredFormatQueueHandler(logging.handlers.QueueHandler):
+    """레코드를 포맷하지 않고 큐에 넣는 QueueHandler
+
+    기본 prepare() 는 호출한 스레드(이벤트 루프)에서 포맷터와 traceback 포맷까지 실행한다.
+    여기서는 인자만 메시지에 합쳐(이후 바뀔 수 있는 객체를 고정) 넘기고, 시각/JSON/traceback
+    포맷은 리스너 스레드의 핸들러가 맡는다.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+
+def setup_logging(level: str, fmt: str = "text", sample_every: int = 100) -> None:
+    """루트 로거 설정. 실제 출력은 QueueListener 스레드가 담당해 이벤트 루프를 막지 않는다"""
+    global _listener
     numeric = getattr(logging, level.upper(), logging.INFO)
     handler = logging.StreamHandler(sys.stdout)
-    fmt = "%(asctime)s | %(levelname)s | %(name)s | %(message)s"
-    datefmt = "%Y-%m-%d %H:%M:%S"
-    handler.setFormatter(logging.Formatter(fmt=fmt, datefmt=datefmt))
+    if fmt == "json":
+        handler.setFormatter(JsonFormatter())
+    else:
+        text_fmt = "%(asctime)s | %(levelname)s | %(name)s | %(trace_id)s | %(message)s"
+        datefmt = "%Y-%m-%d %H:%M:%S"
+        handler.setFormatter(logging.Formatter(fmt=text_fmt, datefmt=datefmt))
+
+    if _listener is not None:
+        _listener.stop()
+    log_queue: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+    queue_handler = _DeferredFormatQueueHandler(log_queue)
+    queue_handler.addFilter(_TraceFilter())
+    _listener = logging.handlers.QueueListener(log_queue, handler, respect_handler_level=True)
+    _listener.start()
 
     root = logging.getLogger()
     root.handlers.clear()
-    root.addHandler(handler)
+    root.addHandler(queue_handler)
     root.setLevel(numeric)
+    sampler.every = max(1, sample_every)
 
     # Quiet noisy third-party libs by default
     quiet_libs = os.getenv("QUIET_LIBS", "true").lower() == "true"
@@ -23,3 +148,13 @@ def setup_logging(level: str) -> None:
         for name in ("telethon", "httpx", "httpcore", "asyncio"):
             logging.getLogger(name).setLevel(lib_level)
 
+
+def stop_logging() -> None:
+    """남은 로그를 모두 출력하고 리스너 스레드 종료"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+atexit.register(stop_logging)
@@ -0,0 +1,116 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import sys
+import threading
+import time
+import traceback
+from typing import Optional
+
+from utils.metrics import metrics
+
+
+def _format_stack(thread_id: int, limit: int = 12) -> str:
+    frame = sys._current_frames().get(thread_id)
+    if frame is None:
+        return "<no frame>"
+    return "".join(traceback.format_stack(frame, limit=limit))
+
+
+class LoopMonitor:
+    """이벤트 루프 지연 측정기 + 정지 감시 스레드
+
+    루프 안의 하트비트 태스크가 interval_s 마다 깨어나 예정보다 늦은 만큼을
+    지연(loop.lag_s)으로 기록한다. 별도 감시 스레드는 하트비트가 lag_threshold_s
+    이상 늦어지면 그 순간 루프 스레드의 스택을 한 번 떠 두고, 하트비트가 지연을
+    보고할 때 함께 남겨 100ms 급 지연도 원인 콜백을 알 수 있게 한다. 하트비트가
+    stall_s 이상 멈추면 정지로 보고 sample_every_s 마다 다시 샘플링한다(같은 스택은
+    반복 기록하지 않음).
+    """
+
+    def __init__(
+        self,
+        interval_s: float = 0.25,
+        lag_threshold_s: float = 0.1,
+        stall_s: float = 1.0,
+        sample_every_s: float = 1.0,
+    ):
+        self.interval_s = interval_s
+        self.lag_threshold_s = lag_threshold_s
+        self.stall_s = stall_s
+        self.sample_every_s = sample_every_s
+        self._heartbeat = time.monotonic()
+        self._lag_stack: Optional[str] = None  # 진행 중인 지연 구간에서 뜬 스택
+        self._loop_thread_id: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    def start(self) -> None:
+        self._loop_thread_id = threading.get_ident()
+        self._heartbeat = time.monotonic()
+        self._task = asyncio.create_task(self._beat())
+        self._thread = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._task:
+            self._task.cancel()
+
+    async def _beat(self) -> None:
+        while True:
+            expected = time.monotonic() + self.interval_s
+            await asyncio.sleep(self.interval_s)
+            now = time.monotonic()
+            self._heartbeat = now
+            stack, self._lag_stack = self._lag_stack, None
+            lag = max(0.0, now - expected)
+            metrics.observe("loop.lag_s", lag)
+            metrics.set_gauge("loop.lag_s", lag)
+            if lag >= self.lag_threshold_s:
+                metrics.inc("loop.lag_exceeded")
+                if stack:
+                    logging.warning(
+                        "event loop lag %.3fs (threshold %.3fs), loop thread was in:\n%s",
+                        lag,
+                        self.lag_threshold_s,
+                        stack,
+                    )
+                else:
+                    logging.warning("event loop lag %.3fs (threshold %.3fs)", lag, self.lag_threshold_s)
+
+    def _watch(self) -> None:
+        stalled_since: Optional[float] = None  # 정지 직전 하트비트 시각
+        last_sample = 0.0
+        last_stack = ""
+        lag_sampled_beat: Optional[float] = None  # 지연 스택을 뜬 하트비트 (구간당 한 번)
+        while not self._stop.wait(min(self.lag_threshold_s, self.stall_s, self.sample_every_s) / 2):
+            now = time.monotonic()
+            beat = self._heartbeat
+            blocked = now - beat
+            # 하트비트는 interval_s 마다 오므로 그보다 lag_threshold_s 이상 늦으면 무언가 루프를 잡고 있다
+            if blocked >= self.interval_s + self.lag_threshold_s and lag_sampled_beat != beat:
+                lag_sampled_beat = beat
+                self._lag_stack = _format_stack(self._loop_thread_id)
+                metrics.inc("loop.lag_samples")
+            if blocked < self.stall_s:
+                if stalled_since is not None:
+                    duration = self._heartbeat - stalled_since
+                    metrics.observe("loop.stall_s", duration)
+                    logging.warning("event loop resumed after ~%.2fs stall", duration)
+                stalled_since = None
+                last_stack = ""
+                continue
+            if stalled_since is None:
+                stalled_since = self._heartbeat
+                metrics.inc("loop.stalls")
+            if now - last_sample < self.sample_every_s:
+                continue
+            last_sample = now
+            stack = _format_stack(self._loop_thread_id)
+            metrics.inc("loop.stack_samples")
+            if stack != last_stack:
+                last_stack = stack
+                logging.warning("event loop blocked for %.2fs, loop thread stack:\n%s", blocked, stack)
@@ -0,0 +1,107 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from typing import Deque, Dict, Optional
+
+
+class _Summary:
+    """최근 관측값 저장소 (백분위 계산용 고정 크기 샘플)"""
+
+    def __init__(self, size: int = 1024):
+        self.values: Deque[float] = deque(maxlen=size)
+        self.count = 0
+        self.total = 0.0
+
+    def observe(self, value: float) -> None:
+        self.values.append(value)
+        self.count += 1
+        self.total += value
+
+    def percentile(self, q: float) -> Optional[float]:
+        if not self.values:
+            return None
+        ordered = sorted(self.values)
+        idx = min(len(ordered) - 1, max(0, int(round(q / 100.0 * (len(ordered) - 1)))))
+        return ordered[idx]
+
+    def snapshot(self) -> dict:
+        return {
+            "count": self.count,
+            "avg": (self.total / self.count) if self.count else None,
+            "p50": self.percentile(50),
+            "p90": self.percentile(90),
+            "p99": self.percentile(99),
+            "max": max(self.values) if self.values else None,
+        }
+
+
+class Metrics:
+    """프로세스 내 카운터/게이지/요약 지표
+
+    이름에 채널 등 라벨을 붙일 때는 "name[label]" 형식을 사용한다.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.counters: Dict[str, float] = {}
+        self.gauges: Dict[str, float] = {}
+        self.summaries: Dict[str, _Summary] = {}
+
+    def inc(self, name: str, value: float = 1.0) -> None:
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0.0) + value
+
+    def set_gauge(self, name: str, value: float) -> None:
+        with self._lock:
+            self.gauges[name] = value
+
+    def observe(self, name: str, value: float) -> None:
+        with self._lock:
+            summary = self.summaries.get(name)
+            if summary is None:
+                summary = self.summaries[name] = _Summary()
+            summary.observe(value)
+
+    def percentile(self, name: str, q: float) -> Optional[float]:
+        summary = self.summaries.get(name)
+        return summary.percentile(q) if summary else None
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "ts": time.time(),
+                "counters": dict(self.counters),
+                "gauges": dict(self.gauges),
+                "summaries": {k: v.snapshot() for k, v in self.summaries.items()},
+            }
+
+
+metrics = Metrics()
+
+
+def _write_snapshot(path: str, snapshot: dict) -> None:
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(snapshot, f, ensure_ascii=False)
+    os.replace(tmp, path)
+
+
+async def run_metrics_reporter(interval_s: float, path: Optional[str] = None) -> None:
+    """주기적으로 지표를 로그에 남기고, path 가 있으면 JSON 파일로도 기록"""
+    if interval_s <= 0:
+        return
+    while True:
+        await asyncio.sleep(interval_s)
+        snapshot = metrics.snapshot()
+        logging.info("metrics | %s", json.dumps(snapshot, ensure_ascii=False, default=str))
+        if path:
+            try:
+                await asyncio.to_thread(_write_snapshot, path, snapshot)
+            except Exception:
+                logging.exception("failed to write metrics file: %s", path)
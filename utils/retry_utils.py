@@ -1,34 +1,239 @@
 from __future__ import annotations
 
-import time
+import asyncio
+import logging
 import random
-from typing import Callable, TypeVar, Optional
+import time
+from dataclasses import dataclass, field
+from email.utils import parsedate_to_datetime
+from typing import Awaitable, Callable, Dict, Optional, TypeVar
+
+import httpx
+
+from utils.metrics import metrics
 
 T = TypeVar("T")
 
 
-def run_with_retries(
-    func: Callable[[], T],
+class HttpStatusError(RuntimeError):
+    """비정상 HTTP 응답 (상태 코드와 Retry-After 힌트 포함)"""
+
+    def __init__(self, upstream: str, status: int, retry_after: Optional[float] = None, body: str = ""):
+        super().__init__(f"{upstream} http {status}")
+        self.upstream = upstream
+        self.status = status
+        self.retry_after = retry_after
+        self.body = body
+
+
+class RetryableError(RuntimeError):
+    """응답은 받았지만 다시 시도할 가치가 있는 오류 (예: JSON 파싱 실패)"""
+
+
+class CircuitOpenError(RuntimeError):
+    """업스트림 회로가 열려 있어 호출하지 않고 즉시 실패"""
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Retry-After 헤더(초 또는 HTTP-date)를 초 단위로 변환"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except Exception:
+        return None
+
+
+def is_retryable(exc: BaseException) -> bool:
+    """재시도 대상 판정: 타임아웃/전송 오류, 408/425/429/5xx, RetryableError"""
+    if isinstance(exc, HttpStatusError):
+        return exc.status in (408, 425, 429) or exc.status >= 500
+    if isinstance(exc, (httpx.TimeoutException, httpx.TransportError, RetryableError)):
+        return True
+    return False
+
+
+def _counts_against_upstream(exc: BaseException) -> bool:
+    """회로 차단기에 실패로 기록할 오류인지 (클라이언트 측 4xx 는 제외)"""
+    if isinstance(exc, RetryableError):
+        return False
+    return is_retryable(exc)
+
+
+class RetryBudget:
+    """업스트림별 재시도 예산 (토큰 버킷)
+
+    최초 시도마다 ratio 만큼 토큰이 쌓이고 재시도 1회에 토큰 1개를 쓴다.
+    장애 중에도 전체 요청 대비 재시도 비율이 ratio 를 넘지 않는다.
+    """
+
+    def __init__(self, ratio: float = 0.2, max_tokens: float = 10.0):
+        self.ratio = ratio
+        self.max_tokens = max_tokens
+        self.tokens = max_tokens
+
+    def on_request(self) -> None:
+        self.tokens = min(self.max_tokens, self.tokens + self.ratio)
+
+    def try_spend(self) -> bool:
+        if self.tokens >= 1.0:
+            self.tokens -= 1.0
+            return True
+        return False
+
+
+class CircuitBreaker:
+    """연속 실패가 threshold 에 도달하면 reset_timeout_s 동안 즉시 실패(open).
+
+    이후 한 번의 시험 호출(half-open)이 성공하면 다시 닫힌다.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, name: str, failure_threshold: int = 5, reset_timeout_s: float = 30.0):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout_s = reset_timeout_s
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._trial_in_flight = False
+
+    def allow(self) -> bool:
+        if self.state == self.CLOSED:
+            return True
+        if self.state == self.OPEN:
+            if time.monotonic() - self.opened_at < self.reset_timeout_s:
+                return False
+            self.state = self.HALF_OPEN
+            self._trial_in_flight = False
+        if self._trial_in_flight:
+            return False
+        self._trial_in_flight = True
+        return True
+
+    def record_success(self) -> None:
+        if self.state != self.CLOSED:
+            logging.info("circuit closed: %s", self.name)
+        self.state = self.CLOSED
+        self.failures = 0
+        self._trial_in_flight = False
+        metrics.set_gauge(f"circuit.open[{self.name}]", 0)
+
+    def release_trial(self) -> None:
+        """결과 없이 끝난 시험 호출(취소 등)의 half-open 슬롯만 반납"""
+        self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        self._trial_in_flight = False
+        if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+            if self.state != self.OPEN:
+                logging.warning("circuit opened: %s (failures=%d)", self.name, self.failures)
+                metrics.inc(f"circuit.opened[{self.name}]")
+            self.state = self.OPEN
+            self.opened_at = time.monotonic()
+            metrics.set_gauge(f"circuit.open[{self.name}]", 1)
+
+
+@dataclass
+class Upstream:
+    name: str
+    budget: RetryBudget = field(default_factory=RetryBudget)
+    breaker: Optional[CircuitBreaker] = None
+
+    def __post_init__(self) -> None:
+        if self.breaker is None:
+            self.breaker = CircuitBreaker(self.name)
+
+
+_UPSTREAMS: Dict[str, Upstream] = {}
+
+
+def get_upstream(name: str) -> Upstream:
+    up = _UPSTREAMS.get(name)
+    if up is None:
+        up = _UPSTREAMS[name] = Upstream(name)
+    return up
+
+
+def configure_upstream(
+    name: str,
+    retry_ratio: float = 0.2,
+    failure_threshold: int = 5,
+    reset_timeout_s: float = 30.0,
+) -> Upstream:
+    up = Upstream(
+        name,
+        budget=RetryBudget(ratio=retry_ratio),
+        breaker=CircuitBreaker(name, failure_threshold=failure_threshold, reset_timeout_s=reset_timeout_s),
+    )
+    _UPSTREAMS[name] = up
+    return up
+
+
+async def run_with_retries(
+    func: Callable[[], Awaitable[T]],
+    upstream: str,
     attempts: int = 3,
     base_delay_s: float = 0.5,
     backoff_factor: float = 2.0,
     max_delay_s: float = 8.0,
+    classify: Callable[[BaseException], bool] = is_retryable,
     on_retry: Optional[Callable[[int, BaseException], None]] = None,
 ) -> T:
-    last_exc: Optional[BaseException] = None
+    """비동기 재시도 실행기
+
+    - 재시도 불가 오류(4xx 등)는 즉시 전파하고, 취소(CancelledError)는 잡지 않는다.
+    - Retry-After 가 있으면 백오프 대신 그 값을 따르고, max_delay_s 보다 길면 포기한다.
+    - 업스트림별 재시도 예산이 바닥나면 더 재시도하지 않는다.
+    - 회로가 열려 있으면 호출 없이 CircuitOpenError 를 던진다.
+    """
+    up = get_upstream(upstream)
+    up.budget.on_request()
     delay = base_delay_s
     for i in range(1, attempts + 1):
+        if not up.breaker.allow():
+            metrics.inc(f"retry.short_circuited[{upstream}]")
+            raise CircuitOpenError(f"{upstream} circuit open")
         try:
-            return func()
-        except BaseException as exc:  # noqa: BLE001
-            last_exc = exc
-            if i >= attempts:
-                break
+            result = await func()
+        except asyncio.CancelledError:
+            # 헤지 패자 취소 등은 업스트림 상태와 무관: 실패로 세지 않고 시험 슬롯만 반납
+            up.breaker.release_trial()
+            raise
+        except Exception as exc:
+            if _counts_against_upstream(exc):
+                up.breaker.record_failure()
+            else:
+                # 응답이 온 이상 업스트림은 살아 있음: half-open 시험 슬롯도 반납
+                up.breaker.record_success()
+            if i >= attempts or not classify(exc):
+                raise
+            if not up.budget.try_spend():
+                metrics.inc(f"retry.budget_exhausted[{upstream}]")
+                logging.warning("retry budget exhausted: %s", upstream)
+                raise
             if on_retry:
                 on_retry(i, exc)
-            jitter = random.uniform(0, delay * 0.3)
-            time.sleep(min(delay + jitter, max_delay_s))
+            metrics.inc(f"retry.attempts[{upstream}]")
+            retry_after = getattr(exc, "retry_after", None)
+            if retry_after is not None:
+                if retry_after > max_delay_s:
+                    # 업스트림이 요구한 대기 시간이 너무 길면 기다리지 않고 실패
+                    raise
+                wait = retry_after
+            else:
+                wait = min(delay + random.uniform(0, delay * 0.3), max_delay_s)
+            await asyncio.sleep(wait)
             delay = min(delay * backoff_factor, max_delay_s)
-    assert last_exc is not None
-    raise last_exc
-
+            continue
+        up.breaker.record_success()
+        return result
+    raise AssertionError("unreachable")
@@ -0,0 +1,117 @@
+from __future__ import annotations
+
+import asyncio
+import cProfile
+import io
+import json
+import logging
+import os
+import pstats
+import signal
+import time
+import tracemalloc
+from typing import Callable, Dict, Optional
+
+
+class RuntimeProfiler:
+    """실행 중 프로파일링 제어 (재시작/재로그인 없이)
+
+    - SIGUSR1: 이벤트 루프 스레드에서 cProfile 을 duration_s 동안 수집해 보고서 저장
+    - SIGUSR2: tracemalloc 스냅샷을 떠 직전 스냅샷과의 차이를 보고서로 저장
+      (첫 신호는 추적 시작 + 기준 스냅샷만 만든다)
+
+    보고서 머리에는 context() 가 돌려준 상태값(대기열 깊이, 예약 작업 수 등)을 남긴다.
+    """
+
+    def __init__(
+        self,
+        out_dir: str,
+        duration_s: float = 30.0,
+        context: Optional[Callable[[], Dict[str, object]]] = None,
+        top: int = 40,
+    ):
+        self.out_dir = out_dir
+        self.duration_s = duration_s
+        self.context = context or (lambda: {})
+        self.top = top
+        self._profile: Optional[cProfile.Profile] = None
+        self._baseline: Optional[tracemalloc.Snapshot] = None
+
+    def install(self, loop: asyncio.AbstractEventLoop) -> bool:
+        """시그널 핸들러 등록. 지원하지 않는 플랫폼이면 False"""
+        if not (hasattr(signal, "SIGUSR1") and hasattr(signal, "SIGUSR2")):
+            logging.info("runtime profiler: SIGUSR1/SIGUSR2 not available on this platform")
+            return False
+        try:
+            loop.add_signal_handler(signal.SIGUSR1, self.start_cpu_profile)
+            loop.add_signal_handler(signal.SIGUSR2, self.memory_snapshot)
+        except (NotImplementedError, RuntimeError):
+            logging.info("runtime profiler: loop does not support signal handlers")
+            return False
+        logging.info("runtime profiler ready: kill -USR1 %d (cpu), kill -USR2 %d (memory)", os.getpid(), os.getpid())
+        return True
+
+    def _header(self, kind: str) -> str:
+        try:
+            ctx = dict(self.context())
+        except Exception:
+            logging.exception("runtime profiler: context provider failed")
+            ctx = {}
+        ctx.setdefault("asyncio_tasks", len(asyncio.all_tasks()))
+        ctx["kind"] = kind
+        ctx["pid"] = os.getpid()
+        ctx["ts"] = time.strftime("%Y-%m-%d %H:%M:%S")
+        return "# " + json.dumps(ctx, ensure_ascii=False, default=str) + "\n"
+
+    def _write(self, kind: str, body: str) -> Optional[str]:
+        path = os.path.join(self.out_dir, f"{kind}-{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}.txt")
+        try:
+            os.makedirs(self.out_dir, exist_ok=True)
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(self._header(kind))
+                f.write(body)
+        except OSError:
+            logging.exception("runtime profiler: failed to write %s", path)
+            return None
+        logging.info("runtime profiler report written: %s", path)
+        return path
+
+    def start_cpu_profile(self) -> None:
+        if self._profile is not None:
+            logging.info("runtime profiler: cpu profile already running")
+            return
+        self._profile = cProfile.Profile()
+        self._profile.enable()
+        asyncio.get_running_loop().call_later(self.duration_s, self.stop_cpu_profile)
+        logging.info("runtime profiler: cpu profile started for %.0fs", self.duration_s)
+
+    def stop_cpu_profile(self) -> Optional[str]:
+        prof, self._profile = self._profile, None
+        if prof is None:
+            return None
+        prof.disable()
+        out = io.StringIO()
+        stats = pstats.Stats(prof, stream=out)
+        stats.sort_stats("cumulative").print_stats(self.top)
+        stats.sort_stats("tottime").print_stats(self.top)
+        return self._write("cpu", out.getvalue())
+
+    def memory_snapshot(self) -> Optional[str]:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(10)
+            self._baseline = tracemalloc.take_snapshot()
+            logging.info("runtime profiler: tracemalloc started, baseline taken")
+            return None
+        snapshot = tracemalloc.take_snapshot()
+        current, peak = tracemalloc.get_traced_memory()
+        lines = [f"traced current={current / 1e6:.1f}MB peak={peak / 1e6:.1f}MB", ""]
+        if self._baseline is not None:
+            lines.append(f"top {self.top} allocation growth since previous snapshot:")
+            for stat in snapshot.compare_to(self._baseline, "lineno")[: self.top]:
+                lines.append(str(stat))
+            lines.append("")
+        lines.append(f"top {self.top} live allocations:")
+        for stat in snapshot.statistics("lineno")[: self.top]:
+            lines.append(str(stat))
+        self._baseline = snapshot
+        return self._write("memory", "\n".join(lines) + "\n")
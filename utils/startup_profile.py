@@ -0,0 +1,77 @@
+from __future__ import annotations
+
+import builtins
+import logging
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Tuple
+
+
+class StartupProfiler:
+    """--profile-startup 용 모듈 import / 초기화 단계 시간 측정기
+
+    import 훅은 처음 로드되는 모듈마다 누적 시간과(하위 import 포함)
+    자기 시간(하위 import 제외)을 기록한다. 비활성 상태에서는 아무것도 하지 않는다.
+    """
+
+    def __init__(self, process_start: float, enabled: bool = False):
+        self.process_start = process_start
+        self.enabled = enabled
+        self.imports: Dict[str, Tuple[float, float]] = {}  # name -> (cumulative, self)
+        self.phases: List[Tuple[str, float, float]] = []  # (name, started_at, duration)
+        self._stack: List[float] = []
+        self._orig_import = None
+
+    def install_import_hook(self) -> None:
+        if not self.enabled or self._orig_import is not None:
+            return
+        import sys
+
+        orig = builtins.__import__
+        self._orig_import = orig
+
+        def _timed_import(name, globals=None, locals=None, fromlist=(), level=0):
+            if level or name in sys.modules:
+                return orig(name, globals, locals, fromlist, level)
+            self._stack.append(0.0)
+            t0 = time.perf_counter()
+            try:
+                return orig(name, globals, locals, fromlist, level)
+            finally:
+                elapsed = time.perf_counter() - t0
+                children = self._stack.pop()
+                if self._stack:
+                    self._stack[-1] += elapsed
+                if name not in self.imports:
+                    self.imports[name] = (elapsed, elapsed - children)
+
+        builtins.__import__ = _timed_import
+
+    def uninstall_import_hook(self) -> None:
+        if self._orig_import is not None:
+            builtins.__import__ = self._orig_import
+            self._orig_import = None
+
+    def since_start(self) -> float:
+        return time.perf_counter() - self.process_start
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            if self.enabled:
+                self.phases.append((name, t0 - self.process_start, time.perf_counter() - t0))
+
+    def report(self, top: int = 25) -> None:
+        if not self.enabled:
+            return
+        self.uninstall_import_hook()
+        lines = ["startup profile (seconds since process start)"]
+        for name, started_at, duration in self.phases:
+            lines.append(f"  phase  {name:<32} start={started_at:7.3f}  took={duration:7.3f}")
+        ranked = sorted(self.imports.items(), key=lambda kv: kv[1][0], reverse=True)[:top]
+        for name, (cumulative, self_time) in ranked:
+            lines.append(f"  import {name:<32} cumulative={cumulative:7.3f}  self={self_time:7.3f}")
+        logging.info("\n".join(lines))